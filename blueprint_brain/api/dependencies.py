@@ -10,7 +10,7 @@ from blueprint_brain.src.security.models import ApiKey
 # Define Header
 api_key_header = APIKeyHeader(name="X-API-KEY", auto_error=False)
 
-async def get_current_client(
+def get_current_client(
     key_header: str = Security(api_key_header),
     db: Session = Depends(get_db)
 ) -> ApiKey:
@@ -18,6 +18,7 @@ async def get_current_client(
     1. Checks if API Key exists in Header.
     2. Validates Key Hash against DB.
     3. Checks Redis Rate Limit for this specific client.
+    Sync on purpose: FastAPI runs it in the thread pool (DB + Redis calls).
     """
     if not key_header:
         raise HTTPException(
@@ -35,6 +36,9 @@ async def get_current_client(
 
     # 2. Rate Limiting (Redis)
     # We use the UUID of the key as the identifier
-    RateLimiter.check_limit(client_api_key.id, client_api_key.rate_limit_per_minute)
+    RateLimiter.check_limit(client_api_key.id, client_api_key.rate_limit_per_minute, client_api_key.rate_limit_burst)
 
-    return client_api_key
\ No newline at end of file
+    return client_api_key
+
+# Routes declared with Depends(get_api_key) only need authentication + rate limiting
+get_api_key = get_current_client
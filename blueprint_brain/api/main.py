@@ -1,25 +1,48 @@
+import io
 import uuid
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+import copy
+import json
+import math
+import cv2
+import numpy as np
+from PIL import Image
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from celery import group
+from sqlalchemy.orm import Session
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, Security
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
 from blueprint_brain.api.dependencies import get_api_key
-from blueprint_brain.worker.tasks import process_blueprint
+from blueprint_brain.worker.tasks import process_blueprint, refuse_blueprint, sync_engine_set, analyze_single_image
 from blueprint_brain.services.storage import StorageService
 from blueprint_brain.api.schemas import JobResponse, JobStatus
 # Database Deps
-from blueprint_brain.src.db.session import get_db
+from blueprint_brain.src.db.session import get_db, SessionLocal
 from blueprint_brain.src.db import crud
-from blueprint_brain.api.schemas import JobResponse, ProcessingRequest
+from blueprint_brain.api.schemas import JobResponse, ProcessingRequest, RefusionRequest
+from blueprint_brain.api.schemas import BatchUploadRequest, BatchProcessingRequest, BatchJob, BatchResponse
 
 from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
+from anyio import to_thread
 
 
-from blueprint_brain.api.dependencies import get_current_client
-from blueprint_brain.src.hitl.routes import router as hitl_router
-from blueprint_brain.src.monitoring.metrics import HTTP_REQUESTS_TOTAL
+from blueprint_brain.api.dependencies import get_current_client, api_key_header
+from blueprint_brain.src.security.models import ApiKey
+from blueprint_brain.src.hitl.routes import router as hitl_router, MANUAL_FIX_SOURCE
+from blueprint_brain.src.monitoring.metrics import HTTP_REQUESTS_TOTAL, QueuedWorkCollector
+from blueprint_brain.src.utils.serialization import ResultCodec, NDJSON_MEDIA_TYPE
+from blueprint_brain.services.cache import ResultCache
+from blueprint_brain.services.progress import ProgressStream
+from blueprint_brain.services.result_store import ResultStore
+from blueprint_brain.services.model_pool import ModelPool
+from blueprint_brain.services.admission import AdmissionController
+from blueprint_brain.src.core.exceptions import CapacityExceededError, TenantQuotaExceededError
+from blueprint_brain.config.settings import settings
 
 # Setup Rate Limiter (Redis backend recommended for Prod)
 limiter = Limiter(key_func=get_remote_address)
@@ -29,7 +52,7 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 import hashlib
 from pydantic import HttpUrl
 from prometheus_fastapi_instrumentator import Instrumentator
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Histogram, REGISTRY
 
 
 # Define Custom Metrics
@@ -52,8 +75,22 @@ app.add_middleware(GZipMiddleware, minimum_size=1000)
 @app.on_event("startup")
 async def startup():
     Instrumentator().instrument(app).expose(app) # Exposes /metrics
+    # Endpoints doing S3 / DB / Redis calls are plain 'def': FastAPI runs them
+    # in this thread pool, never on the event loop. Sized to the S3 and DB
+    # connection pools so threads do not queue on connections.
+    to_thread.current_default_thread_limiter().total_tokens = settings.API_IO_THREADS
+    if model_pool is not None:
+        # Models load before the first /analyze request, not during it
+        await run_in_threadpool(model_pool.start)
 
 storage = StorageService()
+result_cache = ResultCache()
+progress_stream = ProgressStream()
+result_store = ResultStore(storage)
+model_pool = ModelPool(sync_engine_set) if settings.SYNC_ANALYZE_ENABLED else None
+admission = AdmissionController()
+# Queued work per queue / tenant on /metrics (KEDA scales GPU workers on it)
+REGISTRY.register(QueuedWorkCollector(admission.snapshot))
 app.include_router(hitl_router)
 
 @app.middleware("http")
@@ -65,13 +102,8 @@ async def add_correlation_id(request: Request, call_next):
     response.headers["X-Request-ID"] = request_id
     return response
 
-# Add Webhook URL to input schema
-class ProcessingRequest(BaseModel):
-    file_key: str  # The file is already in S3 (via presigned upload)
-    webhook_url: Optional[str] = None
-
 @app.post("/upload/direct", dependencies=[Depends(get_api_key)])
-async def get_upload_url(filename: str):
+def get_upload_url(filename: str):
     """
     Step 1: Client asks for permission to upload.
     Returns: A direct S3 URL and a Job ID.
@@ -89,44 +121,254 @@ async def get_upload_url(filename: str):
         "message": "Upload file to 'upload_data.url' using 'upload_data.fields', then call POST /process"
     }
 
-@app.post("/process", response_model=JobResponse, dependencies=[Depends(get_api_key)])
-async def start_processing(req: ProcessingRequest):
+def _admission_delay(tenant_id: str, defer: bool) -> int:
+    """
+    Seconds to delay the start of new work (0 = now). Refuses with 429 (the
+    tenant's own queued work) or 503 (all queues) + Retry-After, unless the
+    client asked to defer and the wait is within ADMISSION_MAX_DEFER_SECONDS.
+    """
+    if not settings.ADMISSION_ENABLED:
+        return 0
+    try:
+        admission.check(tenant_id)
+        return 0
+    except CapacityExceededError as e:
+        retry_after = max(1, math.ceil(e.retry_after))
+        if defer and retry_after <= settings.ADMISSION_MAX_DEFER_SECONDS:
+            return retry_after
+        status = 429 if isinstance(e, TenantQuotaExceededError) else 503
+        JOB_COUNTER.labels(status="rejected").inc()
+        raise HTTPException(status, f"Too much work queued: {e}", headers={"Retry-After": str(retry_after)})
+
+@app.post("/process", response_model=JobResponse)
+def start_processing(req: ProcessingRequest, db: Session = Depends(get_db), client: ApiKey = Depends(get_current_client)):
     """
     Step 2: Client tells us the upload is done. We verify and start working.
+    Duplicate uploads are answered from the existing result without enqueuing.
+    New work is admitted while the queues are below their limits (429/503 +
+    Retry-After otherwise); defer=true accepts it with a delayed start (202).
     """
-    # 1. Verify file exists in S3 (Lightweight check)
+    # 1. Verify file exists in S3 (Lightweight check). The same HEAD returns
+    #    the storage-side checksum, so hashing costs no download.
     try:
-        storage.s3.head_object(Bucket=storage.bucket, Key=req.file_key)
+        head = storage.s3.head_object(Bucket=storage.bucket, Key=req.file_key)
     except Exception:
         raise HTTPException(404, "File not found in storage. Did you upload it?")
 
+    file_hash = StorageService.content_hash_from_head(head)
+
+    previous_input_hash = None
+    if req.previous_job_id:
+        previous = crud.get_job(db, req.previous_job_id)
+        if not previous or previous.api_key_id != client.id:
+            raise HTTPException(404, "Previous job not found")
+        previous_input_hash = (previous.meta_data or {}).get("input_hash")
+
+    # 2. Dedup short-circuit: no worker slot, no download, no admission
+    cached_result_key = result_cache.get_result_key(file_hash)
+    deferred = 0 if cached_result_key else _admission_delay(client.id, req.defer)
 
     # DB: Create Document
-    # Ideally, we calculate hash here, but that requires downloading the file (slow).
-    # We defer hashing to the worker, then update the DB later.
     filename = req.file_key.split('/')[-1]
-    doc = crud.create_document(db, filename=filename, s3_key=req.file_key)
-    
+    doc = crud.create_document(db, filename=filename, s3_key=req.file_key, file_hash=file_hash)
+
+    if cached_result_key:
+        job = crud.create_job(
+            db, document_id=doc.id, status="COMPLETED",
+            result_key=cached_result_key, meta={"input_hash": file_hash, "cached": True},
+            api_key_id=client.id
+        )
+        JOB_COUNTER.labels(status="deduplicated").inc()
+        return JobResponse(job_id=job.id, status="completed", message="Identical file already processed; result reused")
+
     # DB: Create Job
-    job = crud.create_job(db, document_id=doc.id)
+    job = crud.create_job(db, document_id=doc.id, api_key_id=client.id)
+    admission.admit(client.id, [job.id])
 
     # Dispatch (Pass job.id, NOT the random UUID from upload)
+    # tenant_id scopes the near-duplicate page index to this client's history
     process_blueprint.apply_async(
-        args=[req.file_key, req.webhook_url, job.id], # Pass DB Job ID
-        task_id=job.id
+        kwargs={
+            "file_key": req.file_key, "webhook_url": req.webhook_url, "file_hash": file_hash,
+            "tenant_id": client.id, "previous_input_hash": previous_input_hash
+        },
+        task_id=job.id,
+        countdown=deferred or None
     )
+    JOB_COUNTER.labels(status="queued").inc()
 
+    if deferred:
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job.id, "status": "deferred", "message": f"Job persisted; starts in about {deferred}s"},
+            headers={"Retry-After": str(deferred)}
+        )
     return JobResponse(job_id=job.id, status="queued", message="Job persisted and started")
 
-@app.get("/jobs/{job_id}", dependencies=[Depends(get_api_key)])
-async def get_status(job_id: str, db: Session = Depends(get_db)):
+def _upload_key(filename: str) -> str:
+    return f"uploads/{uuid.uuid4()}.{filename.split('.')[-1]}"
+
+@app.post("/batches/upload", dependencies=[Depends(get_api_key)])
+def get_batch_upload_urls(req: BatchUploadRequest):
+    """Presigned uploads for a whole drawing set in one call (then POST /batches)."""
+    if len(req.filenames) > settings.BATCH_MAX_FILES:
+        raise HTTPException(400, f"At most {settings.BATCH_MAX_FILES} files per batch")
+    uploads = []
+    for filename in req.filenames:
+        key = _upload_key(filename)
+        uploads.append({"filename": filename, "file_key": key, "upload_data": storage.generate_presigned_upload(key)})
+    return {"uploads": uploads}
+
+def _head_hash(file_key: str):
+    """(exists, content hash) from one S3 HEAD."""
+    try:
+        return True, StorageService.content_hash_from_head(storage.s3.head_object(Bucket=storage.bucket, Key=file_key))
+    except Exception:
+        return False, None
+
+def _batch_status(counts: dict) -> str:
+    total = sum(counts.values())
+    if counts.get("QUEUED", 0) + counts.get("PROCESSING", 0):
+        return "queued" if counts.get("QUEUED", 0) == total else "processing"
+    if counts.get("FAILED", 0):
+        return "failed" if counts["FAILED"] == total else "completed_with_errors"
+    return "completed"
+
+@app.post("/batches", response_model=BatchResponse)
+def start_batch(req: BatchProcessingRequest, db: Session = Depends(get_db), client: ApiKey = Depends(get_current_client)):
     """
-    Get status from DB (Truth) + Redis (Real-time Progress).
+    Registers a whole drawing set under one project: one request, one
+    transaction and one group dispatch instead of a /process call per file.
+    All files are verified first; if any is missing nothing is created.
+    Admission (429/503, or defer=true) applies to the batch as a whole.
     """
-    # 1. Check DB first
+    if not req.files:
+        raise HTTPException(400, "No files")
+    if len(req.files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(400, f"At most {settings.BATCH_MAX_FILES} files per batch")
+
+    # 1. Existence + content hash: parallel HEADs (shared S3 connection pool)
+    with ThreadPoolExecutor(max_workers=min(settings.BATCH_HEAD_CONCURRENCY, len(req.files))) as pool:
+        heads = list(pool.map(_head_hash, [f.file_key for f in req.files]))
+    missing = [f.file_key for f, (exists, _) in zip(req.files, heads) if not exists]
+    if missing:
+        raise HTTPException(404, {"message": "Files not found in storage. Did you upload them?", "file_keys": missing[:100]})
+
+    # 2. Dedup against finished results (one MGET), admission, then one transaction
+    hashes = [file_hash for _, file_hash in heads]
+    cached = result_cache.get_result_keys(hashes)
+    deferred = _admission_delay(client.id, req.defer) if not all(cached) else 0
+    project, jobs = crud.create_batch(db, req.project_name, [
+        {"filename": f.file_key.split('/')[-1], "s3_key": f.file_key, "file_hash": file_hash, "result_key": result_key}
+        for f, file_hash, result_key in zip(req.files, hashes, cached)
+    ], api_key_id=client.id)
+
+    # 3. Enqueue the rest as one group (one broker connection for all messages)
+    queued = [
+        process_blueprint.signature(kwargs={
+            "file_key": f.file_key, "webhook_url": f.webhook_url or req.webhook_url, "file_hash": file_hash,
+            "tenant_id": client.id, "previous_input_hash": None
+        }, task_id=job.id, countdown=deferred or None)
+        for f, file_hash, job in zip(req.files, hashes, jobs) if job.status == "QUEUED"
+    ]
+    if queued:
+        admission.admit(client.id, [job.id for job in jobs if job.status == "QUEUED"])
+        group(queued).apply_async()
+    JOB_COUNTER.labels(status="queued").inc(len(queued))
+    JOB_COUNTER.labels(status="deduplicated").inc(len(jobs) - len(queued))
+
+    queued_status = "deferred" if deferred else "queued"
+    response = BatchResponse(
+        batch_id=project.id,
+        status=queued_status if queued else "completed",
+        jobs=[
+            BatchJob(file_key=f.file_key, job_id=job.id, status=queued_status if job.status == "QUEUED" else "completed")
+            for f, job in zip(req.files, jobs)
+        ]
+    )
+    if deferred:
+        return JSONResponse(status_code=202, content=response.dict(), headers={"Retry-After": str(deferred)})
+    return response
+
+@app.get("/batches/{batch_id}")
+def get_batch_status(batch_id: str, jobs: bool = False, status: Optional[str] = None, offset: int = 0,
+                     limit: int = 100, db: Session = Depends(get_db), client: ApiKey = Depends(get_current_client)):
+    """
+    Aggregate status of a batch: job counts per status from one grouped query.
+    jobs=true adds one page of the batch's jobs (offset / limit, optionally
+    filtered by status); per-job details stay on GET /jobs/{job_id}.
+    """
+    project = crud.get_batch(db, batch_id)
+    if not project or project.api_key_id != client.id:
+        raise HTTPException(404, "Batch not found")
+
+    counts = crud.get_batch_counts(db, batch_id)
+    total = sum(counts.values())
+    finished = counts.get("COMPLETED", 0) + counts.get("FAILED", 0)
+    response = {
+        "batch_id": project.id,
+        "name": project.name,
+        "created_at": project.created_at,
+        "status": _batch_status(counts),
+        "total": total,
+        "counts": {s.lower(): counts.get(s, 0) for s in ("QUEUED", "PROCESSING", "COMPLETED", "FAILED")},
+        "progress": int(100 * finished / total) if total else 100
+    }
+    if jobs:
+        rows = crud.get_batch_jobs(db, batch_id, status=status.upper() if status else None,
+                                   offset=max(offset, 0), limit=min(max(limit, 1), 1000))
+        response["jobs"] = [
+            {"job_id": job.id, "filename": filename, "status": job.status.lower(), "error": job.error_message}
+            for job, filename in rows
+        ]
+    return response
+
+def _owned_job(db: Session, job_id: str, client: ApiKey):
+    """The job if this client submitted it; 404 otherwise (other tenants' ids are not revealed)."""
     job = crud.get_job(db, job_id)
-    if not job:
+    if not job or job.api_key_id != client.id:
         raise HTTPException(404, "Job not found")
+    return job
+
+def _manually_fixed(job) -> bool:
+    """A manual fix replaced the result document: per-page checkpoints are stale."""
+    return (job.meta_data or {}).get("source") == MANUAL_FIX_SOURCE
+
+def _page_checkpoints(db: Session, job) -> dict:
+    return {} if _manually_fixed(job) else crud.get_page_checkpoints(db, job.id)
+
+@app.get("/jobs/{job_id}")
+def get_status(job_id: str, request: Request, polygons: str = "points", pages: Optional[str] = None,
+               fields: Optional[str] = None, db: Session = Depends(get_db),
+               client: ApiKey = Depends(get_current_client)):
+    """
+    Get status from DB (Truth) + Redis (Real-time Progress).
+    Encoding is negotiated: 'Accept: application/msgpack' for binary, JSON otherwise.
+    polygons=delta returns delta-encoded flat coordinate lists.
+    pages=1-5,8 limits the result to those pages. Completed results carry an
+    ETag; If-None-Match answers 304 without touching the result.
+    fields=rooms.label,rooms.area_sqft returns only those page fields.
+    """
+    # 1. Check DB first
+    job = _owned_job(db, job_id, client)
+
+    try:
+        page_ranges = ResultStore.parse_page_range(pages)
+    except ValueError:
+        raise HTTPException(400, "pages must look like 1-5,8")
+    field_tree = ResultCodec.parse_fields(fields)
+    media_type = ResultCodec.negotiate(request.headers.get("accept"))
+    headers = {"Vary": "Accept"}
+
+    # Completed jobs never change: cheap conditional request
+    if job.status == "COMPLETED" and job.result_s3_key:
+        try:
+            headers["ETag"] = result_store.response_etag(job.result_s3_key, f"{pages}|{polygons}|{fields}|{media_type}")
+        except Exception:
+            # Missing result: reported as completed_but_data_missing below
+            headers.pop("ETag", None)
+        if headers.get("ETag") and headers["ETag"] in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
         
     response = {
         "job_id": job.id,
@@ -134,36 +376,278 @@ async def get_status(job_id: str, db: Session = Depends(get_db)):
         "created_at": job.created_at,
         "completed_at": job.completed_at,
         "result": None,
-        "error": job.error_message
+        "error": job.error_message,
+        # Fidelity level the job ran at (set on completion; level 0 = full)
+        "degradation": (job.meta_data or {}).get("degradation")
     }
     
-    # 2. If Processing, check Celery for % progress
+    # 2. If Processing, latest progress event (one Redis read, no Celery backend)
     if job.status in ["QUEUED", "PROCESSING"]:
-        from celery.result import AsyncResult
-        from blueprint_brain.worker.celery_app import celery_app
-        res = AsyncResult(job_id, app=celery_app)
-        if res.state == 'PROCESSING' and isinstance(res.info, dict):
-            response['progress'] = res.info.get('progress', 0)
-            response['message'] = res.info.get('status', '')
+        event = progress_stream.latest(job_id)
+        if event and event["event"] == "progress":
+            response['progress'] = event.get('progress', 0)
+            response['message'] = event.get('status', '')
+
+        # Finished pages are usable before the whole set is done
+        checkpoints = crud.get_page_checkpoints(db, job_id)
+        response['pages'] = [
+            {
+                "page": n,
+                "result_url": f"/jobs/{job_id}/pages/{n}",
+                "image_url": result_store.presigned_url(checkpoints[n]["image_key"])
+            }
+            for n in sorted(checkpoints)
+            if page_ranges is None or any(a <= n <= b for a, b in page_ranges)
+        ]
 
     # 3. If Completed, fetch result
     if job.status == "COMPLETED" and job.result_s3_key:
-        import json, io
         try:
-            stream = io.BytesIO()
-            storage.s3.download_fileobj(storage.bucket, job.result_s3_key, stream)
-            stream.seek(0)
-            data = json.load(stream)
+            _, document = result_store.load(job.result_s3_key)
+            data = result_store.select(document, page_ranges)
+            if polygons == "delta":
+                ResultCodec.to_delta(data)
             
-            # Sign URLs
+            # Sign URLs (cached until shortly before they expire)
             for page in data.get('results', []):
-                page['image_url'] = storage.generate_presigned_url(page['image_key'])
+                page['image_url'] = result_store.presigned_url(page['image_key'])
+            data['results'] = [ResultCodec.project_page(page, field_tree) for page in data['results']]
             
             response['result'] = data
         except Exception:
             response['status'] = 'completed_but_data_missing'
 
-    return response
+    return Response(content=ResultCodec.encode(response, media_type), media_type=media_type, headers=headers)
+
+def _read_page_source(read, *args):
+    """A result-store read for the page endpoint: missing object 404, unreadable one 409."""
+    try:
+        return read(*args)
+    except FileNotFoundError:
+        raise HTTPException(404, "Page result not found")
+    except Exception:
+        # Same case /jobs/{job_id} reports as completed_but_data_missing
+        raise HTTPException(409, "Page result could not be read")
+
+@app.get("/jobs/{job_id}/pages/{page}")
+def get_page_result(job_id: str, page: int, request: Request, polygons: str = "points",
+                    db: Session = Depends(get_db), client: ApiKey = Depends(get_current_client)):
+    """
+    One page's result, available as soon as that page finished (the job may
+    still be processing). Same document shape and encodings as /jobs/{job_id}.
+    """
+    job = _owned_job(db, job_id, client)
+
+    checkpoint = None if _manually_fixed(job) else crud.get_page_checkpoint(db, job_id, page)
+    if checkpoint:
+        source_key = checkpoint["result_key"]
+        if not source_key:
+            raise HTTPException(404, "Page result not found")
+    elif job.status == "COMPLETED" and job.result_s3_key:
+        # Jobs answered from the result cache have no page rows
+        source_key = job.result_s3_key
+    else:
+        raise HTTPException(404, "Page not finished yet")
+
+    media_type = ResultCodec.negotiate(request.headers.get("accept"))
+    etag = _read_page_source(result_store.response_etag, source_key, f"{page}|{polygons}|{media_type}")
+    headers = {"Vary": "Accept", "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    _, document = _read_page_source(result_store.load, source_key)
+    if checkpoint:
+        page_data = copy.deepcopy(document)
+        page_data['page'] = page
+        page_data['image_key'] = checkpoint["image_key"]
+        data = ResultCodec.quantize({"job_id": job_id, "results": [page_data]}, settings.RESULT_COORD_PRECISION)
+    else:
+        data = result_store.select(document, [(page, page)])
+        if not data['results']:
+            raise HTTPException(404, "Page not found")
+
+    if polygons == "delta":
+        ResultCodec.to_delta(data)
+    for page_data in data['results']:
+        page_data['image_url'] = result_store.presigned_url(page_data['image_key'])
+
+    return Response(content=ResultCodec.encode(data, media_type), media_type=media_type, headers=headers)
+
+def _stream_job(key_header: Optional[str], job_id: str, pages: bool = False) -> dict:
+    """
+    Authentication and job lookup for the streaming endpoints, in a short-lived
+    session: a get_db dependency (get_current_client's too, on an API key
+    cache miss) would hold a pooled connection until the stream ends.
+    """
+    db = SessionLocal()
+    try:
+        job = _owned_job(db, job_id, get_current_client(key_header, db))
+        return {
+            "status": job.status,
+            "result_s3_key": job.result_s3_key,
+            "checkpoints": _page_checkpoints(db, job) if pages else None
+        }
+    finally:
+        db.close()
+
+@app.get("/jobs/{job_id}/results")
+def stream_results(job_id: str, polygons: str = "points", pages: Optional[str] = None,
+                   fields: Optional[str] = None, key_header: Optional[str] = Security(api_key_header)):
+    """
+    Streams a job's result as NDJSON: a header line, then one line per page.
+    Pages are read one at a time from their own objects, so the API never
+    holds the whole document. Works while the job runs (finished pages only).
+    Same pages / fields / polygons options as /jobs/{job_id}.
+    """
+    job = _stream_job(key_header, job_id, pages=True)
+    try:
+        page_ranges = ResultStore.parse_page_range(pages)
+    except ValueError:
+        raise HTTPException(400, "pages must look like 1-5,8")
+    field_tree = ResultCodec.parse_fields(fields)
+    checkpoints = job["checkpoints"]
+    selected = [
+        checkpoints[n] for n in sorted(checkpoints)
+        if page_ranges is None or any(a <= n <= b for a, b in page_ranges)
+    ]
+    fallback_key = job["result_s3_key"] if not checkpoints and job["status"] == "COMPLETED" else None
+
+    def encode_page(page_data: dict, quantized: bool = False) -> bytes:
+        doc = {"results": [page_data]}
+        if not quantized:
+            # Page objects are stored at full precision
+            ResultCodec.quantize(doc, settings.RESULT_COORD_PRECISION)
+        if polygons == "delta":
+            ResultCodec.to_delta(doc)
+        page_data['image_url'] = result_store.presigned_url(page_data['image_key'])
+        return ResultCodec.dumps_json(ResultCodec.project_page(page_data, field_tree)) + b"\n"
+
+    def lines():
+        # Sync generator: Starlette iterates it in its thread pool
+        yield ResultCodec.dumps_json({
+            "job_id": job_id,
+            "status": job["status"].lower(),
+            "page_count": len(checkpoints) if checkpoints else None,
+            "encoding": {"polygon": polygons, "precision": settings.RESULT_COORD_PRECISION}
+        }) + b"\n"
+        if fallback_key:
+            # Result-cache hits have no page objects of their own
+            _, document = result_store.load(fallback_key)
+            for page_data in result_store.select(document, page_ranges)["results"]:
+                yield encode_page(page_data, quantized=True)
+            return
+        for entry in selected:
+            page_data = ResultCodec.loads_json(storage.download_bytes(entry["result_key"]))
+            page_data['page'] = entry["page"]
+            page_data['image_key'] = entry["image_key"]
+            yield encode_page(page_data)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, key_header: Optional[str] = Security(api_key_header)):
+    """
+    Server-Sent Events: pushes progress / completed / failed events as the
+    workers publish them, instead of clients polling /jobs/{job_id}.
+    Reconnecting clients send Last-Event-ID and only get what they missed.
+    The stream closes after the terminal event.
+    """
+    status = (await run_in_threadpool(_stream_job, key_header, job_id))["status"]
+    last_id = request.headers.get("last-event-id") or "0"
+
+    def frame(event_id: str, event: dict) -> str:
+        return f"id: {event_id}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    async def events():
+        # Finished before any event was kept (cache hits, expired stream)
+        if status in ("COMPLETED", "FAILED") and await run_in_threadpool(progress_stream.latest, job_id) is None:
+            yield frame("0-0", {"event": status.lower(), "status": status.lower(), "progress": 100})
+            return
+        async for item in ProgressStream.tail(job_id, last_id):
+            if await request.is_disconnected():
+                return
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            event_id, event = item
+            yield frame(event_id, event)
+            if event["event"] in ProgressStream.TERMINAL:
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs/{job_id}/refuse", response_model=JobResponse)
+def refuse_job(job_id: str, req: RefusionRequest, db: Session = Depends(get_db),
+               client: ApiKey = Depends(get_current_client)):
+    """
+    Re-runs only the fusion stage of a completed job (e.g. after re-calibrating scale).
+    Vision, OCR and room outputs are read from the stage cache, so no inference runs.
+    """
+    source = _owned_job(db, job_id, client)
+
+    input_hash = (source.meta_data or {}).get("input_hash")
+    if source.status != "COMPLETED" or not input_hash:
+        raise HTTPException(409, "Job has no cached stage outputs. Submit it to /process instead.")
+
+    job = crud.create_job(db, document_id=source.document_id, api_key_id=client.id)
+    refuse_blueprint.apply_async(
+        kwargs={"input_hash": input_hash, "scale_value": req.scale_value},
+        task_id=job.id
+    )
+
+    return JobResponse(job_id=job.id, status="queued", message="Re-fusion started from cached stage outputs")
+
+def _image_pixels(body: bytes) -> Optional[float]:
+    """Pixel count read from a PNG / JPEG header (pixels are not decoded); None if not an image."""
+    try:
+        with Image.open(io.BytesIO(body), formats=("PNG", "JPEG")) as header:
+            return header.size[0] * header.size[1]
+    except Image.DecompressionBombError:
+        return math.inf
+    except Exception:
+        return None
+
+@app.post("/analyze")
+async def analyze_image(request: Request, pixels_per_foot: Optional[float] = None,
+                        client: ApiKey = Depends(get_current_client)):
+    """
+    Synchronous analysis of one small image sent as the request body
+    (PNG/JPEG, up to SYNC_MAX_PIXELS). Runs on the API's model pool and
+    returns the page result directly: no upload, queue or polling. When the
+    pool is busy the request is refused with 503 + Retry-After.
+    """
+    if model_pool is None:
+        raise HTTPException(404, "Synchronous analysis is not enabled. Use /upload/direct + /process.")
+    if int(request.headers.get("content-length") or 0) > settings.SYNC_MAX_BYTES:
+        raise HTTPException(413, "Image too large for /analyze. Use /upload/direct + /process.")
+    body = await request.body()
+    if len(body) > settings.SYNC_MAX_BYTES:
+        raise HTTPException(413, "Image too large for /analyze. Use /upload/direct + /process.")
+
+    # Pixel limit from the header, before decoding: a small, highly
+    # compressed image can decode to gigabytes
+    pixels = _image_pixels(body)
+    if pixels is None:
+        raise HTTPException(400, "Body is not a PNG or JPEG image")
+    if pixels > settings.SYNC_MAX_PIXELS:
+        raise HTTPException(413, f"Image exceeds {settings.SYNC_MAX_PIXELS} pixels. Use /upload/direct + /process.")
+
+    img = await run_in_threadpool(cv2.imdecode, np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise HTTPException(400, "Body is not a decodable image")
+
+    try:
+        data = await model_pool.run(analyze_single_image, img, pixels_per_foot)
+    except CapacityExceededError as e:
+        raise HTTPException(503, "Analysis capacity busy, retry shortly",
+                            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+
+    media_type = ResultCodec.negotiate(request.headers.get("accept"))
+    return Response(content=ResultCodec.encode(data, media_type), media_type=media_type, headers={"Vary": "Accept"})
 
 @app.get("/health")
 def health_check():
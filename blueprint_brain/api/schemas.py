@@ -1,14 +1,49 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class JobResponse(BaseModel):
     job_id: str
     status: str
     message: str
 
+class ProcessingRequest(BaseModel):
+    file_key: str  # The file is already in S3 (via presigned upload)
+    webhook_url: Optional[str] = None
+    # Job of an earlier revision of this set: only changed regions are re-analyzed
+    previous_job_id: Optional[str] = None
+    # When the queues are full: accept with a delayed start (202) instead of 429/503
+    defer: bool = False
+
 class JobStatus(BaseModel):
     job_id: str
     status: str
     meta: Optional[Dict[str, Any]] = None
     result: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+
+class RefusionRequest(BaseModel):
+    # Override calibration; cached vision/OCR outputs are reused as-is
+    scale_value: Optional[float] = None
+
+class BatchUploadRequest(BaseModel):
+    filenames: List[str]
+
+class BatchFile(BaseModel):
+    file_key: str
+    webhook_url: Optional[str] = None  # Defaults to the batch's webhook_url
+
+class BatchProcessingRequest(BaseModel):
+    project_name: str
+    files: List[BatchFile]
+    webhook_url: Optional[str] = None
+    defer: bool = False
+
+class BatchJob(BaseModel):
+    file_key: str
+    job_id: str
+    status: str
+
+class BatchResponse(BaseModel):
+    batch_id: str  # Project id
+    status: str
+    jobs: List[BatchJob]
@@ -0,0 +1,153 @@
+import time
+import logging
+import threading
+import redis
+from typing import Any, Dict, List
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.services.cache import get_redis
+from blueprint_brain.services.scheduler import FairScheduler
+from blueprint_brain.services.time_budget import TileTimer
+from blueprint_brain.src.core.exceptions import CapacityExceededError, TenantQuotaExceededError
+
+logger = logging.getLogger(__name__)
+
+class AdmissionController:
+    """
+    Admission control on queued accelerator work, in estimated tile-seconds
+    (inference tiles x measured seconds per tile), per queue:
+
+      ingest     accepted jobs not planned yet: count x average tiles per job
+      scheduled  pages waiting in the fair scheduler (their tile cost)
+      inflight   pages released to the vision / cpu_post queues
+
+    and per tenant (its ingest + scheduled work). New jobs are refused while
+    the total is above ADMISSION_MAX_QUEUED_SECONDS (CapacityExceededError,
+    503) or the tenant's work above ADMISSION_MAX_TENANT_SECONDS
+    (TenantQuotaExceededError, 429). Retry-After is the time to drain the
+    excess at the measured fleet throughput.
+
+    Redis layout (adm:*):
+      adm:tenants            SET tenants that submitted jobs
+      adm:pending:{tenant}   ZSET job_id -> accepted at; removed by ingest,
+                             ignored after ADMISSION_PENDING_TTL_SECONDS
+      adm:job_tiles          average tiles per planned job (EWMA)
+    """
+    TENANTS, PENDING_PREFIX, JOB_TILES = "adm:tenants", "adm:pending:", "adm:job_tiles"
+    ALPHA = 0.1
+    SNAPSHOT_SECONDS = 1.0  # Admission decisions reuse a snapshot this long (per process)
+
+    def __init__(self, client: redis.Redis = None, scheduler: FairScheduler = None, timer: TileTimer = None):
+        self.r = client or get_redis()
+        self.scheduler = scheduler or FairScheduler(self.r)
+        self.timer = timer or TileTimer(self.r)
+        self._snapshot = None
+        self._snapshot_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def tenant(tenant_id: str) -> str:
+        return tenant_id or settings.SCHEDULER_DEFAULT_TENANT
+
+    def job_tiles(self) -> float:
+        value = self.r.get(self.JOB_TILES)
+        return float(value) if value else float(settings.ADMISSION_JOB_TILES_DEFAULT)
+
+    def record_job_tiles(self, tiles: float):
+        """Ingest: planned cost of a job, moves the estimate for jobs not planned yet."""
+        current = self.job_tiles()
+        self.r.set(self.JOB_TILES, current + self.ALPHA * (tiles - current))
+
+    def _pending_counts(self) -> Dict[str, int]:
+        tenants = [t.decode() for t in self.r.smembers(self.TENANTS)]
+        cutoff = time.time() - settings.ADMISSION_PENDING_TTL_SECONDS
+        pipe = self.r.pipeline()
+        for tenant in tenants:
+            pipe.zremrangebyscore(self.PENDING_PREFIX + tenant, 0, cutoff)
+            pipe.zcard(self.PENDING_PREFIX + tenant)
+        counts = pipe.execute()[1::2]
+        return {tenant: count for tenant, count in zip(tenants, counts) if count}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Queued work in tile-seconds: {"queues": {queue: s}, "tenants": {tenant: s},
+        "drain_rate": tile-seconds finished per second, "seconds_per_tile", "job_tiles"}.
+        """
+        seconds_per_tile = self.timer.seconds_per_tile()
+        job_tiles = self.job_tiles()
+        pending = self._pending_counts()
+        scheduled, inflight = self.scheduler.queued_cost()
+        tenants = {
+            tenant: (pending.get(tenant, 0) * job_tiles + scheduled.get(tenant, 0.0)) * seconds_per_tile
+            for tenant in set(pending) | set(scheduled)
+        }
+        drain_rate = self.timer.tiles_per_second() * seconds_per_tile
+        return {
+            "queues": {
+                "ingest": sum(pending.values()) * job_tiles * seconds_per_tile,
+                "scheduled": sum(scheduled.values()) * seconds_per_tile,
+                "inflight": inflight * seconds_per_tile
+            },
+            "tenants": tenants,
+            "drain_rate": max(drain_rate, settings.ADMISSION_MIN_DRAIN_RATE),
+            "seconds_per_tile": seconds_per_tile,
+            "job_tiles": job_tiles
+        }
+
+    def _recent_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._snapshot_at < self.SNAPSHOT_SECONDS:
+                return self._snapshot
+        snap = self.snapshot()
+        with self._lock:
+            self._snapshot, self._snapshot_at = snap, time.monotonic()
+        return snap
+
+    def check(self, tenant_id: str):
+        """Raises CapacityExceededError / TenantQuotaExceededError when new work must wait."""
+        try:
+            snap = self._recent_snapshot()
+        except redis.RedisError as e:
+            # Admission is a safeguard; the queues themselves still work
+            logger.warning(f"Admission check skipped: {e}")
+            return
+
+        total = sum(snap["queues"].values())
+        excess = total - settings.ADMISSION_MAX_QUEUED_SECONDS
+        if excess > 0:
+            raise CapacityExceededError(
+                f"{total:.0f}s of work queued (limit {settings.ADMISSION_MAX_QUEUED_SECONDS:.0f}s)",
+                retry_after=excess / snap["drain_rate"]
+            )
+
+        work = snap["tenants"].get(self.tenant(tenant_id), 0.0)
+        excess = work - settings.ADMISSION_MAX_TENANT_SECONDS
+        if excess > 0:
+            # Under fair scheduling a tenant drains at about its share of the fleet
+            share = snap["drain_rate"] / max(1, len(snap["tenants"]))
+            raise TenantQuotaExceededError(
+                f"{work:.0f}s of your work queued (limit {settings.ADMISSION_MAX_TENANT_SECONDS:.0f}s)",
+                retry_after=excess / share
+            )
+
+    def admit(self, tenant_id: str, job_ids: List[str]):
+        """Counts accepted jobs as queued work until ingest has planned them."""
+        if not job_ids:
+            return
+        tenant = self.tenant(tenant_id)
+        now = time.time()
+        pipe = self.r.pipeline()
+        pipe.sadd(self.TENANTS, tenant)
+        pipe.zadd(self.PENDING_PREFIX + tenant, {job_id: now for job_id in job_ids})
+        pipe.execute()
+
+        # Later decisions from the cached snapshot see this burst too
+        with self._lock:
+            if self._snapshot is not None:
+                added = len(job_ids) * self._snapshot["job_tiles"] * self._snapshot["seconds_per_tile"]
+                self._snapshot["queues"]["ingest"] += added
+                self._snapshot["tenants"][tenant] = self._snapshot["tenants"].get(tenant, 0.0) + added
+
+    def settle(self, tenant_id: str, job_id: str):
+        """Ingest is done with a job: its work is now in the scheduler (or there is none)."""
+        self.r.zrem(self.PENDING_PREFIX + self.tenant(tenant_id), job_id)
@@ -0,0 +1,204 @@
+import json
+import time
+import hashlib
+import logging
+import redis
+from typing import Any, Dict, List, Optional, Tuple
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.src.processing.page_matching import PerceptualHash
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+def get_redis() -> redis.Redis:
+    """Process-wide Redis client (connection pool is shared)."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+class ResultCache:
+    """
+    Whole-file dedup: content hash -> S3 key of a finished result.
+    Shared by the API (pre-enqueue check) and the worker.
+    """
+    TTL_SECONDS = 604800  # 7 days
+
+    def __init__(self, client: redis.Redis = None):
+        self.r = client or get_redis()
+
+    @staticmethod
+    def _key(file_hash: str) -> str:
+        return f"file_hash:{file_hash}"
+
+    def get_result_key(self, file_hash: str) -> Optional[str]:
+        if not file_hash:
+            return None
+        value = self.r.get(self._key(file_hash))
+        return value.decode("utf-8") if value else None
+
+    def get_result_keys(self, file_hashes: List[str]) -> List[Optional[str]]:
+        """Batch lookup (one MGET), in the order of file_hashes."""
+        if not file_hashes:
+            return []
+        values = self.r.mget([self._key(h) for h in file_hashes])
+        return [v.decode("utf-8") if v and h else None for h, v in zip(file_hashes, values)]
+
+    def set_result_key(self, file_hash: str, result_key: str):
+        self.r.setex(self._key(file_hash), self.TTL_SECONDS, result_key)
+
+    def invalidate(self, file_hash: str):
+        self.r.delete(self._key(file_hash))
+
+class PageCache:
+    """
+    Sheet-level dedup: hash of a rasterized page (+ render/stage config) ->
+    where its stage outputs and per-page result live. Lets a revised drawing
+    set reuse every sheet that did not change.
+    page_hash:{hash} -> {"input_hash", "page", "result_key", "image_key", "fusion_hash"}
+    """
+    TTL_SECONDS = 604800  # 7 days, same as whole-file dedup
+
+    def __init__(self, client: redis.Redis = None):
+        self.r = client or get_redis()
+
+    @staticmethod
+    def page_hash(image, render_params: Dict[str, Any]) -> str:
+        """Content hash of a raster (numpy array) plus the parameters that produced it."""
+        h = hashlib.blake2b(digest_size=20)
+        h.update(json.dumps(render_params, sort_keys=True).encode())
+        h.update(f"{image.shape}|{image.dtype}".encode())
+        h.update(image if image.flags['C_CONTIGUOUS'] else image.copy())
+        return h.hexdigest()
+
+    @staticmethod
+    def _key(page_hash: str) -> str:
+        return f"page_hash:{page_hash}"
+
+    def get(self, page_hash: str) -> Optional[Dict[str, Any]]:
+        value = self.r.get(self._key(page_hash))
+        return json.loads(value) if value else None
+
+    def put(self, page_hash: str, entry: Dict[str, Any]):
+        self.r.setex(self._key(page_hash), self.TTL_SECONDS, json.dumps(entry))
+
+class NearDuplicateIndex:
+    """
+    Per-tenant perceptual-hash index over every processed page.
+    Multi-index hashing: the 64-bit hash is split into 16-bit bands and each
+    band value is its own Redis sorted set, so a lookup is BANDS reads plus a
+    Hamming check on a handful of candidates, independent of index size.
+    By pigeonhole, any hash within BANDS-1 bits shares at least one band
+    exactly; recall is exact among the newest NEAR_DUP_MAX_CANDIDATES pages
+    of each band bucket (older members are trimmed, expired ones removed).
+      phashz:{tenant}:{band}:{value} -> ZSET "{phash}|{input_hash}:{page}" -> added at
+      phash_entry:{input_hash}:{page} -> {"input_hash", "page", "shape", "image_key"}
+    """
+
+    def __init__(self, client: redis.Redis = None):
+        self.r = client or get_redis()
+
+    @staticmethod
+    def _band_key(tenant_id: str, band: int, value: int) -> str:
+        return f"phashz:{tenant_id}:{band}:{value:04x}"
+
+    @staticmethod
+    def _entry_key(ref: str) -> str:
+        return f"phash_entry:{ref}"
+
+    def add(self, tenant_id: str, phash: int, entry: Dict[str, Any]):
+        ref = f"{entry['input_hash']}:{entry['page']}"
+        member = f"{phash:016x}|{ref}"
+        now = time.time()
+        pipe = self.r.pipeline()
+        for band, value in enumerate(PerceptualHash.bands(phash)):
+            key = self._band_key(tenant_id, band, value)
+            pipe.zadd(key, {member: now})
+            # Members live as long as their entry; a bucket keeps only what lookups read
+            pipe.zremrangebyscore(key, 0, now - settings.NEAR_DUP_TTL_SECONDS)
+            pipe.zremrangebyrank(key, 0, -settings.NEAR_DUP_MAX_CANDIDATES - 1)
+            pipe.expire(key, settings.NEAR_DUP_TTL_SECONDS)
+        pipe.setex(self._entry_key(ref), settings.NEAR_DUP_TTL_SECONDS, json.dumps(entry))
+        pipe.execute()
+
+    def lookup(self, tenant_id: str, phash: int, max_distance: int = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """Returns [(distance, entry), ...] nearest first, within max_distance bits."""
+        max_distance = settings.NEAR_DUP_MAX_DISTANCE if max_distance is None else max_distance
+        cutoff = time.time() - settings.NEAR_DUP_TTL_SECONDS
+        pipe = self.r.pipeline()
+        for band, value in enumerate(PerceptualHash.bands(phash)):
+            key = self._band_key(tenant_id, band, value)
+            pipe.zremrangebyscore(key, 0, cutoff)
+            # Newest first, fixed order: lookups are deterministic
+            pipe.zrevrange(key, 0, settings.NEAR_DUP_MAX_CANDIDATES - 1)
+
+        candidates = {}
+        for members in pipe.execute()[1::2]:
+            for member in members:
+                hex_hash, ref = member.decode().split("|", 1)
+                distance = PerceptualHash.hamming(phash, int(hex_hash, 16))
+                if distance <= max_distance:
+                    candidates[ref] = min(distance, candidates.get(ref, distance))
+
+        if not candidates:
+            return []
+        refs = sorted(candidates, key=candidates.get)
+        entries = self.r.mget([self._entry_key(ref) for ref in refs])
+        # An entry can still expire between the two reads; skip it
+        return [(candidates[ref], json.loads(raw)) for ref, raw in zip(refs, entries) if raw]
+
+class SingleFlight:
+    """
+    Redis lease per content hash, so a burst of identical submissions runs
+    the pipeline once. inflight:{hash} holds the owning job id with a TTL the
+    owner keeps renewing; if the owner's worker dies the lease simply expires.
+    Once a job's pages are dispatched the lease is held for as long as the
+    job's state lives, until finalize/fail releases it (pages may wait in the
+    scheduler longer than any short lease).
+    """
+    # Compare-and-act scripts: only the current holder may renew/release
+    _RENEW = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) end return 0"
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    _TAKEOVER = "if redis.call('get', KEYS[1]) == ARGV[1] then redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3]) return 1 end return 0"
+
+    def __init__(self, client: redis.Redis = None, lease_seconds: int = None):
+        self.r = client or get_redis()
+        self.lease_seconds = lease_seconds or settings.SINGLE_FLIGHT_LEASE_SECONDS
+        self._renew = self.r.register_script(self._RENEW)
+        self._release = self.r.register_script(self._RELEASE)
+        self._takeover = self.r.register_script(self._TAKEOVER)
+
+    @staticmethod
+    def _key(file_hash: str) -> str:
+        return f"inflight:{file_hash}"
+
+    def acquire(self, file_hash: str, job_id: str) -> Optional[str]:
+        """
+        Returns None if job_id now holds the lease (re-entrant for redelivered
+        tasks), otherwise the job id of the current holder.
+        """
+        key = self._key(file_hash)
+        if self.r.set(key, job_id, nx=True, ex=self.lease_seconds):
+            return None
+
+        holder = self.r.get(key)
+        if holder is None:
+            # Expired between SET and GET
+            return self.acquire(file_hash, job_id)
+        holder = holder.decode()
+        if holder == job_id:
+            self.renew(file_hash, job_id)
+            return None
+        return holder
+
+    def takeover(self, file_hash: str, stale_holder: str, job_id: str) -> bool:
+        """Replaces a lease whose holder is known dead (e.g. its job FAILED)."""
+        return bool(self._takeover(keys=[self._key(file_hash)], args=[stale_holder, job_id, self.lease_seconds]))
+
+    def renew(self, file_hash: str, job_id: str, seconds: int = None) -> bool:
+        return bool(self._renew(keys=[self._key(file_hash)], args=[job_id, seconds or self.lease_seconds]))
+
+    def release(self, file_hash: str, job_id: str):
+        self._release(keys=[self._key(file_hash)], args=[job_id])
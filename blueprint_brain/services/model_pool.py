@@ -0,0 +1,70 @@
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.src.core.exceptions import CapacityExceededError
+
+logger = logging.getLogger(__name__)
+
+class ModelPool:
+    """
+    In-process pool of loaded models for synchronous (request/response)
+    analysis. Each of the 'size' threads owns one engine set from 'factory',
+    so requests never wait for a model load. At most size + max_waiting
+    requests are admitted; beyond that run() raises CapacityExceededError
+    with a Retry-After estimate instead of queueing without bound.
+    """
+
+    def __init__(self, factory: Callable[[], Dict[str, Any]], size: int = None, max_waiting: int = None):
+        self.factory = factory
+        self.size = size or settings.SYNC_POOL_SIZE
+        self.max_waiting = settings.SYNC_POOL_MAX_WAITING if max_waiting is None else max_waiting
+        self._engines: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._executor = None
+        self._admitted = 0
+        self._lock = threading.Lock()
+        self._avg_seconds = 1.0  # EWMA of run time, for Retry-After
+
+    def start(self):
+        """Loads every engine set up front (call once, at startup)."""
+        for _ in range(self.size):
+            self._engines.put(self.factory())
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="model-pool")
+        logger.info(f"Model pool ready: {self.size} engine sets.")
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def _call(self, fn: Callable, args: tuple) -> Any:
+        engines = self._engines.get()
+        start = time.perf_counter()
+        try:
+            return fn(engines, *args)
+        finally:
+            self._engines.put(engines)
+            elapsed = time.perf_counter() - start
+            self._avg_seconds += 0.2 * (elapsed - self._avg_seconds)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Runs fn(engines, *args) on a pool thread. Raises CapacityExceededError when busy."""
+        with self._lock:
+            if self._admitted >= self.size + self.max_waiting:
+                retry_after = self._avg_seconds * (self._admitted / self.size)
+                raise CapacityExceededError("Model pool busy", retry_after=retry_after)
+            self._admitted += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._call, fn, args)
+        finally:
+            with self._lock:
+                self._admitted -= 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
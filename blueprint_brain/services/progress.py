@@ -0,0 +1,80 @@
+import json
+import time
+import logging
+import redis
+import redis.asyncio as aioredis
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+_async_client = None
+
+def get_async_redis() -> aioredis.Redis:
+    """Process-wide asyncio Redis client for the API's streaming endpoints."""
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(settings.REDIS_URL)
+    return _async_client
+
+class ProgressStream:
+    """
+    Job progress events on a capped Redis stream per job (job_events:{job_id}).
+    Workers append; the API reads the latest event for polling clients and
+    tails the stream for SSE clients. Unlike pub/sub, a client that connects
+    late or reconnects (Last-Event-ID) gets the events it missed.
+
+    Event fields: event (progress | completed | failed), progress (0-100),
+    status (human readable), plus event specific extras (result_key, error).
+    """
+    MAXLEN = 200
+    TTL_SECONDS = 86400
+    TERMINAL = ("completed", "failed")
+
+    def __init__(self, client: redis.Redis = None):
+        self.r = client or get_redis()
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"job_events:{job_id}"
+
+    def publish(self, job_id: str, event: str, progress: int = None, status: str = "", **extra):
+        payload = {"event": event, "status": status, "ts": round(time.time(), 3), **extra}
+        if progress is not None:
+            payload["progress"] = progress
+        try:
+            pipe = self.r.pipeline()
+            pipe.xadd(self._key(job_id), {"data": json.dumps(payload)}, maxlen=self.MAXLEN, approximate=True)
+            pipe.expire(self._key(job_id), self.TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError as e:
+            # Progress is best effort; never fail a job over it
+            logger.warning(f"[{job_id}] Progress event dropped: {e}")
+
+    def progress(self, job_id: str, progress: int, status: str):
+        self.publish(job_id, "progress", progress, status)
+
+    def latest(self, job_id: str) -> Optional[Dict[str, Any]]:
+        entries = self.r.xrevrange(self._key(job_id), count=1)
+        if not entries:
+            return None
+        return json.loads(entries[0][1][b"data"])
+
+    @staticmethod
+    async def tail(job_id: str, last_id: str = "0", block_ms: int = 15000) -> AsyncIterator[Optional[Tuple[str, Dict[str, Any]]]]:
+        """
+        Yields (event_id, event) from last_id on, blocking on the stream in
+        between. Yields None when nothing arrived within block_ms (keep-alive).
+        """
+        client = get_async_redis()
+        key = ProgressStream._key(job_id)
+        while True:
+            response = await client.xread({key: last_id}, block=block_ms, count=50)
+            if not response:
+                yield None
+                continue
+            for event_id, fields in response[0][1]:
+                last_id = event_id.decode() if isinstance(event_id, bytes) else event_id
+                yield last_id, json.loads(fields[b"data"])
@@ -0,0 +1,131 @@
+import copy
+import time
+import hashlib
+import logging
+import threading
+import redis
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.services.cache import get_redis
+from blueprint_brain.services.storage import StorageService
+from blueprint_brain.src.utils.serialization import ResultCodec
+
+logger = logging.getLogger(__name__)
+
+class ResultStore:
+    """
+    Read side for finished results (API). Result objects in S3 are written
+    once and never modified, so they are cached by key:
+
+    - in process: parsed documents, LRU bounded by RESULT_LRU_ENTRIES
+    - in Redis:   raw bytes + content ETag (result_doc:{key} / result_etag:{key})
+                  shared by all API processes, for documents up to
+                  RESULT_REDIS_MAX_BYTES
+    - presigned image URLs are reused until PRESIGNED_URL_MARGIN_SECONDS
+      before they expire
+    """
+
+    def __init__(self, storage: StorageService, client: redis.Redis = None):
+        self.storage = storage
+        self.r = client or get_redis()
+        self._docs: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._urls: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _content_etag(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+    def _remember(self, key: str, etag: str, doc: Dict[str, Any]):
+        with self._lock:
+            self._docs[key] = (etag, doc)
+            self._docs.move_to_end(key)
+            while len(self._docs) > settings.RESULT_LRU_ENTRIES:
+                self._docs.popitem(last=False)
+
+    def load(self, key: str) -> Tuple[str, Dict[str, Any]]:
+        """(content etag, parsed document). Treat the document as read-only."""
+        with self._lock:
+            hit = self._docs.get(key)
+            if hit:
+                self._docs.move_to_end(key)
+                return hit
+
+        data = self.r.get(f"result_doc:{key}")
+        if data is None:
+            data = self.storage.download_bytes(key)
+            if data is None:
+                raise FileNotFoundError(key)
+            if len(data) <= settings.RESULT_REDIS_MAX_BYTES:
+                pipe = self.r.pipeline()
+                pipe.setex(f"result_doc:{key}", settings.RESULT_REDIS_TTL_SECONDS, data)
+                pipe.setex(f"result_etag:{key}", settings.RESULT_REDIS_TTL_SECONDS, self._content_etag(data))
+                pipe.execute()
+
+        etag, doc = self._content_etag(data), ResultCodec.loads_json(data)
+        self._remember(key, etag, doc)
+        return etag, doc
+
+    def content_etag(self, key: str) -> str:
+        """Content ETag without parsing (or downloading) when it is cached anywhere."""
+        with self._lock:
+            hit = self._docs.get(key)
+        if hit:
+            return hit[0]
+        etag = self.r.get(f"result_etag:{key}")
+        if etag:
+            return etag.decode()
+        return self.load(key)[0]
+
+    @staticmethod
+    def url_epoch() -> int:
+        """URL-cache generation; a URL minted in an epoch stays valid past its end."""
+        return int(time.time() // (settings.PRESIGNED_URL_SECONDS - settings.PRESIGNED_URL_MARGIN_SECONDS))
+
+    def presigned_url(self, key: str) -> str:
+        epoch = self.url_epoch()
+        with self._lock:
+            hit = self._urls.get(key)
+        if hit and hit[0] == epoch:
+            return hit[1]
+        url = self.storage.generate_presigned_url(key, expiration=settings.PRESIGNED_URL_SECONDS)
+        with self._lock:
+            self._urls[key] = (epoch, url)
+            self._urls.move_to_end(key)
+            while len(self._urls) > settings.PRESIGNED_URL_CACHE_ENTRIES:
+                self._urls.popitem(last=False)
+        return url
+
+    def response_etag(self, key: str, variant: str) -> str:
+        """
+        ETag of a served representation: content + request variant (page
+        range, encoding, ...) + URL epoch, so it changes when URLs rotate.
+        """
+        raw = f"{self.content_etag(key)}|{variant}|{self.url_epoch()}"
+        return '"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+    @staticmethod
+    def parse_page_range(spec: Optional[str]) -> Optional[List[Tuple[int, int]]]:
+        """'1-5,8' -> [(1, 5), (8, 8)]. None means all pages. Raises ValueError."""
+        if not spec:
+            return None
+        ranges = []
+        for part in spec.split(","):
+            start, _, end = part.strip().partition("-")
+            first, last = int(start), int(end or start)
+            if first < 1 or last < first:
+                raise ValueError(f"Invalid page range: {part}")
+            ranges.append((first, last))
+        return ranges
+
+    def select(self, doc: Dict[str, Any], ranges: Optional[List[Tuple[int, int]]]) -> Dict[str, Any]:
+        """Copy of the document restricted to the page ranges, safe to modify."""
+        pages = doc.get("results", [])
+        if ranges is not None:
+            pages = [p for p in pages if any(a <= p.get("page", 0) <= b for a, b in ranges)]
+        selected = {k: v for k, v in doc.items() if k != "results"}
+        selected["results"] = [copy.deepcopy(p) for p in pages]
+        selected["page_count"] = len(doc.get("results", []))
+        return selected
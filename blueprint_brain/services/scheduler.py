@@ -0,0 +1,220 @@
+import json
+import math
+import time
+import logging
+import redis
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+class FairScheduler:
+    """
+    Cost-aware, per-tenant fair scheduler in front of the page workers.
+
+    - Cost of a page ~ number of inference tiles (pixel area / stride^2).
+    - Across tenants: weighted fair queuing (stride scheduling). Each active
+      tenant has a virtual 'pass'; the tenant with the lowest pass is served
+      next and its pass advances by cost / weight. A tenant that was idle
+      re-enters at the current virtual time, so idling does not bank credit.
+    - Within a tenant: shortest job first (pages of cheaper jobs go first,
+      FIFO among equal cost, page order within a job).
+    - Admission: pages are only released while the cost in flight is below
+      SCHEDULER_CAPACITY_TILES, so the worker queues stay short and a new
+      small job waits for at most the capacity window, not for whole jobs.
+
+    Redis layout (fq:*):
+      fq:active            ZSET tenant -> pass (tenants with queued pages)
+      fq:q:{tenant}        ZSET member -> job cost
+      fq:items             HASH member -> payload
+      fq:weights / fq:pass HASH tenant -> weight / pass when it went idle
+      fq:vtime             virtual time (pass of the last served tenant)
+      fq:inflight          cost released but not completed
+      fq:running           HASH member -> cost (makes complete() idempotent)
+      fq:backlog           HASH tenant -> tile cost of its queued pages
+    """
+    QUEUE_PREFIX = "fq:q:"
+    ACTIVE, ITEMS, WEIGHTS, PASS, VTIME = "fq:active", "fq:items", "fq:weights", "fq:pass", "fq:vtime"
+    INFLIGHT, RUNNING, BACKLOG = "fq:inflight", "fq:running", "fq:backlog"
+
+    _ENQUEUE = """
+    redis.call('hset', KEYS[3], ARGV[1], ARGV[2])
+    for i = 3, #ARGV, 3 do
+      redis.call('zadd', KEYS[2], ARGV[i + 1], ARGV[i])
+      redis.call('hset', KEYS[4], ARGV[i], ARGV[i + 2])
+      redis.call('hincrbyfloat', KEYS[7], ARGV[1], cjson.decode(ARGV[i + 2])['cost'])
+    end
+    if not redis.call('zscore', KEYS[1], ARGV[1]) then
+      local vtime = tonumber(redis.call('get', KEYS[5]) or '0')
+      local last = tonumber(redis.call('hget', KEYS[6], ARGV[1]) or '0')
+      redis.call('zadd', KEYS[1], math.max(vtime, last), ARGV[1])
+    end
+    return 1
+    """
+
+    _NEXT = """
+    local inflight = tonumber(redis.call('get', KEYS[6]) or '0')
+    if inflight >= tonumber(ARGV[1]) then return false end
+    while true do
+      local head = redis.call('zrange', KEYS[1], 0, 0, 'WITHSCORES')
+      if #head == 0 then return false end
+      local tenant, pass = head[1], tonumber(head[2])
+      local qkey = ARGV[2] .. tenant
+      local popped = redis.call('zpopmin', qkey)
+      if #popped > 0 then
+        local member = popped[1]
+        local payload = redis.call('hget', KEYS[2], member)
+        redis.call('hdel', KEYS[2], member)
+        local cost = tonumber(cjson.decode(payload)['cost'])
+        local weight = tonumber(redis.call('hget', KEYS[3], tenant) or '1')
+        local next_pass = pass + cost / weight
+        redis.call('set', KEYS[4], pass)
+        if redis.call('zcard', qkey) > 0 then
+          redis.call('zadd', KEYS[1], next_pass, tenant)
+        else
+          redis.call('zrem', KEYS[1], tenant)
+          redis.call('hset', KEYS[5], tenant, next_pass)
+        end
+        redis.call('incrbyfloat', KEYS[6], cost)
+        redis.call('hset', KEYS[7], member, cost)
+        if tonumber(redis.call('hincrbyfloat', KEYS[8], tenant, -cost)) <= 0 then
+          redis.call('hdel', KEYS[8], tenant)
+        end
+        return {member, payload, tenant, popped[2]}
+      end
+      redis.call('zrem', KEYS[1], tenant)
+    end
+    """
+
+    _COMPLETE = """
+    local cost = redis.call('hget', KEYS[1], ARGV[1])
+    if not cost then return 0 end
+    redis.call('hdel', KEYS[1], ARGV[1])
+    if tonumber(redis.call('incrbyfloat', KEYS[2], -tonumber(cost))) < 0 then
+      redis.call('set', KEYS[2], 0)
+    end
+    return 1
+    """
+
+    # Undoes a release that could not be dispatched: the page goes back under
+    # its old member (same queue position) and its cost leaves the inflight pool
+    _REQUEUE = """
+    local cost = redis.call('hget', KEYS[6], ARGV[2])
+    if cost then
+      redis.call('hdel', KEYS[6], ARGV[2])
+      if tonumber(redis.call('incrbyfloat', KEYS[7], -tonumber(cost))) < 0 then
+        redis.call('set', KEYS[7], 0)
+      end
+    end
+    redis.call('zadd', KEYS[2], ARGV[3], ARGV[2])
+    redis.call('hset', KEYS[3], ARGV[2], ARGV[4])
+    redis.call('hincrbyfloat', KEYS[8], ARGV[1], cjson.decode(ARGV[4])['cost'])
+    if not redis.call('zscore', KEYS[1], ARGV[1]) then
+      local vtime = tonumber(redis.call('get', KEYS[4]) or '0')
+      local last = tonumber(redis.call('hget', KEYS[5], ARGV[1]) or '0')
+      redis.call('zadd', KEYS[1], math.max(vtime, last), ARGV[1])
+    end
+    return 1
+    """
+
+    def __init__(self, client: redis.Redis = None, capacity: float = None):
+        self.r = client or get_redis()
+        self.capacity = capacity or settings.SCHEDULER_CAPACITY_TILES
+        self._enqueue = self.r.register_script(self._ENQUEUE)
+        self._next = self.r.register_script(self._NEXT)
+        self._complete = self.r.register_script(self._COMPLETE)
+        self._requeue = self.r.register_script(self._REQUEUE)
+
+    @staticmethod
+    def page_cost(shape: Tuple[int, ...], mode: str = "full", regions: Optional[List] = None) -> float:
+        """Approximate inference tiles for a page (what the accelerator actually spends)."""
+        stride = settings.TILE_SIZE * (1 - settings.TILE_OVERLAP)
+        h, w = shape[:2]
+        tiles = math.ceil(h / stride) * math.ceil(w / stride)
+        if mode == "transfer":
+            return 1.0  # No inference, fusion and artifacts only
+        if mode == "incremental" and regions is not None:
+            changed = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+            return max(1.0, math.ceil(tiles * min(1.0, changed / float(h * w))))
+        return float(tiles)
+
+    def enqueue(self, tenant_id: str, weight: int, job_id: str, job_cost: float, items: List[Dict[str, Any]]):
+        """Queues a job's pages. Each item needs 'page' and 'cost'; the rest is passed to dispatch."""
+        seq = int(time.time() * 1000)
+        args = [tenant_id, max(1, int(weight or 1))]
+        for item in items:
+            member = f"{seq:013d}:{job_id}:{item['page']:05d}"
+            args += [member, job_cost, json.dumps(item)]
+        self._enqueue(
+            keys=[self.ACTIVE, self.QUEUE_PREFIX + tenant_id, self.WEIGHTS, self.ITEMS, self.VTIME, self.PASS, self.BACKLOG],
+            args=args
+        )
+
+    def _release(self) -> Optional[Tuple[str, bytes, str, float]]:
+        """(member, payload, tenant, job cost) of the next page if capacity allows."""
+        popped = self._next(
+            keys=[self.ACTIVE, self.ITEMS, self.WEIGHTS, self.VTIME, self.PASS, self.INFLIGHT, self.RUNNING, self.BACKLOG],
+            args=[self.capacity, self.QUEUE_PREFIX]
+        )
+        if not popped:
+            return None
+        member, payload, tenant, job_cost = popped
+        decode = lambda v: v.decode() if isinstance(v, bytes) else v
+        return decode(member), payload, decode(tenant), float(job_cost)
+
+    def next(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Releases the next page if capacity allows. Returns (member, item) or None."""
+        released = self._release()
+        if released is None:
+            return None
+        return released[0], json.loads(released[1])
+
+    def complete(self, member: str) -> bool:
+        """Returns a released page's cost to the capacity pool (idempotent)."""
+        return bool(self._complete(keys=[self.RUNNING, self.INFLIGHT], args=[member]))
+
+    def requeue(self, tenant_id: str, member: str, job_cost: float, payload: bytes):
+        """Puts a released page back at its place in the tenant's queue."""
+        self._requeue(
+            keys=[self.ACTIVE, self.QUEUE_PREFIX + tenant_id, self.ITEMS, self.VTIME, self.PASS,
+                  self.RUNNING, self.INFLIGHT, self.BACKLOG],
+            args=[tenant_id, member, job_cost, payload]
+        )
+
+    def pump(self, dispatch: Callable[[str, Dict[str, Any]], None]) -> int:
+        """
+        Dispatches pages until capacity is used up or nothing is queued. A page
+        whose dispatch fails is queued again (the next pump retries it), so its
+        job does not wait forever for it.
+        """
+        released = 0
+        while True:
+            popped = self._release()
+            if popped is None:
+                return released
+            member, payload, tenant_id, job_cost = popped
+            try:
+                dispatch(member, json.loads(payload))
+            except Exception:
+                self.requeue(tenant_id, member, job_cost, payload)
+                raise
+            released += 1
+
+    def backlog(self) -> Dict[str, int]:
+        """Queued pages per tenant (for metrics / admin)."""
+        tenants = [t.decode() for t in self.r.zrange(self.ACTIVE, 0, -1)]
+        pipe = self.r.pipeline()
+        for tenant in tenants:
+            pipe.zcard(self.QUEUE_PREFIX + tenant)
+        return dict(zip(tenants, pipe.execute()))
+
+    def queued_cost(self) -> Tuple[Dict[str, float], float]:
+        """(queued tile cost per tenant, tile cost released and not completed)."""
+        pipe = self.r.pipeline()
+        pipe.hgetall(self.BACKLOG)
+        pipe.get(self.INFLIGHT)
+        backlog, inflight = pipe.execute()
+        queued = {t.decode(): max(0.0, float(cost)) for t, cost in backlog.items()}
+        return queued, max(0.0, float(inflight or 0))
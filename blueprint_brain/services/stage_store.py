@@ -0,0 +1,165 @@
+import io
+import cv2
+import gzip
+import json
+import hashlib
+import logging
+import numpy as np
+from typing import Dict, Any, List, Optional
+from shapely.geometry import Polygon
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.services.storage import StorageService
+
+logger = logging.getLogger(__name__)
+
+class StageStore:
+    """
+    Persists per-page intermediate pipeline outputs (vision, OCR, rooms) in S3.
+    Layout: stages/{input_hash}/{stage}/{config_hash}/p{page}.{ext}
+    A stage output is only reused if the config that produced it is unchanged.
+    Degraded runs (time budget) hash their degradation knobs into the config,
+    so their outputs never stand in for full-fidelity ones.
+    """
+    VISION = "vision"
+    OCR = "ocr"
+    ROOMS = "rooms"
+
+    def __init__(self, storage: StorageService = None):
+        self.storage = storage or StorageService()
+
+    @staticmethod
+    def stage_config(stage: str, degradation: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Settings that influence a stage's output (degradation: DegradationPolicy.describe())."""
+        degraded = degradation if degradation and degradation.get("level") else None
+        if stage == StageStore.VISION:
+            config = {
+                "model": settings.DEFAULT_MODEL_VERSION,
+                "tile_size": settings.TILE_SIZE,
+                "tile_overlap": settings.TILE_OVERLAP,
+                "conf": settings.CONFIDENCE_THRESHOLD,
+            }
+            if degraded:
+                config.update(model=degraded["model"], tile_overlap=degraded["tile_overlap"], dpi=degraded["dpi"])
+            return config
+        if stage == StageStore.OCR:
+            config = {"engine": "paddleocr-en-cls", "conf": settings.CONFIDENCE_THRESHOLD}
+            if degraded:
+                config.update(angle_cls=degraded["ocr_angle_cls"], dpi=degraded["dpi"])
+            return config
+        if stage == StageStore.ROOMS:
+            config = {
+                "max_dim": settings.ROOM_SEG_MAX_DIM,
+                "close_kernel": settings.ROOM_SEG_CLOSE_KERNEL,
+                "min_area": settings.ROOM_SEG_MIN_AREA,
+                "max_area_ratio": settings.ROOM_SEG_MAX_AREA_RATIO,
+            }
+            if degraded:
+                config.update(dpi=degraded["dpi"])
+            return config
+        raise ValueError(f"Unknown stage: {stage}")
+
+    @staticmethod
+    def config_hash(stage: str, degradation: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(StageStore.stage_config(stage, degradation), sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+    def _key(self, input_hash: str, stage: str, page: int, ext: str, degradation: Optional[Dict[str, Any]] = None) -> str:
+        return f"stages/{input_hash}/{stage}/{self.config_hash(stage, degradation)}/p{page}.{ext}"
+
+    @staticmethod
+    def _manifest_key(input_hash: str) -> str:
+        return f"stages/{input_hash}/manifest.json"
+
+    # --- Vision ---
+    def save_vision(self, input_hash: str, page: int, vision_res: Dict[str, Any], degradation: Optional[Dict[str, Any]] = None):
+        raw = vision_res.get('raw', {})
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            boxes=np.asarray(vision_res['boxes'], dtype=np.float32).reshape(-1, 4),
+            scores=np.asarray(vision_res['scores'], dtype=np.float32),
+            classes=np.asarray(vision_res['classes'], dtype=np.int16),
+            raw_boxes=np.asarray(raw.get('boxes', []), dtype=np.float32).reshape(-1, 4),
+            raw_scores=np.asarray(raw.get('scores', []), dtype=np.float32),
+            raw_classes=np.asarray(raw.get('classes', []), dtype=np.int16),
+        )
+        self.storage.upload_bytes(buf.getvalue(), self._key(input_hash, self.VISION, page, "npz", degradation))
+
+    def load_vision(self, input_hash: str, page: int, degradation: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        data = self.storage.download_bytes(self._key(input_hash, self.VISION, page, "npz", degradation))
+        if data is None:
+            return None
+        with np.load(io.BytesIO(data)) as npz:
+            return {
+                'boxes': npz['boxes'], 'scores': npz['scores'], 'classes': npz['classes'],
+                'raw': {'boxes': npz['raw_boxes'], 'scores': npz['raw_scores'], 'classes': npz['raw_classes']}
+            }
+
+    # --- OCR ---
+    def save_ocr(self, input_hash: str, page: int, entities: List[Any], degradation: Optional[Dict[str, Any]] = None):
+        rows = [e.dict() if hasattr(e, 'dict') else dict(e) for e in entities]
+        payload = gzip.compress(json.dumps(rows, separators=(',', ':')).encode())
+        self.storage.upload_bytes(payload, self._key(input_hash, self.OCR, page, "json.gz", degradation))
+
+    def load_ocr(self, input_hash: str, page: int, degradation: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Returns raw entity dicts (build TextEntity(**row) on the worker side)."""
+        data = self.storage.download_bytes(self._key(input_hash, self.OCR, page, "json.gz", degradation))
+        if data is None:
+            return None
+        return json.loads(gzip.decompress(data))
+
+    # --- Rooms ---
+    def save_rooms(self, input_hash: str, page: int, polygons: List[Polygon], degradation: Optional[Dict[str, Any]] = None):
+        rings = [np.asarray(p.exterior.coords, dtype=np.float32) for p in polygons]
+        offsets = np.cumsum([0] + [len(r) for r in rings]).astype(np.int32)
+        coords = np.concatenate(rings) if rings else np.zeros((0, 2), dtype=np.float32)
+        buf = io.BytesIO()
+        np.savez_compressed(buf, coords=coords, offsets=offsets)
+        self.storage.upload_bytes(buf.getvalue(), self._key(input_hash, self.ROOMS, page, "npz", degradation))
+
+    def load_rooms(self, input_hash: str, page: int, degradation: Optional[Dict[str, Any]] = None) -> Optional[List[Polygon]]:
+        data = self.storage.download_bytes(self._key(input_hash, self.ROOMS, page, "npz", degradation))
+        if data is None:
+            return None
+        with np.load(io.BytesIO(data)) as npz:
+            coords, offsets = npz['coords'], npz['offsets']
+        return [Polygon(coords[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
+
+    # --- Thumbnails and ink maps (near-duplicate alignment; not tied to a stage config) ---
+    @staticmethod
+    def _thumb_key(input_hash: str, page: int, kind: str = "thumbs") -> str:
+        return f"stages/{input_hash}/{kind}/p{page}.png"
+
+    def _save_gray(self, key: str, image: np.ndarray):
+        ok, buf = cv2.imencode(".png", image)
+        if ok:
+            self.storage.upload_bytes(buf.tobytes(), key, content_type="image/png")
+
+    def _load_gray(self, key: str) -> Optional[np.ndarray]:
+        data = self.storage.download_bytes(key)
+        if data is None:
+            return None
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+    def save_thumbnail(self, input_hash: str, page: int, thumb: np.ndarray):
+        self._save_gray(self._thumb_key(input_hash, page), thumb)
+
+    def load_thumbnail(self, input_hash: str, page: int) -> Optional[np.ndarray]:
+        return self._load_gray(self._thumb_key(input_hash, page))
+
+    def save_ink_map(self, input_hash: str, page: int, ink: np.ndarray):
+        self._save_gray(self._thumb_key(input_hash, page, "inks"), ink)
+
+    def load_ink_map(self, input_hash: str, page: int) -> Optional[np.ndarray]:
+        """None for pages ingested before ink maps were stored (alignment then diffs thumbnails)."""
+        return self._load_gray(self._thumb_key(input_hash, page, "inks"))
+
+    # --- Manifest ---
+    def save_manifest(self, input_hash: str, manifest: Dict[str, Any]):
+        payload = json.dumps(manifest).encode()
+        self.storage.upload_bytes(payload, self._manifest_key(input_hash), content_type="application/json")
+
+    def load_manifest(self, input_hash: str) -> Optional[Dict[str, Any]]:
+        data = self.storage.download_bytes(self._manifest_key(input_hash))
+        return json.loads(data) if data is not None else None
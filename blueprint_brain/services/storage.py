@@ -1,11 +1,25 @@
+import io
 import boto3
+import hashlib
 import logging
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from blueprint_brain.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+class _HashingWriter:
+    """File wrapper that hashes bytes as they are written (single pass download + hash)."""
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.md5 = hashlib.md5()
+
+    def write(self, data: bytes) -> int:
+        self.md5.update(data)
+        return self.fileobj.write(data)
+
 class StorageService:
     """
     Wrapper for S3-compatible Object Storage.
@@ -16,9 +30,17 @@ class StorageService:
             endpoint_url=settings.S3_ENDPOINT,
             aws_access_key_id=settings.AWS_ACCESS_KEY,
             aws_secret_access_key=settings.AWS_SECRET_KEY,
-            region_name=settings.AWS_REGION
+            region_name=settings.AWS_REGION,
+            # Concurrent artifact uploads (and their multipart parts) share this pool
+            config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS)
         )
         self.bucket = settings.S3_BUCKET_NAME
+        # Large objects go up as parallel multipart parts
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=settings.S3_MULTIPART_CONCURRENCY
+        )
         self._ensure_bucket_exists()
 
     def _ensure_bucket_exists(self):
@@ -55,6 +77,18 @@ class StorageService:
                             'Prefix': 'results/',
                             'Status': 'Enabled',
                             'Expiration': {'Days': 30} # JSON results gone in 30 days
+                        },
+                        {
+                            'ID': 'ExpireWorkRasters',
+                            'Prefix': 'work/',
+                            'Status': 'Enabled',
+                            'Expiration': {'Days': 1} # Page rasters handed between pipeline stages
+                        },
+                        {
+                            'ID': 'ExpireStageOutputs',
+                            'Prefix': 'stages/',
+                            'Status': 'Enabled',
+                            'Expiration': {'Days': 30} # Cached vision/OCR outputs for re-fusion
                         }
                     ]
                 }
@@ -68,10 +102,11 @@ class StorageService:
         wait=wait_exponential(multiplier=1, min=2, max=10),
         retry=retry_if_exception_type(ClientError)
     )
-    def upload_file(self, file_obj, object_name: str) -> bool:
+    def upload_file(self, file_obj, object_name: str, content_type: str = None) -> bool:
         """Uploads a file-like object to S3."""
+        extra_args = {'ContentType': content_type} if content_type else None
         try:
-            self.s3.upload_fileobj(file_obj, self.bucket, object_name)
+            self.s3.upload_fileobj(file_obj, self.bucket, object_name, ExtraArgs=extra_args, Config=self.transfer_config)
             logger.info(f"Uploaded {object_name} to S3.")
             return True
         except ClientError as e:
@@ -88,6 +123,55 @@ class StorageService:
             logger.error(f"Download failed: {e}")
             return False
             
+    def download_file_hashed(self, object_name: str, local_path: str) -> str:
+        """
+        Streams an object to disk while computing its MD5.
+        Returns the hex digest (same value the dedup cache is keyed by).
+        """
+        with open(local_path, "wb") as f:
+            writer = _HashingWriter(f)
+            self.s3.download_fileobj(self.bucket, object_name, writer)
+        return writer.md5.hexdigest()
+
+    @staticmethod
+    def content_hash_from_head(head: dict) -> str:
+        """
+        Storage-side checksum recorded at upload. For single-part uploads
+        (presigned POST always is) the ETag is the MD5 of the content.
+        Multipart ETags ('<md5>-<parts>') are not content hashes -> None.
+        """
+        etag = (head or {}).get('ETag', '').strip('"')
+        if not etag or '-' in etag or len(etag) != 32:
+            return None
+        return etag
+
+    def get_content_hash(self, object_name: str) -> str:
+        """Content MD5 from object metadata (one HEAD call), or None if unavailable."""
+        try:
+            return self.content_hash_from_head(self.s3.head_object(Bucket=self.bucket, Key=object_name))
+        except ClientError as e:
+            logger.warning(f"HEAD failed for {object_name}: {e}")
+            return None
+
+    def upload_bytes(self, data: bytes, object_name: str, content_type: str = None) -> bool:
+        """Uploads an in-memory payload to S3."""
+        return self.upload_file(io.BytesIO(data), object_name, content_type=content_type)
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type(ClientError)
+    )
+    def download_bytes(self, object_name: str) -> bytes:
+        """Downloads an object into memory. Returns None if it does not exist."""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=object_name)
+            return response['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+
     def generate_presigned_url(self, object_name: str, expiration=3600) -> str:
         """Generates a temporary URL for downloading results."""
         try:
@@ -0,0 +1,127 @@
+import math
+import time
+import logging
+import redis
+from typing import Any, Dict, List, Tuple
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Degradation ladder, cheapest knobs first. Each level keeps the previous ones.
+#   dpi_scale      pages are downscaled (same as rasterizing at a lower DPI)
+#   tile_overlap   coarser tile stride (fewer tiles per page)
+#   ocr_angle_cls  PaddleOCR orientation classifier per text line
+#   light_model    settings.LIGHT_MODEL_VERSION instead of the default model
+LEVELS: List[Dict[str, Any]] = [
+    {"name": "full", "dpi_scale": 1.0, "tile_overlap": None, "ocr_angle_cls": True, "light_model": False},
+    {"name": "fast", "dpi_scale": 1.0, "tile_overlap": 0.0, "ocr_angle_cls": False, "light_model": False},
+    {"name": "low_dpi", "dpi_scale": 0.75, "tile_overlap": 0.0, "ocr_angle_cls": False, "light_model": False},
+    {"name": "light_model", "dpi_scale": 0.75, "tile_overlap": 0.0, "ocr_angle_cls": False, "light_model": True},
+]
+
+class TileTimer:
+    """
+    Measured accelerator seconds per inference tile (default model), as an
+    exponential moving average shared by all vision workers (perf:tile_seconds),
+    and fleet throughput: tiles finished per THROUGHPUT_BUCKET_SECONDS bucket
+    (perf:tiles_done:{bucket}).
+    """
+    KEY = "perf:tile_seconds"
+    ALPHA = 0.2
+    DONE_PREFIX = "perf:tiles_done:"
+    THROUGHPUT_BUCKET_SECONDS = 10
+    THROUGHPUT_WINDOW_BUCKETS = 6
+
+    def __init__(self, client: redis.Redis = None):
+        self.r = client or get_redis()
+
+    def seconds_per_tile(self) -> float:
+        value = self.r.get(self.KEY)
+        return float(value) if value else settings.TILE_SECONDS_DEFAULT
+
+    def record(self, seconds: float, tiles: int, light_model: bool = False):
+        if tiles <= 0:
+            return
+        sample = seconds / tiles
+        if light_model:
+            # Normalize to the default model so estimates stay comparable
+            sample *= settings.LIGHT_MODEL_SPEEDUP
+        current = self.seconds_per_tile()
+        bucket = self.DONE_PREFIX + str(int(time.time() // self.THROUGHPUT_BUCKET_SECONDS))
+        pipe = self.r.pipeline()
+        pipe.set(self.KEY, current + self.ALPHA * (sample - current))
+        pipe.incrby(bucket, tiles)
+        pipe.expire(bucket, self.THROUGHPUT_BUCKET_SECONDS * (self.THROUGHPUT_WINDOW_BUCKETS + 2))
+        pipe.execute()
+
+    def tiles_per_second(self) -> float:
+        """Tiles finished per second by all vision workers over the last full buckets."""
+        current = int(time.time() // self.THROUGHPUT_BUCKET_SECONDS)
+        keys = [self.DONE_PREFIX + str(current - i) for i in range(1, self.THROUGHPUT_WINDOW_BUCKETS + 1)]
+        done = sum(int(v) for v in self.r.mget(keys) if v)
+        return done / float(self.THROUGHPUT_BUCKET_SECONDS * self.THROUGHPUT_WINDOW_BUCKETS)
+
+class DegradationPolicy:
+    """
+    Picks the mildest degradation level whose estimated work fits the time
+    budgets. Estimate = inference tiles at that level x measured seconds per
+    tile. Pages run in parallel, each under its own task time limit, so the
+    slowest page is held against PAGE_TIME_BUDGET_SECONDS; the whole job is
+    held against JOB_TIME_BUDGET_SECONDS at the fleet's measured throughput.
+    """
+
+    @staticmethod
+    def levels() -> List[Dict[str, Any]]:
+        # The light-model step only exists when a light model is configured
+        return [level for level in LEVELS if not level["light_model"] or settings.LIGHT_MODEL_VERSION]
+
+    @staticmethod
+    def describe(level: int) -> Dict[str, Any]:
+        knobs = dict(LEVELS[level])
+        return {
+            "level": level,
+            "name": knobs["name"],
+            "dpi": int(settings.PDF_DPI * knobs["dpi_scale"]),
+            "tile_overlap": settings.TILE_OVERLAP if knobs["tile_overlap"] is None else knobs["tile_overlap"],
+            "ocr_angle_cls": knobs["ocr_angle_cls"],
+            "light_model": knobs["light_model"],
+            "model": settings.LIGHT_MODEL_VERSION if knobs["light_model"] else settings.DEFAULT_MODEL_VERSION
+        }
+
+    @staticmethod
+    def tiles(shape: Tuple[int, ...], level: int) -> int:
+        knobs = DegradationPolicy.describe(level)
+        scale = LEVELS[level]["dpi_scale"]
+        stride = settings.TILE_SIZE * (1 - knobs["tile_overlap"])
+        h, w = shape[0] * scale, shape[1] * scale
+        return math.ceil(h / stride) * math.ceil(w / stride)
+
+    @staticmethod
+    def estimate_seconds(shapes: List[Tuple[int, ...]], level: int, seconds_per_tile: float) -> float:
+        tiles = sum(DegradationPolicy.tiles(shape, level) for shape in shapes)
+        speedup = settings.LIGHT_MODEL_SPEEDUP if LEVELS[level]["light_model"] else 1.0
+        return tiles * seconds_per_tile / speedup
+
+    @staticmethod
+    def choose(shapes: List[Tuple[int, ...]], elapsed: float, seconds_per_tile: float,
+               parallelism: float = 0.0) -> int:
+        """
+        Lowest level that fits; the strongest available one if none does.
+        parallelism: accelerator seconds the fleet finishes per second
+        (0 = not measured, e.g. idle fleet: only the per-page budget applies).
+        """
+        remaining = settings.JOB_TIME_BUDGET_SECONDS - elapsed
+        levels = DegradationPolicy.levels()
+        for i in range(len(levels)):
+            slowest = max((DegradationPolicy.estimate_seconds([shape], i, seconds_per_tile) for shape in shapes), default=0.0)
+            if slowest > settings.PAGE_TIME_BUDGET_SECONDS:
+                continue
+            if parallelism > 0:
+                wall = DegradationPolicy.estimate_seconds(shapes, i, seconds_per_tile) / max(1.0, parallelism)
+                if wall > remaining:
+                    continue
+            return i
+        logger.warning(f"Even the strongest degradation is estimated over budget ({remaining:.0f}s left).")
+        return len(levels) - 1
@@ -0,0 +1,60 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.services.storage import StorageService
+
+logger = logging.getLogger(__name__)
+
+class ArtifactUploader:
+    """
+    Background uploader for in-memory job artifacts (annotated pages, page results).
+    Uploads run concurrently on a small thread pool; at most max_pending payloads
+    are buffered, so a slow bucket back-pressures the page loop instead of
+    growing memory. Call wait_all() before reporting the job as done.
+    """
+
+    def __init__(self, storage: StorageService, workers: int = None, max_pending: int = None):
+        self.storage = storage
+        self.workers = workers or settings.ARTIFACT_UPLOAD_WORKERS
+        self._slots = threading.BoundedSemaphore(max_pending or settings.ARTIFACT_UPLOAD_MAX_PENDING)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="artifact-upload")
+        self._futures: List[Future] = []
+
+    def _upload(self, data: bytes, object_name: str, content_type: str):
+        try:
+            if not self.storage.upload_bytes(data, object_name, content_type=content_type):
+                raise IOError(f"Upload failed: {object_name}")
+        finally:
+            self._slots.release()
+
+    def submit(self, data: bytes, object_name: str, content_type: str = None) -> Future:
+        """Queues an upload. Blocks only while max_pending uploads are already buffered."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._upload, data, object_name, content_type)
+        except Exception:
+            self._slots.release()
+            raise
+        self._futures.append(future)
+        return future
+
+    def wait_all(self):
+        """Blocks until every queued upload finished. Raises the first failure."""
+        futures, self._futures = self._futures, []
+        errors = [f.exception() for f in futures]
+        errors = [e for e in errors if e is not None]
+        if errors:
+            raise errors[0]
+        logger.info(f"Uploaded {len(futures)} artifacts.")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
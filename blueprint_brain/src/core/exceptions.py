@@ -24,4 +24,18 @@ class GeometryError(BlueprintAIException):
 
 class ScaleCalibrationError(BlueprintAIException):
     """Raised when scale cannot be determined or calculated area is physically impossible"""
-    pass
\ No newline at end of file
+    pass
+
+class LogicFusionError(BlueprintAIException):
+    """Raised when merging vision, OCR and geometry into a floorplan fails"""
+    pass
+
+class CapacityExceededError(BlueprintAIException):
+    """Raised when work is refused because capacity is used up (maps to 429/503 + Retry-After)"""
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TenantQuotaExceededError(CapacityExceededError):
+    """Raised when one tenant's queued work is over its share (maps to 429 + Retry-After)"""
+    pass
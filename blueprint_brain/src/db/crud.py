@@ -1,8 +1,12 @@
 import uuid
 from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from blueprint_brain.src.db.models.project import Document
-from blueprint_brain.src.db.models.job import Job
+from blueprint_brain.src.db.models.project import Project, Document
+from blueprint_brain.src.db.models.job import Job, JobPage
+from blueprint_brain.src.security.models import ApiKey
 
 def create_document(db: Session, filename: str, s3_key: str, file_hash: str = None) -> Document:
     doc = Document(
@@ -17,24 +21,94 @@ def create_document(db: Session, filename: str, s3_key: str, file_hash: str = No
     db.refresh(doc)
     return doc
 
-def create_job(db: Session, document_id: str) -> Job:
+def create_job(db: Session, document_id: str, status: str = "QUEUED", result_key: str = None,
+               meta: dict = None, api_key_id: str = None) -> Job:
+    now = datetime.utcnow()
     job = Job(
         id=str(uuid.uuid4()),
         document_id=document_id,
-        status="QUEUED",
-        created_at=datetime.utcnow()
+        api_key_id=api_key_id,
+        status=status,
+        created_at=now,
+        result_s3_key=result_key,
+        meta_data=meta
     )
+    if status == "COMPLETED":
+        # Dedup hit: answered from an existing result without running
+        job.started_at = now
+        job.completed_at = now
+        job.processing_duration = 0.0
     db.add(job)
     db.commit()
     db.refresh(job)
     return job
 
+def create_batch(db: Session, name: str, files: List[dict], api_key_id: str = None) -> Tuple[Project, List[Job]]:
+    """
+    One project with a document and a job per file, in a single transaction.
+    files: {"filename", "s3_key", "file_hash", "result_key"}; a result_key
+    (dedup hit) creates the job as COMPLETED. Jobs come back in file order.
+    """
+    now = datetime.utcnow()
+    project = Project(id=str(uuid.uuid4()), name=name, api_key_id=api_key_id, created_at=now)
+    rows, jobs = [project], []
+    for f in files:
+        doc = Document(
+            id=str(uuid.uuid4()), project_id=project.id, filename=f["filename"],
+            s3_key=f["s3_key"], file_hash=f.get("file_hash"), upload_date=now
+        )
+        job = Job(id=str(uuid.uuid4()), document_id=doc.id, api_key_id=api_key_id, status="QUEUED", created_at=now)
+        if f.get("result_key"):
+            job.status = "COMPLETED"
+            job.result_s3_key = f["result_key"]
+            job.meta_data = {"input_hash": f.get("file_hash"), "cached": True}
+            job.started_at = now
+            job.completed_at = now
+            job.processing_duration = 0.0
+        rows += [doc, job]
+        jobs.append(job)
+    db.add_all(rows)
+    db.commit()
+    return project, jobs
+
+def get_batch(db: Session, project_id: str) -> Project:
+    return db.query(Project).filter(Project.id == project_id).first()
+
+def get_batch_counts(db: Session, project_id: str) -> dict:
+    """Job count per status for a batch (one grouped query)."""
+    rows = db.query(Job.status, func.count(Job.id))\
+        .join(Document, Job.document_id == Document.id)\
+        .filter(Document.project_id == project_id)\
+        .group_by(Job.status).all()
+    return {status: count for status, count in rows}
+
+def get_batch_jobs(db: Session, project_id: str, status: str = None, offset: int = 0, limit: int = 100) -> list:
+    """(job, filename) pairs of a batch in submission order."""
+    query = db.query(Job, Document.filename)\
+        .join(Document, Job.document_id == Document.id)\
+        .filter(Document.project_id == project_id)
+    if status:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.created_at, Job.id).offset(offset).limit(limit).all()
+
 def get_job(db: Session, job_id: str) -> Job:
     return db.query(Job).filter(Job.id == job_id).first()
 
 def get_document_by_hash(db: Session, file_hash: str) -> Document:
     return db.query(Document).filter(Document.file_hash == file_hash).first()
 
+def set_document_hash(db: Session, document_id: str, file_hash: str):
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if doc and not doc.file_hash:
+        doc.file_hash = file_hash
+        db.commit()
+
+def get_scheduling_weight(db: Session, api_key_id: str) -> int:
+    if not api_key_id:
+        return 1
+    key = db.query(ApiKey).filter(ApiKey.id == api_key_id).first()
+    return (key.scheduling_weight or 1) if key else 1
+
 def update_job_status(db: Session, job_id: str, status: str, result_key: str = None, meta: dict = None, error: str = None):
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
@@ -57,4 +131,48 @@ def update_job_status(db: Session, job_id: str, status: str, result_key: str = N
         job.error_message = error
         
     db.commit()
-    return job
\ No newline at end of file
+    return job
+
+def checkpoint_page(db: Session, job_id: str, entry: dict) -> JobPage:
+    """Records a finished page (idempotent: a redelivered page keeps its first row)."""
+    row = db.query(JobPage).filter(JobPage.job_id == job_id, JobPage.page == entry["page"]).first()
+    if row:
+        return row
+    row = JobPage(
+        id=str(uuid.uuid4()),
+        job_id=job_id,
+        page=entry["page"],
+        mode=entry.get("mode"),
+        result_s3_key=entry["result_key"],
+        image_s3_key=entry.get("image_key"),
+        shape=entry.get("shape"),
+        stages=entry.get("stages"),
+        completed_at=datetime.utcnow()
+    )
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Same page finished concurrently by a duplicate delivery
+        db.rollback()
+        row = db.query(JobPage).filter(JobPage.job_id == job_id, JobPage.page == entry["page"]).first()
+    return row
+
+def page_entry(row: JobPage) -> dict:
+    return {
+        "page": row.page,
+        "mode": row.mode,
+        "result_key": row.result_s3_key,
+        "image_key": row.image_s3_key,
+        "shape": row.shape,
+        "stages": row.stages
+    }
+
+def get_page_checkpoint(db: Session, job_id: str, page: int) -> dict:
+    row = db.query(JobPage).filter(JobPage.job_id == job_id, JobPage.page == page).first()
+    return page_entry(row) if row else None
+
+def get_page_checkpoints(db: Session, job_id: str) -> dict:
+    """page number -> entry for every finished page of a job."""
+    rows = db.query(JobPage).filter(JobPage.job_id == job_id).all()
+    return {row.page: page_entry(row) for row in rows}
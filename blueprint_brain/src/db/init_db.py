@@ -1,6 +1,6 @@
 from blueprint_brain.src.db.session import engine, Base
 from blueprint_brain.src.db.models.project import Project, Document
-from blueprint_brain.src.db.models.job import Job
+from blueprint_brain.src.db.models.job import Job, JobPage
 
 def init_db():
     print("Creating database tables...")
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Float
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Float, Integer, UniqueConstraint
 from sqlalchemy.orm import relationship
 from blueprint_brain.src.db.base import Base
 
@@ -9,6 +9,7 @@ class Job(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     document_id = Column(String, ForeignKey("documents.id"))
+    api_key_id = Column(String, ForeignKey("api_keys.id"), nullable=True, index=True) # Submitting tenant
     status = Column(String, default="QUEUED", index=True) # QUEUED, PROCESSING, COMPLETED, FAILED
     
     # Performance Metrics
@@ -23,4 +24,28 @@ class Job(Base):
     error_message = Column(String, nullable=True)
 
     # Relationships
-    document = relationship("Document", back_populates="jobs")
\ No newline at end of file
+    document = relationship("Document", back_populates="jobs")
+    pages = relationship("JobPage", back_populates="job", order_by="JobPage.page")
+
+class JobPage(Base):
+    """
+    Per-page completion checkpoint. A row exists once the page's outputs are
+    in S3, so a redelivered job resumes after its last finished page.
+    """
+    __tablename__ = "job_pages"
+    __table_args__ = (UniqueConstraint("job_id", "page", name="uq_job_page"),)
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String, ForeignKey("jobs.id"), index=True, nullable=False)
+    page = Column(Integer, nullable=False)
+    status = Column(String, default="COMPLETED")
+    mode = Column(String, nullable=True) # full, incremental, transfer, cached
+    
+    # Outputs (already in S3 when the row is written)
+    result_s3_key = Column(String, nullable=False)
+    image_s3_key = Column(String, nullable=True)
+    shape = Column(JSON, nullable=True)
+    stages = Column(JSON, nullable=True) # {"input_hash", "page"} of the stage outputs used
+    completed_at = Column(DateTime, default=datetime.utcnow)
+
+    job = relationship("Job", back_populates="pages")
\ No newline at end of file
@@ -9,6 +9,8 @@ class Project(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
+    # Owner of a batch submission (POST /batches); None for other projects
+    api_key_id = Column(String, ForeignKey("api_keys.id"), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -18,7 +20,7 @@ class Document(Base):
     __tablename__ = "documents"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    project_id = Column(String, ForeignKey("projects.id"), nullable=True)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=True, index=True)
     filename = Column(String, nullable=False)
     s3_key = Column(String, nullable=False)
     file_hash = Column(String, index=True) # For Deduplication
@@ -7,6 +7,8 @@ from blueprint_brain.config.settings import settings
 engine = create_engine(
     settings.DATABASE_URL, 
     pool_pre_ping=True, 
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     echo=False
 )
 
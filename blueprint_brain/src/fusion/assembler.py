@@ -1,13 +1,14 @@
 import numpy as np
 import logging
-from typing import List, Dict, Any
-from shapely.geometry import Point
+from typing import List, Dict, Any, Optional
+from shapely.geometry import Polygon
 
 from blueprint_brain.src.ocr.engine import TextEntity
 from blueprint_brain.src.ocr.cleaner import TextCleaner, TextType
 from blueprint_brain.src.logic.geometry import GeometryUtils
 from blueprint_brain.src.logic.scale import ScaleEngine
 from blueprint_brain.src.core.exceptions import LogicFusionError
+from blueprint_brain.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -16,56 +17,67 @@ class FusionAssembler:
     Orchestrator for merging Vision and Logic.
     """
     
-    def __init__(self, scale_value: float = 10.0):
-        # In production, scale_value might come from user input or metadata
+    def __init__(self, scale_value: float = None, vocabulary: Optional[Dict[str, str]] = None):
+        # scale_value / vocabulary normally come from the job's DocumentContext
         self.geo = GeometryUtils()
-        self.scale = ScaleEngine(pixels_per_foot=scale_value)
+        self.scale = ScaleEngine(pixels_per_foot=scale_value or settings.DEFAULT_PIXELS_PER_FOOT)
+        self.vocabulary = vocabulary or {}
 
     def assemble_floorplan(self, 
                            image_shape: tuple,
                            room_mask: np.ndarray, 
                            detections: List[Dict], 
-                           ocr_results: List[TextEntity]) -> Dict[str, Any]:
+                           ocr_results: List[TextEntity],
+                           room_polygons: Optional[List[Polygon]] = None) -> Dict[str, Any]:
+        """
+        room_mask: Full-resolution binary room mask. Ignored when room_polygons
+                   (already in page coordinates, e.g. from RoomSegmenter) are given.
+        """
         try:
             h, w = image_shape[:2]
             
             # 1. Convert Mask to Polygons
-            room_polys = self.geo.mask_to_polygons(room_mask)
+            if room_polygons is not None:
+                room_polys = room_polygons
+            else:
+                room_polys = self.geo.mask_to_polygons(room_mask)
             logger.info(f"Fusion: Processed {len(room_polys)} room polygons.")
 
             # 2. Prepare Data for Spatial Indexing
-            # We want to map Text Labels AND Detected Objects to Rooms
-            
+            # Text Labels AND Detected Objects go into ONE point array,
+            # so the page needs a single tree and a single bulk query.
+
             # A. Prepare Text
-            room_label_points = []
+            label_entities = []
             for txt in ocr_results:
-                if TextCleaner.classify_text(txt.text) == TextType.ROOM_LABEL:
-                    # Store tuple (Point, DataDict)
-                    room_label_points.append((txt.center_point, {'entity': txt}))
-
-            # B. Prepare Objects (Doors, etc.)
-            object_points = []
-            for det in detections:
-                # Calc center
-                bbox = det['bbox']
-                cx = (bbox[0] + bbox[2]) / 2
-                cy = (bbox[1] + bbox[3]) / 2
-                object_points.append((Point(cx, cy), {'det': det}))
-
-            # 3. Spatial Matching (Fast)
-            # Map Labels -> Rooms
-            mapped_labels = self.geo.match_points_to_polygons(room_label_points, room_polys)
-            
-            # Map Objects -> Rooms
-            mapped_objects = self.geo.match_points_to_polygons(object_points, room_polys)
+                text_type, _ = TextCleaner.classify_text(txt.text, vocabulary=self.vocabulary)
+                if text_type == TextType.ROOM_LABEL:
+                    label_entities.append(txt)
+
+            # B. Prepare Objects (Doors, etc.) -> bbox centers
+            points = np.empty((len(label_entities) + len(detections), 2), dtype=np.float64)
+            for i, txt in enumerate(label_entities):
+                points[i] = txt.center[:2]
+            if detections:
+                bboxes = np.asarray([det['bbox'] for det in detections], dtype=np.float64)
+                points[len(label_entities):, 0] = (bboxes[:, 0] + bboxes[:, 2]) / 2
+                points[len(label_entities):, 1] = (bboxes[:, 1] + bboxes[:, 3]) / 2
+
+            # 3. Spatial Matching (Bulk join, grouped per room in one pass)
+            container = self.geo.spatial_join(points, room_polys)
+            members_by_room = self.geo.group_by_container(container, len(room_polys))
+
+            # Areas (Vectorized)
+            areas_sqft = self.scale.calculate_areas_sqft(self.geo.polygon_areas(room_polys))
 
             # 4. Construct Output Structure
             rooms_data = []
-            
+            n_labels = len(label_entities)
+
             for idx, poly in enumerate(room_polys):
-                # Get Labels for this room index
-                labels = [d['entity'] for d in mapped_labels if d.get('container_index') == idx]
-                
+                members = members_by_room[idx]
+                labels = [label_entities[m] for m in members if m < n_labels]
+
                 # Pick best label (Highest confidence)
                 if labels:
                     best_label = max(labels, key=lambda x: x.confidence)
@@ -76,16 +88,13 @@ class FusionAssembler:
                     conf = 0.0
 
                 # Get Objects for this room index
-                objs = [d['det']['label'] for d in mapped_objects if d.get('container_index') == idx]
-
-                # Area
-                area_sqft = self.scale.calculate_area_sqft(poly.area)
+                objs = [detections[m - n_labels]['label'] for m in members if m >= n_labels]
 
                 rooms_data.append({
                     "id": f"room_{idx}",
                     "label": room_name,
                     "confidence": conf,
-                    "area_sqft": area_sqft,
+                    "area_sqft": areas_sqft[idx],
                     "objects": objs,
                     "polygon": list(poly.exterior.coords)
                 })
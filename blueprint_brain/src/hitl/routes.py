@@ -5,24 +5,31 @@ from sqlalchemy.orm import Session
 from blueprint_brain.src.db.session import get_db
 from blueprint_brain.src.db.models.job import Job
 from blueprint_brain.services.storage import StorageService
+from blueprint_brain.services.cache import ResultCache
 import json
+import time
 
 router = APIRouter(prefix="/admin", tags=["HITL"])
 storage = StorageService()
+result_cache = ResultCache()
+
+# meta_data["source"] of a job whose result document was replaced by hand.
+# Readers then serve result_s3_key instead of the per-page checkpoints.
+MANUAL_FIX_SOURCE = "human_correction"
 
 # In a real app, protect this with a specific "Admin" role or internal VPN check
 # For now, we reuse the API Key check but you'd likely want OAuth2/OIDC here.
 from blueprint_brain.api.dependencies import get_current_client
 
 @router.get("/jobs/failed")
-async def list_failed_jobs(limit: int = 50, db: Session = Depends(get_db)):
+def list_failed_jobs(limit: int = 50, db: Session = Depends(get_db)):
     """List recent failed jobs for review."""
     jobs = db.query(Job).filter(Job.status == "FAILED")\
         .order_by(Job.created_at.desc()).limit(limit).all()
     return jobs
 
 @router.get("/jobs/{job_id}/debug")
-async def get_job_debug_data(job_id: str, db: Session = Depends(get_db)):
+def get_job_debug_data(job_id: str, db: Session = Depends(get_db)):
     """Get metadata and error logs for a job."""
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job: raise HTTPException(404)
@@ -33,7 +40,7 @@ async def get_job_debug_data(job_id: str, db: Session = Depends(get_db)):
     }
 
 @router.patch("/jobs/{job_id}/fix")
-async def fix_job_result(
+def fix_job_result(
     job_id: str, 
     corrected_data: Dict[str, Any] = Body(...),
     db: Session = Depends(get_db)
@@ -45,8 +52,9 @@ async def fix_job_result(
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job: raise HTTPException(404)
 
-    # 1. Overwrite result in S3
-    result_key = job.result_s3_key or f"results/{job_id}/manual_fix.json"
+    # 1. Upload as a new object: result objects are cached by key (API
+    #    ResultStore), so an existing key is never overwritten
+    result_key = f"results/{job_id}/manual_fix_{int(time.time())}.json"
     
     # Create temp file
     import tempfile
@@ -60,11 +68,16 @@ async def fix_job_result(
         import os
         os.remove(tmp_path)
 
-    # 2. Update DB
+    # 2. Later submissions of the same file must not get the uncorrected result
+    meta = dict(job.meta_data or {})
+    if meta.get("input_hash"):
+        result_cache.invalidate(meta["input_hash"])
+
+    # 3. Update DB
     job.status = "COMPLETED"
     job.result_s3_key = result_key
     job.error_message = None # Clear error
-    job.meta_data = {"source": "human_correction"} # Audit trail
+    job.meta_data = {**meta, "source": MANUAL_FIX_SOURCE} # Audit trail
     
     db.commit()
     
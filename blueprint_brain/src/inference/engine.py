@@ -2,7 +2,7 @@ import torch
 import numpy as np
 import logging
 import math
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from blueprint_brain.config.settings import settings
 from blueprint_brain.src.models.detector import BlueprintDetector
 from blueprint_brain.src.utils.postprocessing import PredictionMerger
@@ -27,22 +27,29 @@ class InferenceEngine:
         if self.detector is None:
             self.detector = BlueprintDetector(model_version=self.model_path)
 
-    def process_full_image(self, image: np.ndarray) -> Dict[str, Any]:
-        self._load_model()
-        h_img, w_img = image.shape[:2]
-        
-        # 1. Generate All Tile Coordinates
+    def tile_grid(self, image_shape: tuple, stride: int = None) -> List[Tuple[int, int, int, int]]:
+        """
+        All (x1, y1, x2, y2) tiles covering the page, last row/column snapped to the edge.
+        A side shorter than the tile gets one tile clamped at the origin (the detector
+        letterboxes undersized crops). stride overrides the configured one (coarser
+        grid when a job is short on time).
+        """
+        stride = stride or self.stride
+        h_img, w_img = image_shape[:2]
         tile_coords = []
-        for y in range(0, h_img, self.stride):
-            for x in range(0, w_img, self.stride):
+        for y in range(0, h_img, stride):
+            for x in range(0, w_img, stride):
                 x_end = min(x + self.tile_size, w_img)
                 y_end = min(y + self.tile_size, h_img)
-                x_start = x_end - self.tile_size
-                y_start = y_end - self.tile_size
-                if x_start >= 0 and y_start >= 0:
-                    tile_coords.append((x_start, y_start, x_end, y_end))
+                x_start = max(0, x_end - self.tile_size)
+                y_start = max(0, y_end - self.tile_size)
+                tile_coords.append((x_start, y_start, x_end, y_end))
+        # Snapped edge tiles repeat when a side is shorter than tile + stride
+        return list(dict.fromkeys(tile_coords))
 
-        # 2. Batch Inference Loop
+    def detect_tiles(self, image: np.ndarray, tile_coords: List[Tuple[int, int, int, int]]) -> Dict[str, np.ndarray]:
+        """Batched detection over the given tiles. Returns raw (pre-merge) page-coordinate detections."""
+        self._load_model()
         global_boxes, global_scores, global_classes = [], [], []
         
         total_batches = math.ceil(len(tile_coords) / self.batch_size)
@@ -81,5 +88,57 @@ class InferenceEngine:
                 global_scores.extend(scores)
                 global_classes.extend(classes)
 
-        # 3. WBF Merge
-        return self.merger.merge_detections(global_boxes, global_scores, global_classes)
\ No newline at end of file
+        return {
+            'boxes': np.array(global_boxes, dtype=np.float32).reshape(-1, 4),
+            'scores': np.array(global_scores, dtype=np.float32),
+            'classes': np.array(global_classes, dtype=np.int16)
+        }
+
+    def merge(self, raw: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """WBF merge of raw tile detections. The raw set is kept so it can be cached and re-merged later."""
+        merged = self.merger.merge_detections(list(raw['boxes']), list(raw['scores']), list(raw['classes']))
+        merged['raw'] = raw
+        return merged
+
+    def process_full_image(self, image: np.ndarray, stride: int = None) -> Dict[str, Any]:
+        return self.merge(self.detect_tiles(image, self.tile_grid(image.shape, stride)))
+
+    def process_changed_regions(self,
+                                image: np.ndarray,
+                                prior_raw: Dict[str, np.ndarray],
+                                regions: List[Tuple[int, int, int, int]],
+                                stride: int = None) -> Dict[str, Any]:
+        """
+        Incremental re-inference for a revised sheet. Only grid tiles that
+        overlap a changed region are re-run; prior raw detections (already in
+        this page's coordinates) are kept unless their centre lies in a re-run
+        tile, and the union is re-merged.
+        """
+        if not regions:
+            return self.merge(prior_raw)
+
+        grid = np.array(self.tile_grid(image.shape, stride)).reshape(-1, 4)
+        rects = np.array(regions).reshape(-1, 4)
+        # Tile/region overlap matrix (T, R)
+        overlaps = (
+            (grid[:, None, 0] < rects[None, :, 2]) & (grid[:, None, 2] > rects[None, :, 0]) &
+            (grid[:, None, 1] < rects[None, :, 3]) & (grid[:, None, 3] > rects[None, :, 1])
+        )
+        rerun = grid[overlaps.any(axis=1)]
+        logger.info(f"Incremental inference: re-running {len(rerun)}/{len(grid)} tiles.")
+
+        prior_boxes = np.asarray(prior_raw['boxes'], dtype=np.float32).reshape(-1, 4)
+        cx = (prior_boxes[:, 0] + prior_boxes[:, 2]) / 2
+        cy = (prior_boxes[:, 1] + prior_boxes[:, 3]) / 2
+        stale = (
+            (cx[:, None] >= rerun[None, :, 0]) & (cx[:, None] < rerun[None, :, 2]) &
+            (cy[:, None] >= rerun[None, :, 1]) & (cy[:, None] < rerun[None, :, 3])
+        ).any(axis=1)
+
+        fresh = self.detect_tiles(image, [tuple(map(int, t)) for t in rerun])
+        keep = ~stale
+        return self.merge({
+            'boxes': np.concatenate([prior_boxes[keep], fresh['boxes']]),
+            'scores': np.concatenate([np.asarray(prior_raw['scores'], dtype=np.float32)[keep], fresh['scores']]),
+            'classes': np.concatenate([np.asarray(prior_raw['classes'], dtype=np.int16)[keep], fresh['classes']])
+        })
@@ -0,0 +1,116 @@
+import re
+import json
+import hashlib
+import logging
+import numpy as np
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from blueprint_brain.config.settings import settings
+from blueprint_brain.src.logic.scale import ScaleEngine
+from blueprint_brain.src.ocr.cleaner import TextCleaner, TextType
+from blueprint_brain.src.utils.pdf_converter import PDFConverter
+
+logger = logging.getLogger(__name__)
+
+class DocumentContext(BaseModel):
+    """Drawing-set level facts, derived once per job and shared by every page's fusion."""
+    pixels_per_foot: Optional[float] = None
+    units: str = "unknown"            # imperial, metric, unknown
+    scale_note: Optional[str] = None  # The note the scale was derived from
+    source: str = "default"           # Where the scale came from: text_layer, ocr_title_block, default
+    dpi: int = 200
+    # Normalized label text seen in this set -> canonical room name
+    vocabulary: Dict[str, str] = Field(default_factory=dict)
+
+    @property
+    def scale_value(self) -> float:
+        return self.pixels_per_foot or settings.DEFAULT_PIXELS_PER_FOOT
+
+    def fusion_hash(self) -> str:
+        """Identifies everything in the context that changes fusion output."""
+        payload = json.dumps({"scale": self.scale_value, "vocabulary": self.vocabulary}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+class DocumentContextBuilder:
+    """
+    Derives DocumentContext from cheap signals: the PDF text layer, or OCR of
+    title-block crops when the set is scanned. Never touches the vision model.
+    """
+    MAX_LABEL_LEN = 25
+
+    @staticmethod
+    def from_texts(page_texts: List[str], dpi: int, source: str) -> DocumentContext:
+        scale_votes = Counter()
+        scale_notes = {}
+        chunks = set()
+
+        for text in page_texts:
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+
+                parsed = ScaleEngine.parse_scale_note(line, dpi)
+                if parsed:
+                    vote = (round(parsed[0], 2), parsed[1])
+                    scale_votes[vote] += 1
+                    scale_notes.setdefault(vote, line.strip())
+
+                # Layout mode keeps columns apart with runs of spaces
+                for chunk in re.split(r"\s{2,}", line):
+                    chunk = TextCleaner.normalize(chunk)
+                    if 2 < len(chunk) <= DocumentContextBuilder.MAX_LABEL_LEN:
+                        chunks.add(chunk)
+
+        # Classify each distinct label once for the whole set
+        vocabulary = {}
+        for chunk in chunks:
+            text_type, canonical = TextCleaner.classify_text(chunk)
+            if text_type == TextType.ROOM_LABEL and canonical in TextCleaner.ROOM_VOCAB:
+                vocabulary[chunk] = canonical
+
+        context = DocumentContext(dpi=dpi, vocabulary=vocabulary, source=source)
+        if scale_votes:
+            # Majority vote across sheets (detail callouts use other scales)
+            (px_per_ft, units), _ = scale_votes.most_common(1)[0]
+            context.pixels_per_foot = px_per_ft
+            context.units = units
+            context.scale_note = scale_notes[(px_per_ft, units)]
+        else:
+            context.source = "default"
+
+        return context
+
+    @staticmethod
+    def _title_block_texts(images: List[np.ndarray], ocr_engine) -> List[str]:
+        """OCR only the title-block corner of the first few sheets."""
+        texts = []
+        for img in images[:settings.CONTEXT_OCR_MAX_PAGES]:
+            h, w = img.shape[:2]
+            crop = img[int(h * 0.7):, int(w * 0.6):]
+            entities = ocr_engine.analyze_image(crop)
+            texts.append("\n".join(e.text for e in entities))
+        return texts
+
+    @staticmethod
+    def build(images: List[np.ndarray],
+              dpi: int,
+              pdf_path: Optional[Path] = None,
+              ocr_engine=None) -> DocumentContext:
+        page_texts = []
+        source = "text_layer"
+        if pdf_path is not None:
+            page_texts = PDFConverter.extract_text(pdf_path)
+
+        if not any(t.strip() for t in page_texts) and ocr_engine is not None:
+            page_texts = DocumentContextBuilder._title_block_texts(images, ocr_engine)
+            source = "ocr_title_block"
+
+        context = DocumentContextBuilder.from_texts(page_texts, dpi, source)
+        logger.info(
+            f"Document Context: scale={context.pixels_per_foot} px/ft ({context.units}, {context.source}), "
+            f"{len(context.vocabulary)} vocabulary entries."
+        )
+        return context
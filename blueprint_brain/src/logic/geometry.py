@@ -1,8 +1,10 @@
 import cv2
 import numpy as np
 import logging
+import shapely
 from typing import List, Tuple, Optional
 from shapely.geometry import Polygon, Point
+from shapely.strtree import STRtree
 from shapely.validation import make_valid
 
 from blueprint_brain.src.core.exceptions import GeometryError
@@ -15,9 +17,12 @@ class GeometryUtils:
     """
 
     @staticmethod
-    def mask_to_polygons(binary_mask: np.ndarray, min_area: int = 500) -> List[Polygon]:
+    def mask_to_polygons(binary_mask: np.ndarray, min_area: int = 500, scale: float = 1.0) -> List[Polygon]:
         """
         Robustly converts binary masks to validated Shapely polygons.
+        scale: Factor applied to contour coordinates, so a mask computed at
+               reduced resolution yields polygons in page coordinates.
+               min_area is always in output (page) pixels.
         """
         try:
             # Find Contours
@@ -25,7 +30,7 @@ class GeometryUtils:
             
             polygons = []
             for cnt in contours:
-                if cv2.contourArea(cnt) < min_area:
+                if cv2.contourArea(cnt) * scale * scale < min_area:
                     continue
                     
                 # Simplify (RDP algorithm)
@@ -34,7 +39,7 @@ class GeometryUtils:
                 
                 if len(approx) < 3: continue
 
-                points = approx.reshape(-1, 2)
+                points = approx.reshape(-1, 2) * scale
                 poly = Polygon(points)
 
                 # Defensive Geometry: Fix bowties/self-intersections
@@ -50,33 +55,63 @@ class GeometryUtils:
         except Exception as e:
             raise GeometryError(f"Mask to Polygon conversion failed: {e}")
 
+    @staticmethod
+    def spatial_join(points: np.ndarray, polygons: List[Polygon]) -> np.ndarray:
+        """
+        Bulk point-in-polygon join against a single STRtree.
+        points: (M, 2) array of [x, y].
+        Returns: (M,) int array with the containing polygon index, -1 if none.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        container = np.full(len(points), -1, dtype=np.int64)
+        if not polygons or len(points) == 0:
+            return container
+
+        # One tree, one array query. Pairs are (point_idx, polygon_idx).
+        tree = STRtree(polygons)
+        pt_idx, poly_idx = tree.query(shapely.points(points), predicate="within")
+        if len(pt_idx) == 0:
+            return container
+
+        # Overlapping polygons: lowest polygon index wins (deterministic)
+        order = np.lexsort((poly_idx, pt_idx))
+        hit_pts, first = np.unique(pt_idx[order], return_index=True)
+        container[hit_pts] = poly_idx[order][first]
+        return container
+
+    @staticmethod
+    def group_by_container(container: np.ndarray, n_polygons: int) -> List[np.ndarray]:
+        """
+        Groups point indices by polygon in a single pass.
+        Returns: list of length n_polygons, each an array of point indices.
+        """
+        container = np.asarray(container, dtype=np.int64)
+        matched = np.flatnonzero(container >= 0)
+        order = matched[np.argsort(container[matched], kind="stable")]
+        counts = np.bincount(container[matched], minlength=n_polygons)
+        return np.split(order, np.cumsum(counts)[:-1])
+
+    @staticmethod
+    def polygon_areas(polygons: List[Polygon]) -> np.ndarray:
+        """Vectorized pixel areas for a list of polygons."""
+        if not polygons:
+            return np.zeros(0, dtype=np.float64)
+        return shapely.area(np.asarray(polygons, dtype=object))
+
     @staticmethod
     def match_points_to_polygons(points_with_data: List[Tuple[Point, dict]], 
                                  polygons: List[Polygon]) -> List[dict]:
         """
         Uses Spatial Index (STRtree) to map M points to N polygons efficiently.
-        Returns: List of dicts where data is enriched with 'polygon_index'.
+        Returns: List of dicts where data is enriched with 'container_index'.
         """
-        from shapely.strtree import STRtree
-        
         if not polygons or not points_with_data:
-            return points_with_data
+            return [d for _, d in points_with_data]
 
-        # Build Tree
-        tree = STRtree(polygons)
-        
-        for pt, data in points_with_data:
-            # Query tree for candidate polygons (bounding box intersection)
-            query_geom = pt
-            candidate_indices = tree.query(query_geom)
-            
-            # Precise check
-            found_idx = None
-            for idx in candidate_indices:
-                if polygons[idx].contains(pt):
-                    found_idx = int(idx)
-                    break
-            
-            data['container_index'] = found_idx
-            
-        return [d for _, d in points_with_data]
\ No newline at end of file
+        coords = np.array([(pt.x, pt.y) for pt, _ in points_with_data], dtype=np.float64)
+        container = GeometryUtils.spatial_join(coords, polygons)
+
+        for (_, data), idx in zip(points_with_data, container):
+            data['container_index'] = int(idx) if idx >= 0 else None
+
+        return [d for _, d in points_with_data]
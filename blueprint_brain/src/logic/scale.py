@@ -1,11 +1,17 @@
 import re
 import logging
-from typing import Optional
+import numpy as np
+from typing import List, Optional, Tuple
 
 from blueprint_brain.src.core.exceptions import ScaleCalibrationError
 
 logger = logging.getLogger(__name__)
 
+# 1/4" = 1'-0"  |  1" = 20'  |  3/16"=1'  |  1 1/2" = 1'-0"
+_IMPERIAL_SCALE = re.compile(r"(?:(\d+)\s+)?(\d+(?:\s*/\s*\d+)?)\s*(?:\"|''|IN)\s*=\s*(\d+(?:\.\d+)?)\s*(?:'|FT)")
+# 1:100  |  SCALE 1 : 50
+_METRIC_SCALE = re.compile(r"\b1\s*:\s*(\d{1,4})\b")
+
 class ScaleEngine:
     """
     Manages pixel-to-foot conversions with sanity checks.
@@ -22,6 +28,38 @@ class ScaleEngine:
         self.pixels_per_foot = pixels_per_foot
         logger.info(f"Scale calibrated: {self.pixels_per_foot:.2f} px/ft")
 
+    @staticmethod
+    def parse_scale_note(text: str, dpi: int) -> Optional[Tuple[float, str]]:
+        """
+        Converts a drawing scale note into pixels per (real) foot at the given raster DPI.
+        Returns (pixels_per_foot, units) or None if the text holds no scale.
+        """
+        clean = text.upper().replace("’", "'").replace("”", '"')
+
+        match = _IMPERIAL_SCALE.search(clean)
+        if match:
+            whole, num = match.group(1), match.group(2).replace(" ", "")
+            if "/" in num:
+                top, bottom = num.split("/")
+                paper_inches = float(top) / float(bottom) if float(bottom) else 0.0
+                # Mixed fraction: 1 1/2"
+                paper_inches += float(whole or 0)
+            else:
+                paper_inches = float(num)
+            real_feet = float(match.group(3))
+            if paper_inches > 0 and real_feet > 0:
+                return dpi * paper_inches / real_feet, "imperial"
+
+        # Bare ratios (times, references) are common, so require the word SCALE
+        match = _METRIC_SCALE.search(clean) if "SCALE" in clean else None
+        if match:
+            ratio = float(match.group(1))
+            if ratio > 0:
+                # 1 real foot = 12 real inches = 12/ratio inches on paper
+                return dpi * 12.0 / ratio, "metric"
+
+        return None
+
     def calculate_area_sqft(self, pixel_area: float) -> Optional[float]:
         if not self.pixels_per_foot:
             return None
@@ -32,4 +70,20 @@ class ScaleEngine:
         if sqft > self.max_sanity_sqft:
             logger.warning(f"Calculated area {sqft:.2f} sqft exceeds sanity limit. Scale might be wrong.")
         
-        return round(sqft, 2)
\ No newline at end of file
+        return round(sqft, 2)
+
+    def calculate_areas_sqft(self, pixel_areas: np.ndarray) -> List[Optional[float]]:
+        """
+        Vectorized variant of calculate_area_sqft for all rooms of a page.
+        """
+        pixel_areas = np.asarray(pixel_areas, dtype=np.float64)
+        if not self.pixels_per_foot:
+            return [None] * len(pixel_areas)
+
+        sqft = np.round(pixel_areas / (self.pixels_per_foot ** 2), 2)
+
+        over_limit = int(np.count_nonzero(sqft > self.max_sanity_sqft))
+        if over_limit:
+            logger.warning(f"{over_limit} room areas exceed sanity limit. Scale might be wrong.")
+
+        return sqft.tolist()
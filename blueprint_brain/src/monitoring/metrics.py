@@ -1,4 +1,6 @@
+from typing import Any, Callable, Dict
 from prometheus_client import Counter, Histogram, Gauge
+from prometheus_client.core import GaugeMetricFamily
 
 # 1. Throughput Metrics
 HTTP_REQUESTS_TOTAL = Counter(
@@ -15,6 +17,14 @@ INFERENCE_DURATION = Histogram(
     ["model_type"] # 'vision', 'ocr', 'fusion'
 )
 
+# API key verification (source: local / redis cache hit, miss = DB + bcrypt)
+API_KEY_VERIFY_SECONDS = Histogram(
+    "blueprint_api_key_verify_seconds",
+    "Time spent verifying API keys",
+    ["source"],
+    buckets=[0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1]
+)
+
 # 3. Business Metrics
 JOBS_PROCESSED = Counter(
     "blueprint_jobs_processed_total",
@@ -31,4 +41,39 @@ ROOMS_DETECTED = Counter(
 GPU_MEMORY_USAGE = Gauge(
     "blueprint_gpu_memory_usage_mb",
     "Current GPU memory usage"
-)
\ No newline at end of file
+)
+
+class QueuedWorkCollector:
+    """
+    Queued accelerator work in tile-seconds (AdmissionController.snapshot),
+    read from Redis at scrape time, so every API replica reports the same
+    fleet-wide value. KEDA scales the GPU workers on
+    blueprint_queued_work_seconds.
+    """
+
+    def __init__(self, snapshot: Callable[[], Dict[str, Any]]):
+        self.snapshot = snapshot
+
+    @staticmethod
+    def _families():
+        return (
+            GaugeMetricFamily("blueprint_queued_work_seconds", "Queued accelerator work (tile-seconds)", labels=["queue"]),
+            GaugeMetricFamily("blueprint_tenant_queued_work_seconds", "Queued accelerator work per tenant (tile-seconds)", labels=["tenant"]),
+            GaugeMetricFamily("blueprint_work_drain_rate", "Accelerator work finished per second (tile-seconds / s)")
+        )
+
+    def describe(self):
+        return self._families()
+
+    def collect(self):
+        try:
+            snap = self.snapshot()
+        except Exception:
+            return []  # Redis unreachable: no sample rather than a failed scrape
+        queues, tenants, drain = self._families()
+        for queue, seconds in snap["queues"].items():
+            queues.add_metric([queue], seconds)
+        for tenant, seconds in snap["tenants"].items():
+            tenants.add_metric([tenant], seconds)
+        drain.add_metric([], snap["drain_rate"])
+        return [queues, tenants, drain]
@@ -1,5 +1,5 @@
 import re
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 from enum import Enum
 from rapidfuzz import process, fuzz
 
@@ -28,12 +28,36 @@ class TextCleaner:
         "BALCONY": ["BALCONY", "TERRACE", "PATIO", "DECK"]
     }
 
+    _CHOICES: Dict[str, str] = None
+
     @staticmethod
-    def classify_text(text: str) -> Tuple[TextType, Optional[str]]:
+    def normalize(text: str) -> str:
+        return text.upper().strip().replace(".", "")
+
+    @classmethod
+    def _choices(cls) -> Dict[str, str]:
+        """Flattened vocab (variant -> canonical), built once per process."""
+        if cls._CHOICES is None:
+            choices = {}
+            for canonical, variants in cls.ROOM_VOCAB.items():
+                choices[canonical] = canonical
+                for v in variants:
+                    choices[v] = canonical
+            cls._CHOICES = choices
+        return cls._CHOICES
+
+    @staticmethod
+    def classify_text(text: str, vocabulary: Optional[Dict[str, str]] = None) -> Tuple[TextType, Optional[str]]:
         """
         Returns (Type, Canonical_Name)
+        vocabulary: Optional document-level lookup (normalized text -> canonical),
+                    checked before fuzzy matching. See DocumentContext.
         """
-        clean_text = text.upper().strip().replace(".", "")
+        clean_text = TextCleaner.normalize(text)
+
+        # 0. Document vocabulary (exact hit, no fuzzy search)
+        if vocabulary and clean_text in vocabulary:
+            return TextType.ROOM_LABEL, vocabulary[clean_text]
         
         # 1. Scale Markers (High Priority)
         # Matches: "Scale 1:100", "1/4\" = 1'"
@@ -46,12 +70,7 @@ class TextCleaner:
             return TextType.DIMENSION, clean_text
 
         # 3. Fuzzy Room Matching
-        # Flatten the vocab for search
-        choices = {}
-        for canonical, variants in TextCleaner.ROOM_VOCAB.items():
-            choices[canonical] = canonical
-            for v in variants:
-                choices[v] = canonical
+        choices = TextCleaner._choices()
         
         # Extract best match
         # score_cutoff=85 means "85% similar"
@@ -33,6 +33,13 @@ class OCREngine:
             cls._instance = super(OCREngine, cls).__new__(cls)
         return cls._instance
 
+    @classmethod
+    def dedicated(cls) -> "OCREngine":
+        """A private instance with its own model, for callers that run OCR concurrently."""
+        engine = super(OCREngine, cls).__new__(cls)
+        engine._model = None
+        return engine
+
     def _get_model(self):
         """Lazy loader for the heavy OCR model"""
         if self._model is None:
@@ -49,9 +56,10 @@ class OCREngine:
                 raise OCRAnalysisError(f"Failed to initialize PaddleOCR: {e}")
         return self._model
 
-    def analyze_image(self, image: np.ndarray) -> List[TextEntity]:
+    def analyze_image(self, image: np.ndarray, angle_cls: bool = True) -> List[TextEntity]:
         """
         Extracts text with high-performance error handling.
+        angle_cls=False skips orientation classification (faster, misses rotated text).
         """
         if image is None or image.size == 0:
             logger.warning("OCR received empty image.")
@@ -61,7 +69,7 @@ class OCREngine:
         
         try:
             # cls=True enables orientation classification (0, 90, 180, 270)
-            result = model.ocr(image, cls=True)
+            result = model.ocr(image, cls=angle_cls)
             
             entities = []
             # PaddleOCR returns None if no text found
@@ -96,4 +104,17 @@ class OCREngine:
 
         except Exception as e:
             logger.error(f"OCR Inference Failed: {e}")
-            raise OCRAnalysisError(f"OCR processing crashed: {e}")
\ No newline at end of file
+            raise OCRAnalysisError(f"OCR processing crashed: {e}")
+
+    def analyze_regions(self, image: np.ndarray, regions: List[List[int]], angle_cls: bool = True) -> List[TextEntity]:
+        """
+        OCR restricted to (x1, y1, x2, y2) regions of a page (e.g. the changed
+        areas of a revised sheet). Entities are returned in page coordinates.
+        """
+        entities = []
+        for x1, y1, x2, y2 in regions:
+            for ent in self.analyze_image(image[y1:y2, x1:x2], angle_cls=angle_cls):
+                ent.bbox = [ent.bbox[0] + x1, ent.bbox[1] + y1, ent.bbox[2] + x1, ent.bbox[3] + y1]
+                ent.center = [ent.center[0] + x1, ent.center[1] + y1]
+                entities.append(ent)
+        return entities
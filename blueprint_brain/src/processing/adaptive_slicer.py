@@ -10,7 +10,23 @@ class AdaptiveSlicer:
     Optimizes inference by only generating tiles for areas with content.
     Uses contour detection and entropy filtering to skip empty whitespace.
     """
-    
+    THUMB_SCALE = 0.1
+
+    @staticmethod
+    def make_thumbnail(image: np.ndarray, scale: float = THUMB_SCALE) -> np.ndarray:
+        """
+        Grayscale page thumbnail (1/10th size by default). Shared by the content
+        mask below and the near-duplicate page index (perceptual hash, alignment).
+        Returns None if the image is too small to shrink.
+        """
+        h_img, w_img = image.shape[:2]
+        small_h, small_w = int(h_img * scale), int(w_img * scale)
+        if small_h == 0 or small_w == 0:
+            return None
+
+        small_img = cv2.resize(image, (small_w, small_h))
+        return cv2.cvtColor(small_img, cv2.COLOR_BGR2GRAY) if small_img.ndim == 3 else small_img
+
     @staticmethod
     def get_roi_tiles(image: np.ndarray, 
                       tile_size: int = 640, 
@@ -23,12 +39,9 @@ class AdaptiveSlicer:
         
         # 1. Create a "Content Mask" (Downscaled for speed)
         # We shrink image to 1/10th size to quickly find ink density
-        scale = 0.1
-        small_h, small_w = int(h_img * scale), int(w_img * scale)
-        if small_h == 0 or small_w == 0: return [] # Too small
-
-        small_img = cv2.resize(image, (small_w, small_h))
-        gray = cv2.cvtColor(small_img, cv2.COLOR_BGR2GRAY)
+        scale = AdaptiveSlicer.THUMB_SCALE
+        gray = AdaptiveSlicer.make_thumbnail(image, scale)
+        if gray is None: return [] # Too small
         
         # Invert: Ink (black) becomes bright, paper (white) becomes dark
         # Adaptive threshold handles varying lighting/scan quality
@@ -0,0 +1,181 @@
+import cv2
+import numpy as np
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from blueprint_brain.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class PerceptualHash:
+    """
+    64-bit DCT perceptual hash of a page thumbnail. Survives rescans, DPI
+    changes and small edits (revision stamps), unlike a byte hash.
+    """
+    BITS = 64
+    BANDS = 4  # 16-bit bands for multi-index lookup (a hash within BANDS-1 bit flips shares a band)
+
+    @staticmethod
+    def compute(thumb: np.ndarray) -> int:
+        # Thicken ink first: thin line work otherwise shifts between bits on resampling
+        ink = cv2.dilate(255 - thumb, np.ones((3, 3), np.uint8))
+        small = cv2.resize(ink, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+        low = cv2.dct(small)[:8, :8].ravel()
+        # Median of the AC terms; DC only carries overall brightness
+        bits = low > np.median(low[1:])
+        return int(np.packbits(bits).view('>u8')[0])
+
+    @staticmethod
+    def hamming(a: int, b: int) -> int:
+        return bin(a ^ b).count("1")
+
+    @staticmethod
+    def bands(value: int) -> List[int]:
+        width = PerceptualHash.BITS // PerceptualHash.BANDS
+        mask = (1 << width) - 1
+        return [(value >> (i * width)) & mask for i in range(PerceptualHash.BANDS)]
+
+@dataclass
+class Alignment:
+    """Maps page coordinates of a stored page onto the current page: p' = p * scale + (dx, dy)."""
+    scale: float
+    dx: float
+    dy: float
+    response: float
+    changed_ratio: float
+    # Changed ink in current-page proportions, at ink-map (or thumbnail) resolution (255 = differs)
+    change_mask: Optional[np.ndarray] = None
+    MERGE_PX = 48  # Changes closer than this (page px) form one region
+
+
+    def apply(self, coords: np.ndarray) -> np.ndarray:
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        return coords * self.scale + np.array([self.dx, self.dy])
+
+    def changed_regions(self, page_shape: Tuple[int, int], pad: int = 32) -> List[Tuple[int, int, int, int]]:
+        """Bounding boxes of changed areas in current-page coordinates (padded, clipped)."""
+        if self.change_mask is None or not self.change_mask.any():
+            return []
+        page_h, page_w = page_shape[:2]
+        th, tw = self.change_mask.shape[:2]
+        page_per_thumb = page_w / tw
+
+        # Merge nearby specks (e.g. the characters of one note) into one region
+        k = max(3, int(round(self.MERGE_PX / page_per_thumb)) | 1)
+        blobs = cv2.dilate(self.change_mask, np.ones((k, k), np.uint8))
+        n, _, stats, _ = cv2.connectedComponentsWithStats(blobs, connectivity=8)
+        regions = []
+        for x, y, w, h, _ in stats[1:]:
+            regions.append((
+                max(0, int(x * page_per_thumb) - pad),
+                max(0, int(y * page_per_thumb) - pad),
+                min(page_w, int((x + w) * page_per_thumb) + pad),
+                min(page_h, int((y + h) * page_per_thumb) + pad),
+            ))
+        return regions
+
+    def is_near_duplicate(self, page_shape: Tuple[int, int]) -> bool:
+        """
+        Same sheet (rescan / other DPI): little ink differs and no change is
+        bigger than scan noise. A thin new wall or a short note stays under the
+        ratio on a large sheet, but not under NEAR_DUP_MAX_CHANGE_PX.
+        """
+        if self.changed_ratio > settings.NEAR_DUP_MAX_CHANGED_RATIO:
+            return False
+        return all(
+            max(x2 - x1, y2 - y1) <= settings.NEAR_DUP_MAX_CHANGE_PX
+            for x1, y1, x2, y2 in self.changed_regions(page_shape, pad=0)
+        )
+
+class PageAligner:
+    """
+    Checks that a near-duplicate candidate really is the same sheet: aligns the
+    two thumbnails (scale from page sizes, translation from phase correlation)
+    and measures how much ink differs once aligned. The difference is taken on
+    ink maps when both pages have one: a 1-2 px line is a faint grey smear in a
+    1/10 thumbnail, below the Otsu threshold whenever heavier ink is around.
+    """
+    INK_SCALE = 0.25
+
+    @staticmethod
+    def _ink(thumb: np.ndarray) -> np.ndarray:
+        _, ink = cv2.threshold(thumb, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        return ink
+
+    @staticmethod
+    def ink_map(image: np.ndarray, scale: float = INK_SCALE) -> Optional[np.ndarray]:
+        """
+        Binary ink of the full page, downscaled so that any inked source pixel
+        marks its cell (thin lines survive). None if the image is too small.
+        """
+        h_img, w_img = image.shape[:2]
+        small_h, small_w = int(h_img * scale), int(w_img * scale)
+        if small_h == 0 or small_w == 0:
+            return None
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        small = cv2.resize(PageAligner._ink(gray), (small_w, small_h), interpolation=cv2.INTER_AREA)
+        return np.where(small > 0, 255, 0).astype(np.uint8)
+
+    @staticmethod
+    def _change_mask(prev_ink: np.ndarray, cur_ink: np.ndarray, sx: float, sy: float) -> np.ndarray:
+        """Ink present in one page but not near any ink of the other (1px slack for resampling)."""
+        h, w = cur_ink.shape[:2]
+        prev_resized = cv2.resize(prev_ink, (w, h), interpolation=cv2.INTER_AREA)
+        shifted = cv2.warpAffine(
+            prev_resized, np.float32([[1, 0, sx], [0, 1, sy]]), (w, h),
+            flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0
+        )
+        kernel = np.ones((3, 3), np.uint8)
+        ink_prev = np.where(shifted >= 128, 255, 0).astype(np.uint8)
+        near_prev = cv2.dilate(np.where(shifted > 0, 255, 0).astype(np.uint8), kernel)
+        added = cv2.bitwise_and(cur_ink, cv2.bitwise_not(near_prev))
+        removed = cv2.bitwise_and(ink_prev, cv2.bitwise_not(cv2.dilate(cur_ink, kernel)))
+        return cv2.bitwise_or(added, removed)
+
+    @staticmethod
+    def align(prev_thumb: np.ndarray,
+              prev_shape: Tuple[int, int],
+              cur_thumb: np.ndarray,
+              cur_shape: Tuple[int, int],
+              prev_ink: np.ndarray = None,
+              cur_ink: np.ndarray = None) -> Optional[Alignment]:
+        """
+        prev_shape / cur_shape are the (h, w) of the full pages the thumbnails
+        came from; prev_ink / cur_ink their ink maps (optional). Returns None if
+        the pages cannot be aligned.
+        """
+        prev_h, prev_w = prev_shape[:2]
+        cur_h, cur_w = cur_shape[:2]
+        if abs(prev_w / prev_h - cur_w / cur_h) > settings.NEAR_DUP_ASPECT_TOLERANCE * (cur_w / cur_h):
+            return None
+
+        # Bring the stored thumbnail into the current thumbnail's frame
+        th, tw = cur_thumb.shape[:2]
+        prev_resized = cv2.resize(prev_thumb, (tw, th), interpolation=cv2.INTER_AREA)
+
+        window = cv2.createHanningWindow((tw, th), cv2.CV_32F)
+        (sx, sy), response = cv2.phaseCorrelate(
+            255.0 - prev_resized.astype(np.float32), 255.0 - cur_thumb.astype(np.float32), window
+        )
+        if response < settings.NEAR_DUP_MIN_RESPONSE:
+            return None
+
+        if prev_ink is not None and cur_ink is not None:
+            # Thumbnails only provide the transform; the diff runs on the ink maps
+            ink_per_thumb = cur_ink.shape[1] / tw
+            change_mask = PageAligner._change_mask(prev_ink, cur_ink, sx * ink_per_thumb, sy * ink_per_thumb)
+        else:
+            change_mask = PageAligner._change_mask(
+                PageAligner._ink(prev_resized), PageAligner._ink(cur_thumb), sx, sy
+            )
+
+        page_per_thumb = cur_w / tw
+        return Alignment(
+            scale=cur_w / prev_w,
+            dx=sx * page_per_thumb,
+            dy=sy * page_per_thumb,
+            response=float(response),
+            changed_ratio=float(np.count_nonzero(change_mask)) / change_mask.size,
+            change_mask=change_mask
+        )
@@ -1,4 +1,6 @@
+import math
 import time
+import threading
 import redis
 from fastapi import HTTPException
 from blueprint_brain.config.settings import settings
@@ -8,27 +10,70 @@ r_conn = redis.from_url(settings.REDIS_URL)
 
 class RateLimiter:
     """
-    Sliding Window Rate Limiter using Redis.
+    Token-bucket Rate Limiter using Redis.
+
+    - One bucket per API key (rate_limit:{key_id}): refills at
+      limit_per_minute / 60 tokens per second up to 'burst' tokens. Refill and
+      take happen in one atomic script (one round-trip), using Redis' clock.
+    - Local allowance: each API process takes a small batch of tokens at a
+      time and spends it in memory, so most requests never touch Redis.
+      Unspent tokens expire after RATE_LIMIT_LEASE_SECONDS, so a quota is
+      never exceeded, only briefly under-used.
+    """
+
+    _TAKE = """
+    local rate, burst, want = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local t = redis.call('time')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local bucket = redis.call('hmget', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local granted = math.min(want, math.floor(tokens))
+    tokens = tokens - granted
+    redis.call('hset', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('expire', KEYS[1], math.ceil(burst / rate) + 1)
+    return {granted, tostring((1 - tokens) / rate)}
     """
-    
+    _take = r_conn.register_script(_TAKE)
+
+    # key_id -> [tokens left, lease expiry]
+    _local = {}
+    _lock = threading.Lock()
+
     @staticmethod
-    def check_limit(key_id: str, limit_per_minute: int):
+    def _spend_local(key_id: str) -> bool:
+        with RateLimiter._lock:
+            allowance = RateLimiter._local.get(key_id)
+            if allowance and allowance[0] > 0 and allowance[1] > time.monotonic():
+                allowance[0] -= 1
+                return True
+        return False
+
+    @staticmethod
+    def check_limit(key_id: str, limit_per_minute: int, burst: int = None):
         """
         Raises HTTPException if limit exceeded.
+        burst: bucket size (defaults to one minute's worth of requests).
         """
-        current_minute = int(time.time() // 60)
-        redis_key = f"rate_limit:{key_id}:{current_minute}"
-        
-        # Atomic Increment
-        pipe = r_conn.pipeline()
-        pipe.incr(redis_key)
-        pipe.expire(redis_key, 90) # TTL 90s just to be safe
-        result, _ = pipe.execute()
-        
-        request_count = result
-        
-        if request_count > limit_per_minute:
+        if RateLimiter._spend_local(key_id):
+            return
+
+        rate = max(limit_per_minute, 1) / 60.0
+        burst = burst or max(limit_per_minute, 1)
+        # Small keys get no batching, so one process cannot sit on their quota
+        batch = max(1, min(settings.RATE_LIMIT_LOCAL_BATCH, int(rate * settings.RATE_LIMIT_LEASE_SECONDS)))
+
+        granted, retry_after = RateLimiter._take(keys=[f"rate_limit:{key_id}"], args=[rate, burst, batch])
+        granted = int(granted)
+        if granted == 0:
             raise HTTPException(
-                status_code=429, 
-                detail=f"Rate limit exceeded. Quota: {limit_per_minute} req/min."
-            )
\ No newline at end of file
+                status_code=429,
+                detail=f"Rate limit exceeded. Quota: {limit_per_minute} req/min.",
+                headers={"Retry-After": str(max(1, math.ceil(float(retry_after))))}
+            )
+
+        if granted > 1:
+            # One token is this request; the rest serve the next ones locally
+            with RateLimiter._lock:
+                RateLimiter._local[key_id] = [granted - 1, time.monotonic() + settings.RATE_LIMIT_LEASE_SECONDS]
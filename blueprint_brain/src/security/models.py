@@ -23,6 +23,8 @@ class ApiKey(Base):
     
     # Rate Limiting Policies
     rate_limit_per_minute = Column(Integer, default=50) # Requests per minute
+    rate_limit_burst = Column(Integer, nullable=True) # Token bucket size (None = one minute's worth)
+    scheduling_weight = Column(Integer, default=1) # Share of worker capacity relative to other clients
     
     # Usage Tracking (Optional, for billing)
     last_used_at = Column(DateTime, nullable=True)
\ No newline at end of file
@@ -1,15 +1,133 @@
+import hmac
+import json
+import time
 import hashlib
 import secrets
+import logging
+import threading
+import redis
+from typing import Dict, Optional, Tuple
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
+from blueprint_brain.config.settings import settings
 from blueprint_brain.src.security.models import ApiKey
+from blueprint_brain.src.monitoring.metrics import API_KEY_VERIFY_SECONDS
 
+logger = logging.getLogger(__name__)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class ApiKeyCache:
+    """
+    Verified API keys, so bcrypt runs once per key per TTL instead of on
+    every request. Keyed by HMAC-SHA256(API_SECRET_KEY, raw key): the raw
+    key is never stored, and the digest is useless without the secret.
+
+    - in process: API_KEY_LOCAL_CACHE_SECONDS (bounds how long a revoked key
+      keeps working on other API processes)
+    - in Redis:   API_KEY_CACHE_SECONDS, shared by all API processes
+      (apikey:{digest}, with apikey_digests:{key_id} for invalidation)
+    Only successful verifications are cached. Revocation leaves a marker
+    (apikey_revoked:{key_id}) for API_KEY_CACHE_SECONDS: a verification that
+    read the row just before the revocation cannot re-cache the key, and
+    cached entries of a marked key are ignored.
+    """
+    # Cache only if the key was not revoked meanwhile (checked atomically)
+    _PUT = """
+    if redis.call('exists', KEYS[3]) == 1 then return 0 end
+    redis.call('setex', KEYS[1], ARGV[2], ARGV[1])
+    redis.call('sadd', KEYS[2], ARGV[3])
+    redis.call('expire', KEYS[2], ARGV[2])
+    return 1
+    """
+    _GET = """
+    local raw = redis.call('get', KEYS[1])
+    if raw and redis.call('exists', ARGV[1] .. cjson.decode(raw)['id']) == 1 then return false end
+    return raw
+    """
+    REVOKED_PREFIX = "apikey_revoked:"
+    FIELDS = (
+        "id", "client_name", "key_prefix", "is_active",
+        "rate_limit_per_minute", "rate_limit_burst", "scheduling_weight"
+    )
+
+    def __init__(self, client: redis.Redis = None):
+        self.r = client or redis.from_url(settings.REDIS_URL)
+        self._local: Dict[str, Tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+        self._put = self.r.register_script(self._PUT)
+        self._get = self.r.register_script(self._GET)
+
+    @staticmethod
+    def digest(raw_key: str) -> str:
+        return hmac.new(settings.API_SECRET_KEY.encode(), raw_key.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _to_key(fields: dict) -> ApiKey:
+        # Transient (session-less) snapshot; enough for authorization and limits
+        return ApiKey(**fields)
+
+    def get(self, digest: str) -> Tuple[Optional[ApiKey], str]:
+        """(key, where it was found: local | redis | miss)."""
+        now = time.time()
+        with self._lock:
+            hit = self._local.get(digest)
+        if hit and hit[0] > now:
+            return self._to_key(hit[1]), "local"
+        try:
+            raw = self._get(keys=[f"apikey:{digest}"], args=[self.REVOKED_PREFIX])
+        except redis.RedisError as e:
+            logger.warning(f"API key cache unavailable: {e}")
+            raw = None
+        if raw:
+            fields = json.loads(raw)
+            self._put_local(digest, fields)
+            return self._to_key(fields), "redis"
+        return None, "miss"
+
+    def _put_local(self, digest: str, fields: dict):
+        with self._lock:
+            if len(self._local) >= settings.API_KEY_LOCAL_CACHE_ENTRIES:
+                now = time.time()
+                self._local = {d: v for d, v in self._local.items() if v[0] > now}
+                if len(self._local) >= settings.API_KEY_LOCAL_CACHE_ENTRIES:
+                    self._local.clear()
+            self._local[digest] = (time.time() + settings.API_KEY_LOCAL_CACHE_SECONDS, fields)
+
+    def put(self, digest: str, key: ApiKey):
+        fields = {name: getattr(key, name) for name in self.FIELDS}
+        try:
+            stored = self._put(
+                keys=[f"apikey:{digest}", f"apikey_digests:{key.id}", f"{self.REVOKED_PREFIX}{key.id}"],
+                args=[json.dumps(fields), settings.API_KEY_CACHE_SECONDS, digest]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"API key cache unavailable: {e}")
+            stored = True  # Local entry only, bounded by API_KEY_LOCAL_CACHE_SECONDS
+        if stored:
+            self._put_local(digest, fields)
+
+    def invalidate(self, key_id: str, revoked: bool = False):
+        """
+        Drops every cached verification of a key (revocation, limit changes).
+        revoked: also blocks re-caching it from verifications still in flight.
+        """
+        if revoked:
+            self.r.setex(f"{self.REVOKED_PREFIX}{key_id}", settings.API_KEY_CACHE_SECONDS, 1)
+        with self._lock:
+            self._local = {d: v for d, v in self._local.items() if v[1]["id"] != key_id}
+        digests = self.r.smembers(f"apikey_digests:{key_id}")
+        pipe = self.r.pipeline()
+        for digest in digests:
+            pipe.delete(f"apikey:{digest.decode()}")
+        pipe.delete(f"apikey_digests:{key_id}")
+        pipe.execute()
+
+key_cache = ApiKeyCache()
+
 class SecurityService:
     
     @staticmethod
-    def create_api_key(db: Session, client_name: str, limit: int = 50) -> str:
+    def create_api_key(db: Session, client_name: str, limit: int = 50, burst: int = None) -> str:
         """
         Generates a new API Key, hashes it, and saves to DB.
         Returns: The raw API Key (Show this once to user!)
@@ -27,7 +145,8 @@ class SecurityService:
             client_name=client_name,
             key_prefix=raw_key[:12], # Store "bp_live_abcd"
             key_hash=key_hash,
-            rate_limit_per_minute=limit
+            rate_limit_per_minute=limit,
+            rate_limit_burst=burst
         )
         db.add(db_key)
         db.commit()
@@ -39,23 +158,41 @@ class SecurityService:
         """
         Validates an API Key.
         Returns the ApiKey object if valid, None otherwise.
+        Cached verifications (see ApiKeyCache) skip the DB and bcrypt; those
+        are a transient ApiKey snapshot, not a session-bound row.
         """
         if not raw_key or not raw_key.startswith("bp_live_"):
             return None
+
+        start = time.perf_counter()
+        digest = ApiKeyCache.digest(raw_key)
+        cached, source = key_cache.get(digest)
+        if cached is not None:
+            API_KEY_VERIFY_SECONDS.labels(source=source).observe(time.perf_counter() - start)
+            return cached
             
-        # Optimization: We can't lookup by hash. 
-        # But we can assume the client sends a Client-ID header OR 
-        # we scan keys (slow) OR we use the prefix to narrow down (Collision risk low).
-        # For high performance, we usually cache active keys in Redis.
-        # Here, we do a naive DB lookup for MVP (searching by prefix is safer if unique).
-        
+        # Cache miss: lookup by prefix (not unique by itself), then bcrypt
         prefix = raw_key[:12]
         candidate = db.query(ApiKey).filter(
             ApiKey.key_prefix == prefix, 
             ApiKey.is_active == True
         ).first()
         
-        if candidate and pwd_context.verify(raw_key, candidate.key_hash):
+        valid = candidate is not None and pwd_context.verify(raw_key, candidate.key_hash)
+        API_KEY_VERIFY_SECONDS.labels(source="miss").observe(time.perf_counter() - start)
+        if valid:
+            key_cache.put(digest, candidate)
             return candidate
             
-        return None
\ No newline at end of file
+        return None
+
+    @staticmethod
+    def revoke_key(db: Session, key_id: str) -> bool:
+        """Deactivates a key and drops its cached verifications."""
+        key = db.query(ApiKey).filter(ApiKey.id == key_id).first()
+        if not key:
+            return False
+        key.is_active = False
+        db.commit()
+        key_cache.invalidate(key_id, revoked=True)
+        return True
@@ -1,8 +1,9 @@
+import subprocess
 import numpy as np
 import cv2
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 class PDFConverter:
     """
@@ -10,17 +11,33 @@ class PDFConverter:
     """
     
     @staticmethod
-    def to_images(pdf_path: Path, dpi: int = 200) -> List[np.ndarray]:
+    def page_count(pdf_path: Path) -> int:
+        """Number of pages, read from the PDF metadata (no rasterization)."""
+        try:
+            return int(pdfinfo_from_path(str(pdf_path))["Pages"])
+        except Exception as e:
+            raise RuntimeError(f"Failed to read PDF info. Is poppler installed? Error: {e}")
+
+    @staticmethod
+    def to_images(pdf_path: Path, dpi: int = 200, pages: Optional[List[int]] = None) -> List[np.ndarray]:
         """
         Convert PDF to list of numpy arrays (BGR format for OpenCV).
         High DPI (200-300) is crucial for small details in blueprints.
+        pages: 1-based page numbers to convert (all pages if None), in order.
         """
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
             
         # Convert PDF to PIL Images
         try:
-            pil_images = convert_from_path(str(pdf_path), dpi=dpi)
+            if pages is None:
+                pil_images = convert_from_path(str(pdf_path), dpi=dpi)
+            else:
+                # One poppler call per run of consecutive pages
+                pil_images = []
+                runs = np.split(np.asarray(pages), np.where(np.diff(pages) != 1)[0] + 1) if pages else []
+                for run in runs:
+                    pil_images += convert_from_path(str(pdf_path), dpi=dpi, first_page=int(run[0]), last_page=int(run[-1]))
         except Exception as e:
             raise RuntimeError(f"Failed to convert PDF. Is poppler installed? Error: {e}")
 
@@ -31,4 +48,27 @@ class PDFConverter:
             open_cv_image = open_cv_image[:, :, ::-1].copy() 
             opencv_images.append(open_cv_image)
             
-        return opencv_images
\ No newline at end of file
+        return opencv_images
+
+    @staticmethod
+    def extract_text(pdf_path: Path, last_page: int = None) -> List[str]:
+        """
+        Returns the embedded text layer, one string per page ([] if none).
+        Uses poppler's pdftotext (installed alongside pdf2image), which is far
+        cheaper than rasterizing + OCR. Scanned PDFs return empty strings.
+        """
+        cmd = ["pdftotext", "-layout", "-enc", "UTF-8"]
+        if last_page:
+            cmd += ["-l", str(last_page)]
+        cmd += [str(pdf_path), "-"]
+
+        try:
+            out = subprocess.run(cmd, capture_output=True, timeout=60, check=True).stdout
+        except (OSError, subprocess.SubprocessError):
+            return []
+
+        # pdftotext separates pages with form feeds
+        pages = out.decode("utf-8", errors="ignore").split("\f")
+        if pages and not pages[-1].strip():
+            pages = pages[:-1]
+        return pages
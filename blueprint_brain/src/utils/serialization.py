@@ -0,0 +1,163 @@
+import json
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Optional fast encoders. JSON falls back to the stdlib, msgpack has no fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+_MSGPACK_ALIASES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+class ResultCodec:
+    """
+    Compact encoding for job result documents ({"job_id", "results": [page, ...]}).
+    - Polygons are integer-quantized (pixels * 10**precision).
+    - Optionally delta-encoded: flat [x0, y0, dx1, dy1, ...] per polygon.
+    - JSON (orjson when available) or msgpack on the wire.
+    The active encoding is recorded in result["encoding"].
+    """
+
+    # --- Polygon transforms ---
+    @staticmethod
+    def quantize_polygon(coords: List, precision: int = 0) -> List[List[int]]:
+        pts = np.rint(np.asarray(coords, dtype=np.float64).reshape(-1, 2) * (10 ** precision))
+        return pts.astype(np.int64).tolist()
+
+    @staticmethod
+    def delta_encode(points: List[List[int]]) -> List[int]:
+        pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        if len(pts) == 0:
+            return []
+        deltas = np.diff(pts, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+        return deltas.ravel().tolist()
+
+    @staticmethod
+    def delta_decode(flat: List[int]) -> List[List[int]]:
+        deltas = np.asarray(flat, dtype=np.int64).reshape(-1, 2)
+        return np.cumsum(deltas, axis=0).tolist()
+
+    @staticmethod
+    def _map_polygons(result: Dict[str, Any], fn) -> Dict[str, Any]:
+        for page in result.get("results", []):
+            for room in page.get("data", []):
+                if "polygon" in room:
+                    room["polygon"] = fn(room["polygon"])
+        return result
+
+    @staticmethod
+    def quantize(result: Dict[str, Any], precision: int = 0) -> Dict[str, Any]:
+        """In-place: float polygons -> integer points. Used by the worker before saving."""
+        ResultCodec._map_polygons(result, lambda p: ResultCodec.quantize_polygon(p, precision))
+        result["encoding"] = {"polygon": "points", "precision": precision}
+        return result
+
+    @staticmethod
+    def to_delta(result: Dict[str, Any]) -> Dict[str, Any]:
+        """In-place: integer points -> delta-encoded flat lists."""
+        encoding = result.get("encoding", {"polygon": "points", "precision": 0})
+        if encoding.get("polygon") == "delta":
+            return result
+        ResultCodec._map_polygons(result, ResultCodec.delta_encode)
+        result["encoding"] = {**encoding, "polygon": "delta"}
+        return result
+
+    # --- Field projection ---
+    # Public names for page fields ("rooms" is the page's "data" list)
+    FIELD_ALIASES = {"rooms": "data"}
+
+    @staticmethod
+    def parse_fields(spec: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        'rooms.label,rooms.area_sqft,meta.total_sqft' -> nested selection tree
+        {"data": {"label": True, "area_sqft": True}, "meta": {"total_sqft": True}}.
+        None selects everything.
+        """
+        if not spec:
+            return None
+        tree: Dict[str, Any] = {}
+        for path in spec.split(","):
+            parts = [p for p in path.strip().split(".") if p]
+            if not parts:
+                continue
+            parts[0] = ResultCodec.FIELD_ALIASES.get(parts[0], parts[0])
+            node = tree
+            for part in parts[:-1]:
+                child = node.get(part)
+                if child is True:
+                    break  # Parent already selected whole
+                node = node.setdefault(part, {})
+            else:
+                node[parts[-1]] = True
+        return tree
+
+    @staticmethod
+    def project(obj: Any, tree: Optional[Dict[str, Any]]) -> Any:
+        """Keeps only the selected fields (lists are projected element-wise)."""
+        if tree is None or tree is True:
+            return obj
+        if isinstance(obj, list):
+            return [ResultCodec.project(item, tree) for item in obj]
+        if not isinstance(obj, dict):
+            return obj
+        return {key: ResultCodec.project(obj[key], sub) for key, sub in tree.items() if key in obj}
+
+    @staticmethod
+    def project_page(page: Dict[str, Any], tree: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Projection of one result page; the page number is always kept."""
+        if tree is None:
+            return page
+        projected = ResultCodec.project(page, tree)
+        projected["page"] = page.get("page")
+        return projected
+
+    # --- Wire formats ---
+    @staticmethod
+    def dumps_json(obj: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(obj, separators=(",", ":"), default=str).encode()
+
+    @staticmethod
+    def loads_json(data: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def dumps_msgpack(obj: Any) -> bytes:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.packb(obj, default=str, use_bin_type=True)
+
+    @staticmethod
+    def loads_msgpack(data: bytes) -> Any:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.unpackb(data, raw=False)
+
+    @staticmethod
+    def negotiate(accept_header: str) -> str:
+        """Picks the response media type from an Accept header (JSON by default)."""
+        accept = (accept_header or "").lower()
+        if msgpack is not None and any(alias in accept for alias in _MSGPACK_ALIASES):
+            return MSGPACK_MEDIA_TYPE
+        return JSON_MEDIA_TYPE
+
+    @staticmethod
+    def encode(obj: Any, media_type: str) -> bytes:
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return ResultCodec.dumps_msgpack(obj)
+        return ResultCodec.dumps_json(obj)
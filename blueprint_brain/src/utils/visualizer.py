@@ -35,7 +35,7 @@ class Visualizer:
             
             # Label
             label = self.id_to_name.get(cls_id, f"Class {cls_id}")
-            if confidences:
+            if confidences is not None:
                 label += f" {confidences[idx]:.2f}"
                 
             # Text Background
@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+import cv2
+from shapely.geometry import box, Point
+
+from blueprint_brain.src.logic.geometry import GeometryUtils
+from blueprint_brain.src.logic.scale import ScaleEngine
+from blueprint_brain.src.processing.room_segmenter import RoomSegmenter
+
+@pytest.fixture
+def two_rooms():
+    """Two adjacent 200x200 rooms"""
+    return [box(100, 100, 300, 300), box(300, 100, 500, 300)]
+
+def test_spatial_join_assigns_containers(two_rooms):
+    points = np.array([[150, 150], [450, 250], [900, 900], [200, 120]])
+    container = GeometryUtils.spatial_join(points, two_rooms)
+    assert container.tolist() == [0, 1, -1, 0]
+
+def test_spatial_join_empty_inputs(two_rooms):
+    assert GeometryUtils.spatial_join(np.empty((0, 2)), two_rooms).size == 0
+    assert GeometryUtils.spatial_join(np.array([[1, 1]]), []).tolist() == [-1]
+
+def test_group_by_container_single_pass():
+    container = np.array([1, -1, 0, 1, 1])
+    groups = GeometryUtils.group_by_container(container, 3)
+    assert [g.tolist() for g in groups] == [[2], [0, 3, 4], []]
+
+def test_match_points_to_polygons_compat(two_rooms):
+    mapped = GeometryUtils.match_points_to_polygons(
+        [(Point(150, 150), {'id': 'a'}), (Point(5, 5), {'id': 'b'})], two_rooms
+    )
+    assert mapped[0]['container_index'] == 0
+    assert mapped[1]['container_index'] is None
+
+def test_vectorized_areas(two_rooms):
+    areas = GeometryUtils.polygon_areas(two_rooms)
+    # 200x200 px at 10 px/ft -> 400 sqft
+    assert ScaleEngine(pixels_per_foot=10.0).calculate_areas_sqft(areas) == [400.0, 400.0]
+    assert ScaleEngine().calculate_areas_sqft(areas) == [None, None]
+
+def test_room_segmenter_finds_enclosed_rooms():
+    """Two rooms with a door gap in the shared wall, on a page larger than the working raster"""
+    page = np.full((4000, 6000, 3), 255, dtype=np.uint8)
+    cv2.rectangle(page, (500, 500), (5500, 3500), (0, 0, 0), 40)   # Outer walls
+    cv2.line(page, (3000, 500), (3000, 1800), (0, 0, 0), 40)       # Shared wall...
+    cv2.line(page, (3000, 2000), (3000, 3500), (0, 0, 0), 40)      # ...with a 200px door gap
+
+    segmenter = RoomSegmenter(max_dim=1200, close_kernel=61, min_area=10000)
+    rooms = sorted(segmenter.segment(page), key=lambda p: p.centroid.x)
+
+    assert len(rooms) == 2
+    # Polygons are returned in page coordinates (roughly 2500x3000 px each)
+    for poly in rooms:
+        assert 6.0e6 < poly.area < 7.6e6
+    assert rooms[0].centroid.x < 3000 < rooms[1].centroid.x
+
+@pytest.mark.parametrize("note, expected", [
+    ('SCALE: 1/4" = 1\'-0"', (50.0, "imperial")),   # 0.25 in/ft at 200 dpi
+    ('1" = 20\'', (10.0, "imperial")),
+    ('SCALE: 1 1/2" = 1\'-0"', (300.0, "imperial")),  # Mixed fraction, not just the 1/2
+    ("SCALE 1:100", (24.0, "metric")),
+    ("MEETING 1:30", None),                          # Bare ratios need the SCALE keyword
+    ("12'6\"", None),
+])
+def test_parse_scale_note(note, expected):
+    assert ScaleEngine.parse_scale_note(note, dpi=200) == expected
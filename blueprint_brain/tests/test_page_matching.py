@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+import cv2
+
+from blueprint_brain.src.processing.adaptive_slicer import AdaptiveSlicer
+from blueprint_brain.src.processing.page_matching import PerceptualHash, PageAligner
+from blueprint_brain.config.settings import settings
+
+def make_sheet(dpi: int = 200, shift: int = 0) -> np.ndarray:
+    """Simple floor plan drawn at a given DPI, optionally shifted right (in 200 dpi px)"""
+    s = dpi / 200
+    f = lambda v: int(v * s)
+    page = np.full((f(4000), f(6000), 3), 255, dtype=np.uint8)
+    cv2.rectangle(page, (f(500 + shift), f(500)), (f(5500 + shift), f(3500)), (0, 0, 0), f(30))
+    cv2.line(page, (f(3000 + shift), f(500)), (f(3000 + shift), f(3500)), (0, 0, 0), f(30))
+    cv2.line(page, (f(500 + shift), f(2000)), (f(3000 + shift), f(2000)), (0, 0, 0), f(30))
+    cv2.putText(page, "KITCHEN", (f(1000 + shift), f(1200)), cv2.FONT_HERSHEY_SIMPLEX, 4 * s, (0, 0, 0), f(8))
+    return page
+
+def test_phash_bands_cover_all_bits():
+    value = 0x0123456789ABCDEF
+    bands = PerceptualHash.bands(value)
+    assert len(bands) == PerceptualHash.BANDS
+    assert sum(b << (i * 16) for i, b in enumerate(bands)) == value
+
+def test_reexported_sheet_is_near_duplicate_and_aligns():
+    original, reexport = make_sheet(200), make_sheet(150, shift=40)
+    thumb_a, thumb_b = AdaptiveSlicer.make_thumbnail(original), AdaptiveSlicer.make_thumbnail(reexport)
+
+    distance = PerceptualHash.hamming(PerceptualHash.compute(thumb_a), PerceptualHash.compute(thumb_b))
+    assert distance <= 3
+
+    alignment = PageAligner.align(thumb_a, original.shape, thumb_b, reexport.shape)
+    assert alignment is not None
+    assert alignment.changed_ratio < 0.0005
+    assert alignment.is_near_duplicate(reexport.shape)
+    # Outer wall corner (500, 500) at 200 dpi -> (540, 500) * 0.75 at 150 dpi
+    x, y = alignment.apply([[500, 500]])[0]
+    assert abs(x - 405) < 8 and abs(y - 375) < 8
+
+def test_different_sheet_fails_alignment_check():
+    plan = make_sheet(200)
+    other = np.full_like(plan, 255)
+    cv2.circle(other, (3000, 2000), 1500, (0, 0, 0), 30)
+    thumb_a, thumb_b = AdaptiveSlicer.make_thumbnail(plan), AdaptiveSlicer.make_thumbnail(other)
+
+    alignment = PageAligner.align(thumb_a, plan.shape, thumb_b, other.shape)
+    assert alignment is None or alignment.changed_ratio > 0.0005
+
+def covers(regions, x, y):
+    return any(x1 <= x < x2 and y1 <= y < y2 for x1, y1, x2, y2 in regions)
+
+def test_thin_line_revision_is_found_next_to_heavy_changes():
+    original = make_sheet(200)
+    revised = original.copy()
+    # Heavy change (filled block) sets the threshold; the thin edits must still show
+    cv2.rectangle(revised, (600, 2200), (1400, 3300), (0, 0, 0), -1)
+    cv2.line(revised, (2000, 3000), (5000, 3000), (0, 0, 0), 2)
+    cv2.putText(revised, "REV B", (4500, 3300), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+
+    thumb_a, thumb_b = AdaptiveSlicer.make_thumbnail(original), AdaptiveSlicer.make_thumbnail(revised)
+    alignment = PageAligner.align(
+        thumb_a, original.shape, thumb_b, revised.shape,
+        PageAligner.ink_map(original), PageAligner.ink_map(revised)
+    )
+    assert alignment is not None
+    regions = alignment.changed_regions(revised.shape)
+    assert all(covers(regions, x, 3000) for x in (2100, 3500, 4900))
+    assert covers(regions, 4600, 3280)
+    # Nothing else on the sheet changed
+    assert not covers(regions, 3000, 1000)
+
+@pytest.mark.parametrize("width", [1, 2])
+@pytest.mark.parametrize("dpi, shift", [(200, 0), (150, 40)])
+def test_thin_line_edit_is_incremental_not_near_duplicate(width, dpi, shift):
+    original, revised = make_sheet(200), make_sheet(dpi, shift)
+    s = dpi / 200
+    # A 3000 px wall added in the revision: under the changed-ratio limit on its own
+    cv2.line(revised, (int(2000 * s), int(3000 * s)), (int(5000 * s), int(3000 * s)), (0, 0, 0), width)
+
+    alignment = PageAligner.align(
+        AdaptiveSlicer.make_thumbnail(original), original.shape,
+        AdaptiveSlicer.make_thumbnail(revised), revised.shape,
+        PageAligner.ink_map(original), PageAligner.ink_map(revised)
+    )
+    assert alignment is not None
+    assert not alignment.is_near_duplicate(revised.shape)
+
+    # Only the wall is re-inferred
+    regions = alignment.changed_regions(revised.shape)
+    assert all(covers(regions, int(x * s), int(3000 * s)) for x in (2100, 3500, 4900))
+    area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+    assert area / (revised.shape[0] * revised.shape[1]) < settings.REVISION_MAX_CHANGED_AREA
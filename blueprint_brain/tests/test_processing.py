@@ -42,4 +42,15 @@ def test_tiler_geometry(mock_image_env):
     generated_tiles = list((out_dir / "images").glob("*.jpg"))
     # The stride logic might produce slightly different counts based on edge handling
     # but strictly it should cover the area.
-    assert len(generated_tiles) > 0
\ No newline at end of file
+    assert len(generated_tiles) > 0
+@pytest.mark.parametrize("shape, expected", [
+    ((500, 400, 3), [(0, 0, 400, 500)]),
+    ((600, 1000, 3), [(0, 0, 640, 600), (360, 0, 1000, 600)]),
+])
+def test_inference_grid_covers_images_smaller_than_a_tile(shape, expected):
+    pytest.importorskip("torch")
+    from blueprint_brain.src.inference.engine import InferenceEngine
+
+    engine = InferenceEngine()
+    engine.tile_size, engine.stride = 640, 512
+    assert engine.tile_grid(shape) == expected
@@ -0,0 +1,25 @@
+import pytest
+
+from blueprint_brain.services.scheduler import FairScheduler
+
+fakeredis = pytest.importorskip("fakeredis")
+
+@pytest.fixture
+def scheduler():
+    return FairScheduler(fakeredis.FakeRedis(), capacity=100)
+
+def test_page_is_requeued_when_dispatch_fails(scheduler):
+    pages = [{"page": 1, "cost": 3, "job_id": "job"}, {"page": 2, "cost": 2, "job_id": "job"}]
+    scheduler.enqueue("tenant", 1, "job", 5.0, pages)
+
+    def broker_down(member, item):
+        raise RuntimeError("broker down")
+
+    with pytest.raises(RuntimeError):
+        scheduler.pump(broker_down)
+    # Nothing lost and nothing left counted as in flight
+    assert scheduler.queued_cost() == ({"tenant": 5.0}, 0.0)
+
+    dispatched = []
+    assert scheduler.pump(lambda member, item: dispatched.append(item["page"])) == 2
+    assert dispatched == [1, 2]
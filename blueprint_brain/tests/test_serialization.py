@@ -0,0 +1,42 @@
+import pytest
+
+from blueprint_brain.src.utils.serialization import ResultCodec, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+
+@pytest.fixture
+def result_doc():
+    return {
+        "job_id": "job-1",
+        "results": [{
+            "page": 1,
+            "data": [{"id": "room_0", "area_sqft": 400.0,
+                      "polygon": [(100.4, 100.6), (300.0, 100.2), (300.0, 299.7), (100.4, 100.6)]}]
+        }]
+    }
+
+def test_quantize_and_delta_roundtrip(result_doc):
+    ResultCodec.quantize(result_doc)
+    points = result_doc["results"][0]["data"][0]["polygon"]
+    assert points == [[100, 101], [300, 100], [300, 300], [100, 101]]
+
+    ResultCodec.to_delta(result_doc)
+    flat = result_doc["results"][0]["data"][0]["polygon"]
+    assert flat[:4] == [100, 101, 200, -1]
+    assert result_doc["encoding"] == {"polygon": "delta", "precision": 0}
+    assert ResultCodec.delta_decode(flat) == points
+
+def test_quantize_precision():
+    assert ResultCodec.quantize_polygon([(1.234, 5.678)], precision=1) == [[12, 57]]
+
+def test_wire_formats(result_doc):
+    ResultCodec.quantize(result_doc)
+    assert ResultCodec.loads_json(ResultCodec.dumps_json(result_doc)) == result_doc
+    if ResultCodec.negotiate("application/msgpack") == MSGPACK_MEDIA_TYPE:
+        assert ResultCodec.loads_msgpack(ResultCodec.dumps_msgpack(result_doc)) == result_doc
+    assert ResultCodec.negotiate("text/html, */*") == JSON_MEDIA_TYPE
+    assert ResultCodec.negotiate(None) == JSON_MEDIA_TYPE
+
+def test_field_projection(result_doc):
+    fields = ResultCodec.parse_fields("rooms.area_sqft,rooms.id")
+    assert fields == {"data": {"area_sqft": True, "id": True}}
+    page = ResultCodec.project_page(result_doc["results"][0], fields)
+    assert page == {"page": 1, "data": [{"id": "room_0", "area_sqft": 400.0}]}
@@ -0,0 +1,39 @@
+import pytest
+
+from blueprint_brain.services.time_budget import DegradationPolicy
+from blueprint_brain.src.utils.serialization import ResultCodec
+
+# The worker module loads the inference stack (torch, PaddleOCR) on import
+tasks = pytest.importorskip("blueprint_brain.worker.tasks")
+
+@pytest.fixture
+def uploads(monkeypatch):
+    stored = {}
+    monkeypatch.setattr(tasks.storage, "upload_bytes",
+                        lambda data, key, content_type=None: stored.__setitem__(key, data))
+    return stored
+
+def test_degraded_result_document_records_its_degradation(uploads):
+    degradation = DegradationPolicy.describe(2)
+    key = tasks.save_result("job-1", [], degradation=degradation)
+
+    document = ResultCodec.loads_json(uploads[key])
+    assert document["degradation"]["level"] == 2
+    assert document["degradation"]["dpi"] == degradation["dpi"]
+
+def test_result_document_without_degradation_has_no_field(uploads):
+    key = tasks.save_result("job-1", [])
+    assert "degradation" not in ResultCodec.loads_json(uploads[key])
+
+def test_redelivered_page_is_counted_once(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    r = fakeredis.FakeRedis()
+    monkeypatch.setattr(tasks, "get_redis", lambda: r)
+    monkeypatch.setattr(tasks.crud, "checkpoint_page", lambda db, job_id, entry: None)
+    monkeypatch.setattr(tasks.progress_stream, "publish", lambda *args, **kwargs: None)
+    ctx = {"job_id": "job-1", "page_count": 2}
+
+    assert not tasks.record_page_done(None, ctx, {"page": 1})
+    # acks_late redelivery of the same page
+    assert not tasks.record_page_done(None, ctx, {"page": 1})
+    assert tasks.record_page_done(None, ctx, {"page": 2})
@@ -14,8 +14,15 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Stage queues: accelerator workers consume only VISION_QUEUE_NAME,
+    # CPU workers consume ingest + post-processing.
     task_routes={
-        "blueprint_brain.worker.tasks.process_blueprint": {"queue": settings.TASK_QUEUE_NAME}
+        "blueprint_brain.worker.tasks.process_blueprint": {"queue": settings.INGEST_QUEUE_NAME},
+        "blueprint_brain.worker.tasks.vision_page": {"queue": settings.VISION_QUEUE_NAME},
+        "blueprint_brain.worker.tasks.post_page": {"queue": settings.CPU_POST_QUEUE_NAME},
+        "blueprint_brain.worker.tasks.finalize_blueprint": {"queue": settings.CPU_POST_QUEUE_NAME},
+        "blueprint_brain.worker.tasks.fail_blueprint": {"queue": settings.CPU_POST_QUEUE_NAME},
+        "blueprint_brain.worker.tasks.refuse_blueprint": {"queue": settings.CPU_POST_QUEUE_NAME}
     },
     # GPU Optimization:
     # Only fetch 1 task at a time per worker process.
@@ -1,12 +1,14 @@
 import json
 import logging
+import numpy as np
 import traceback
 from pathlib import Path
 import celery
-from celery import Task
-from celery.exceptions import SoftTimeLimitExceeded
+from celery import Task, chain
+from celery.exceptions import SoftTimeLimitExceeded, Retry
 import requests
-import hashlib
+import cv2
+import shapely
 # Components
 from blueprint_brain.worker.celery_app import celery_app
 from blueprint_brain.services.storage import StorageService
@@ -16,10 +18,25 @@ from blueprint_brain.src.utils.pdf_converter import PDFConverter
 from blueprint_brain.src.inference.engine import InferenceEngine
 from blueprint_brain.src.ocr.engine import OCREngine
 from blueprint_brain.src.fusion.assembler import FusionAssembler
+from blueprint_brain.src.logic.document_context import DocumentContext, DocumentContextBuilder
+from blueprint_brain.src.processing.room_segmenter import RoomSegmenter
+from blueprint_brain.src.ocr.engine import TextEntity
+from blueprint_brain.services.stage_store import StageStore
+from blueprint_brain.services.uploader import ArtifactUploader
+from blueprint_brain.services.scheduler import FairScheduler
+from blueprint_brain.services.time_budget import DegradationPolicy, TileTimer
+from blueprint_brain.services.admission import AdmissionController
+from blueprint_brain.services.progress import ProgressStream
+from blueprint_brain.services.cache import ResultCache, SingleFlight, PageCache, NearDuplicateIndex, get_redis
+from blueprint_brain.src.processing.adaptive_slicer import AdaptiveSlicer
+from blueprint_brain.src.processing.page_matching import PerceptualHash, PageAligner, Alignment
+from blueprint_brain.src.core.exceptions import DataIngestionError
 from blueprint_brain.src.utils.visualizer import Visualizer
+from blueprint_brain.src.utils.serialization import ResultCodec
 from blueprint_brain.src.db.session import SessionLocal
 from blueprint_brain.src.db import crud
 import time
+from datetime import datetime
 from contextlib import contextmanager
 from blueprint_brain.src.monitoring.metrics import INFERENCE_DURATION, ROOMS_DETECTED
 
@@ -40,12 +57,345 @@ def timer_logger(label: str, job_id: str):
 
 logger = logging.getLogger(__name__)
 storage = StorageService()
+stage_store = StageStore(storage)
+result_cache = ResultCache()
+single_flight = SingleFlight()
+page_cache = PageCache()
+near_dup_index = NearDuplicateIndex()
+scheduler = FairScheduler()
+tile_timer = TileTimer()
+admission = AdmissionController(scheduler=scheduler, timer=tile_timer)
+progress_stream = ProgressStream()
+
+def build_detections(vision_res: dict, id_to_name: dict) -> list:
+    """Converts merged vision output into the detection dicts used by fusion."""
+    detections = []
+    for idx, box in enumerate(vision_res['boxes']):
+        cls_id = int(vision_res['classes'][idx])
+        detections.append({
+            "label": id_to_name.get(cls_id, "Unknown"),
+            "bbox": [float(v) for v in box],
+            "confidence": float(vision_res['scores'][idx])
+        })
+    return detections
+
+def sync_engine_set() -> dict:
+    """Engines for one ModelPool slot (synchronous /analyze endpoint), loaded up front."""
+    # PaddleOCR is not thread-safe: each slot owns its OCR model instead of sharing the singleton
+    vision, ocr = InferenceEngine(), OCREngine.dedicated()
+    vision._load_model()
+    ocr._get_model()
+    return {"vision": vision, "ocr": ocr}
+
+def analyze_single_image(engines: dict, img, scale_value: float = None) -> dict:
+    """
+    Whole pipeline for one small image, in process: vision, OCR, rooms and
+    fusion. No S3, no stage cache, no annotated image (ModelPool callable).
+    """
+    context = DocumentContext(pixels_per_foot=scale_value, source="user" if scale_value else "default")
+    vision_res = engines["vision"].process_full_image(img)
+    ocr_res = engines["ocr"].analyze_image(img)
+    room_polys = RoomSegmenter().segment(img)
+
+    fusion_engine = FusionAssembler(scale_value=context.scale_value, vocabulary=context.vocabulary)
+    detections = build_detections(vision_res, {v: k for k, v in settings.CLASS_MAP.items()})
+    page_data = fusion_engine.assemble_floorplan(img.shape, None, detections, ocr_res, room_polygons=room_polys)
+    page_data['page'] = 1
+    return ResultCodec.quantize({"results": [page_data]}, settings.RESULT_COORD_PRECISION)
+
+def save_result(job_id: str, final_pages: list, context: DocumentContext = None, degradation: dict = None) -> str:
+    """Uploads the combined result document. Returns its S3 key."""
+    result_s3_key = f"results/{job_id}/data.json"
+    output = {"job_id": job_id, "results": final_pages}
+    if context is not None:
+        output["context"] = context.dict(exclude={"vocabulary"})
+    if degradation is not None:
+        # Fidelity the pages were produced at (level 0: full)
+        output["degradation"] = degradation
+    output = ResultCodec.quantize(output, settings.RESULT_COORD_PRECISION)
+    storage.upload_bytes(ResultCodec.dumps_json(output), result_s3_key, content_type="application/json")
+    return result_s3_key
+
+def save_page_result(job_id: str, page_data: dict, uploader: ArtifactUploader = None) -> str:
+    """
+    Uploads one page's fusion output (reusable by later revisions of the set).
+    Kept at full precision: save_result quantizes the assembled document.
+    With an uploader the upload runs in the background.
+    """
+    page_key = f"results/{job_id}/pages/p{page_data['page']}.json"
+    payload = ResultCodec.dumps_json(page_data)
+    if uploader is not None:
+        uploader.submit(payload, page_key, content_type="application/json")
+    else:
+        storage.upload_bytes(payload, page_key, content_type="application/json")
+    return page_key
+
+def fuse_from_stages(fusion_engine: FusionAssembler, input_hash: str, page_no: int,
+                     image_shape: tuple, id_to_name: dict, degradation: dict = None) -> dict:
+    """Rebuilds a page's fusion output from cached stage outputs (no inference)."""
+    vision_res = stage_store.load_vision(input_hash, page_no, degradation)
+    ocr_rows = stage_store.load_ocr(input_hash, page_no, degradation)
+    room_polys = stage_store.load_rooms(input_hash, page_no, degradation)
+    if vision_res is None or ocr_rows is None or room_polys is None:
+        # Stage config changed since the original run -> needs a full run
+        raise DataIngestionError(f"Stage outputs missing for page {page_no} of {input_hash}")
+
+    detections = build_detections(vision_res, id_to_name)
+    ocr_res = [TextEntity(**row) for row in ocr_rows]
+    return fusion_engine.assemble_floorplan(tuple(image_shape), None, detections, ocr_res, room_polygons=room_polys)
+
+def reuse_cached_page(entry: dict, image_shape: tuple, fusion_engine: FusionAssembler,
+                      fusion_hash: str, id_to_name: dict) -> dict:
+    """
+    Page-cache hit: take the stored fusion output if it was fused with the same
+    document context, otherwise re-fuse from the page's cached stage outputs.
+    """
+    if entry.get("fusion_hash") == fusion_hash:
+        data = storage.download_bytes(entry["result_key"])
+        if data is not None:
+            return ResultCodec.loads_json(data)
+    return fuse_from_stages(fusion_engine, entry["input_hash"], entry["page"], image_shape, id_to_name)
+
+def align_candidates(candidates: list, thumb, image_shape: tuple, ink=None):
+    """
+    Aligns each candidate's stored thumbnail to this page (candidates are
+    {"input_hash", "page", "shape"} refs) and diffs their ink maps.
+    Returns the closest (entry, Alignment) or None.
+    """
+    best = None
+    for entry in candidates:
+        prev_thumb = stage_store.load_thumbnail(entry["input_hash"], entry["page"])
+        if prev_thumb is None:
+            continue
+        prev_ink = stage_store.load_ink_map(entry["input_hash"], entry["page"]) if ink is not None else None
+        alignment = PageAligner.align(prev_thumb, entry["shape"], thumb, image_shape, prev_ink, ink)
+        if alignment is not None and (best is None or alignment.changed_ratio < best[1].changed_ratio):
+            best = (entry, alignment)
+        if best and best[1].is_near_duplicate(image_shape):
+            break
+
+    if best:
+        entry, alignment = best
+        logger.info(
+            f"Prior version {entry['input_hash']}:p{entry['page']} "
+            f"(scale={alignment.scale:.3f}, changed={alignment.changed_ratio:.4%})"
+        )
+    return best
+
+def prior_page_refs(previous_input_hash: str) -> dict:
+    """page number -> thumbnail/stage ref of an earlier revision's pages (from its manifest)."""
+    manifest = stage_store.load_manifest(previous_input_hash) if previous_input_hash else None
+    if not manifest:
+        return {}
+    refs = {}
+    for page in manifest["pages"]:
+        ref = page.get("stages", {"input_hash": previous_input_hash, "page": page["page"]})
+        if ref.get("degradation"):
+            continue  # Degraded outputs are never carried into later revisions
+        refs[page["page"]] = {**ref, "shape": page["shape"][:2]}
+    return refs
+
+def transfer_stages(entry: dict, alignment: Alignment):
+    """
+    Loads a near-duplicate's stage outputs and maps them into the current
+    page's coordinates. Returns (vision_res, ocr entities, room polygons),
+    or None if they were produced under a different stage config.
+    """
+    vision_res = stage_store.load_vision(entry["input_hash"], entry["page"])
+    ocr_rows = stage_store.load_ocr(entry["input_hash"], entry["page"])
+    room_polys = stage_store.load_rooms(entry["input_hash"], entry["page"])
+    if vision_res is None or ocr_rows is None or room_polys is None:
+        return None
+
+    def map_boxes(boxes):
+        return alignment.apply(boxes).reshape(-1, 4).astype(np.float32)
+
+    vision_res['boxes'] = map_boxes(vision_res['boxes'])
+    vision_res['raw']['boxes'] = map_boxes(vision_res['raw']['boxes'])
+
+    ocr_res = []
+    for row in ocr_rows:
+        row['bbox'] = [int(round(v)) for v in alignment.apply(row['bbox']).ravel()]
+        row['center'] = alignment.apply(row['center']).ravel().tolist()
+        ocr_res.append(TextEntity(**row))
+
+    room_polys = list(shapely.transform(room_polys, alignment.apply))
+    return vision_res, ocr_res, room_polys
+
+def ocr_changed_regions(ocr_engine: OCREngine, image, prior_ocr: list, regions: list, angle_cls: bool = True) -> list:
+    """
+    Revised sheet: keeps stored text outside the changed regions and OCRs
+    only inside them.
+    """
+    rects = np.array(regions).reshape(-1, 4)
+    centers = np.array([e.center for e in prior_ocr]).reshape(-1, 2)
+    stale = (
+        (centers[:, None, 0] >= rects[None, :, 0]) & (centers[:, None, 0] < rects[None, :, 2]) &
+        (centers[:, None, 1] >= rects[None, :, 1]) & (centers[:, None, 1] < rects[None, :, 3])
+    ).any(axis=1)
+    return [e for e, drop in zip(prior_ocr, stale) if not drop] + ocr_engine.analyze_regions(image, regions, angle_cls)
+
+def changed_area_share(alignment: Alignment, image_shape: tuple) -> float:
+    regions = np.array(alignment.changed_regions(image_shape)).reshape(-1, 4)
+    area = ((regions[:, 2] - regions[:, 0]) * (regions[:, 3] - regions[:, 1])).sum()
+    return float(area) / (image_shape[0] * image_shape[1])
+
+def raster_key(job_id: str, page_no: int) -> str:
+    """Page rasters handed from the ingest stage to the vision / cpu_post stages."""
+    return f"work/{job_id}/p{page_no}.png"
+
+def load_raster(key: str):
+    data = storage.download_bytes(key)
+    if data is None:
+        raise DataIngestionError(f"Page raster missing: {key}")
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+JOB_STATE_TTL = 86400
+
+def save_job_ctx(ctx: dict):
+    """Job-wide state shared by its page tasks and finalize (job_ctx:{job_id})."""
+    get_redis().setex(f"job_ctx:{ctx['job_id']}", JOB_STATE_TTL, json.dumps(ctx))
+
+def load_job_ctx(job_id: str) -> dict:
+    raw = get_redis().get(f"job_ctx:{job_id}")
+    return json.loads(raw) if raw else None
+
+def clear_job_state(job_id: str):
+    get_redis().delete(
+        f"job_ctx:{job_id}", f"job_pages:{job_id}", f"job_done_pages:{job_id}",
+        f"job_plans:{job_id}", f"job_deliveries:{job_id}"
+    )
+
+def save_plans(job_id: str, plans: list):
+    """Ingest checkpoint: planned pages whose rasters are already in S3 (job_plans:{job_id})."""
+    if not plans:
+        return
+    r = get_redis()
+    r.hset(f"job_plans:{job_id}", mapping={plan["page"]: json.dumps(plan) for plan in plans})
+    r.expire(f"job_plans:{job_id}", JOB_STATE_TTL)
+
+def load_plans(job_id: str) -> dict:
+    return {int(k): json.loads(v) for k, v in get_redis().hgetall(f"job_plans:{job_id}").items()}
+
+def count_delivery(key: str) -> int:
+    """How often a task was delivered for this unit of work (survives worker crashes)."""
+    r = get_redis()
+    count = r.incr(key)
+    r.expire(key, JOB_STATE_TTL)
+    return count
+
+def page_is_done(job_id: str, page_no: int) -> bool:
+    return bool(get_redis().hexists(f"job_pages:{job_id}", page_no))
+
+def record_page_done(db, ctx: dict, entry: dict) -> bool:
+    """
+    Checkpoints a finished page (JobPage row, outputs already in S3), stores it
+    for the join and reports progress. Returns True when this call completes
+    the job's last page.
+
+    The join is a Redis set of finished page numbers rather than a Celery
+    chord: pages are released one by one by the fair scheduler (there is no
+    group to attach a chord to), pages already done when a job resumes or hits
+    the page cache never run a task, and chord counters are not idempotent
+    under acks_late redelivery. SADD + SCARD is: a redelivered page adds
+    nothing, and a page whose first delivery died before finalize was sent
+    still sees the full set and sends it (finalize tolerates a rare repeat).
+    """
+    job_id = ctx["job_id"]
+    crud.checkpoint_page(db, job_id, entry)
+
+    pages_key, done_key = f"job_pages:{job_id}", f"job_done_pages:{job_id}"
+    pipe = get_redis().pipeline()  # MULTI: the add and the count are one step
+    pipe.hsetnx(pages_key, entry["page"], json.dumps(entry))
+    pipe.sadd(done_key, entry["page"])
+    pipe.scard(done_key)
+    pipe.expire(pages_key, JOB_STATE_TTL)
+    pipe.expire(done_key, JOB_STATE_TTL)
+    _, added, done = pipe.execute()[:3]
+
+    if added:
+        total = max(1, ctx["page_count"])
+        # 'page' tells streaming clients which result just became available (/jobs/{id}/pages/{n})
+        progress_stream.publish(
+            job_id, "progress", int(20 + 70 * min(done, total) / total),
+            f'Analyzed {min(done, total)}/{total} pages', page=entry["page"]
+        )
+    return done == ctx["page_count"]
+
+def check_page_delivery(ctx: dict, page_no: int, stage: str):
+    """Fails a page that keeps getting redelivered (e.g. it kills its worker)."""
+    deliveries = count_delivery(f"page_deliveries:{ctx['job_id']}:{page_no}:{stage}")
+    if deliveries > settings.PAGE_MAX_DELIVERIES:
+        raise DataIngestionError(f"Page {page_no} {stage} failed after {deliveries - 1} attempts")
+
+def dispatch_page(member: str, item: dict):
+    """Scheduler callback: sends one page down vision (accelerator) -> post-processing (CPU)."""
+    ctx = load_job_ctx(item["job_id"])
+    if ctx is None:
+        # Job failed or expired meanwhile; drop its remaining pages
+        scheduler.complete(member)
+        return
+    plan = {**item["plan"], "fq_member": member}
+    if plan["mode"] == "transfer":
+        signature = post_page.s(plan, ctx)
+    else:
+        signature = chain(vision_page.s(plan, ctx), post_page.s(ctx))
+    signature.on_error(fail_blueprint.s(ctx, member)).apply_async()
+
+def pump_scheduler():
+    released = scheduler.pump(dispatch_page)
+    if released:
+        logger.info(f"Scheduler released {released} pages.")
+
+def complete_from_cache(db, job_id: str, file_hash: str, result_key: str) -> dict:
+    """Marks a job done by referencing an existing result (no artifacts are copied)."""
+    logger.info(f"[{job_id}] Cache Hit! Found result from {result_key}")
+    crud.update_job_status(
+        db, job_id, "COMPLETED", result_key=result_key,
+        meta={"input_hash": file_hash, "cached": True}
+    )
+    progress_stream.publish(job_id, "completed", 100, "Identical file already processed", result_key=result_key)
+    return {"status": "success", "result_key": result_key, "cached": True}
+
+def acquire_single_flight(task, db, file_hash: str, job_id: str) -> bool:
+    """
+    Takes the in-flight lease for file_hash. If another live job holds it, the
+    task is re-scheduled (self.retry) so it re-checks the result cache later
+    without occupying a worker. Returns False only once waiting is exhausted.
+    """
+    holder = single_flight.acquire(file_hash, job_id)
+    if holder is None:
+        return True
+
+    # Holder crashed without its lease expiring yet (its job is already FAILED/gone)
+    holder_job = crud.get_job(db, holder)
+    if holder_job is None or holder_job.status == "FAILED":
+        if single_flight.takeover(file_hash, holder, job_id):
+            logger.info(f"[{job_id}] Took over stale lease from {holder}")
+            return True
+
+    if task.request.retries >= settings.SINGLE_FLIGHT_MAX_WAITS:
+        logger.warning(f"[{job_id}] Gave up waiting on in-flight duplicate {holder}; computing anyway.")
+        return False
+
+    logger.info(f"[{job_id}] Identical file in flight as {holder}; waiting for its result.")
+    progress_stream.progress(job_id, 5, f'Waiting on identical job {holder}')
+    raise task.retry(countdown=settings.SINGLE_FLIGHT_POLL_SECONDS, max_retries=None)
+
+def summarize_pages(final_pages: list) -> dict:
+    """Job-level totals stored in Job.meta_data for quick querying."""
+    return {
+        "page_count": len(final_pages),
+        "total_rooms": sum(len(p.get('data', [])) for p in final_pages),
+        "total_sqft": round(sum(p.get('meta', {}).get('total_sqft', 0) for p in final_pages), 2)
+    }
 
 class ModelTask(Task):
     """
     Abstract Task class to handle ML Model resource management.
     """
     _vision_engine = None
+    _light_vision_engine = None
     _ocr_engine = None
 
     @property
@@ -54,6 +404,13 @@ class ModelTask(Task):
             self._vision_engine = InferenceEngine()
         return self._vision_engine
 
+    @property
+    def light_vision_engine(self):
+        """Faster fallback model for jobs degraded to meet their time budget."""
+        if self._light_vision_engine is None:
+            self._light_vision_engine = InferenceEngine(model_path=settings.LIGHT_MODEL_VERSION)
+        return self._light_vision_engine
+
     @property
     def ocr_engine(self):
         if self._ocr_engine is None:
@@ -65,6 +422,17 @@ class ModelTask(Task):
         logger.error(f"Task {task_id} failed: {exc}")
         logger.error(traceback.format_exc())
 
+
+# -----------------------------------------------------------------------------
+# Pipeline: process_blueprint (ingest) -> FairScheduler -> per page
+#           [vision_page -> post_page] -> finalize_blueprint (last page joins)
+# Only vision_page needs the accelerator; everything else runs on CPU workers.
+# Pages are released by the scheduler, not all at once, so tenants interleave.
+# Stages hand data over through S3 (page rasters, StageStore outputs), never
+# through the broker. Finished pages are checkpointed (JobPage), so redelivered
+# tasks (acks_late) resume after them instead of starting over.
+# -----------------------------------------------------------------------------
+
 @celery_app.task(
     bind=True, 
     base=ModelTask, 
@@ -72,7 +440,13 @@ class ModelTask(Task):
     soft_time_limit=600, # 10 minutes max per file
     acks_late=True # Only ack after success (prevents data loss)
 )
-def process_blueprint(self, file_key: str, webhook_url: str = None):
+def process_blueprint(self, file_key: str, webhook_url: str = None, file_hash: str = None,
+                      tenant_id: str = None, previous_input_hash: str = None):
+    """
+    Ingest stage (CPU queue): dedup, download, rasterization, document context
+    and per-page planning (page cache, near-duplicates, revisions). Pages that
+    still need work are fanned out; finalize_blueprint assembles the result.
+    """
     job_id = self.request.id
     logger.info(f"[{job_id}] Processing Started: {file_key}")
     
@@ -80,120 +454,527 @@ def process_blueprint(self, file_key: str, webhook_url: str = None):
     local_dir.mkdir(parents=True, exist_ok=True)
     # Create DB Session
     db = SessionLocal()
+    lease_hash = None
+    uploader = None
+    dispatched = False
+    retrying = False
+    deliveries = 0
+    started = time.time()
     
     try:
+        # --- Redelivery (acks_late): resume instead of restarting ---
+        job = crud.get_job(db, job_id)
+        if job and job.status == "COMPLETED":
+            logger.info(f"[{job_id}] Redelivered after completion; nothing to do.")
+            return {"status": "success", "result_key": job.result_s3_key}
+        ctx = load_job_ctx(job_id)
+        if ctx and ctx.get("dispatched"):
+            # Pages already handed to the scheduler; they finish (and join) on their own
+            logger.info(f"[{job_id}] Redelivered after dispatch; pages continue from their checkpoints.")
+            pump_scheduler()
+            dispatched = True
+            return {"status": "dispatched", "pages": ctx["page_count"], "resumed": True}
+
         crud.update_job_status(db, job_id, "PROCESSING")
-        # 1. Download
-        local_input = local_dir / "input_file"
-        storage.download_file(file_key, str(local_input))
 
         # --- OPTIMIZATION: Deduplication ---
-        # Calculate Hash
-        with open(local_input, "rb") as f:
-            file_hash = hashlib.md5(f.read()).hexdigest()
+        # Hash normally arrives from the API (storage checksum). Otherwise try
+        # the object's ETag before paying for a download.
+        file_hash = file_hash or storage.get_content_hash(file_key)
         
         # Check Cache (Redis)
         # We store: "hash_xyz" -> "results/old_job_id/data.json"
-        import redis
-        r = redis.from_url(settings.REDIS_URL)
-        cached_result_key = r.get(f"file_hash:{file_hash}")
-        
+        cached_result_key = result_cache.get_result_key(file_hash)
         if cached_result_key:
-            cached_result_key = cached_result_key.decode('utf-8')
-            logger.info(f"[{job_id}] Cache Hit! Found result from {cached_result_key}")
-            # We can return immediately. 
-            # Note: We might want to copy the artifacts to the new job_id folder in S3 
-            # if we want strictly separated user data, but for efficiency, we reference existing.
-            return {"status": "success", "result_key": cached_result_key, "cached": True}
-
-        # 2. Conversion
-        self.update_state(state='PROCESSING', meta={'progress': 10, 'status': 'Converting PDF...'})
+            return complete_from_cache(db, job_id, file_hash, cached_result_key)
+
+        # --- OPTIMIZATION: Single-flight ---
+        # Identical files submitted in a burst: first job computes, the rest
+        # wait for its result. Taken before the download when the hash is known.
+        if file_hash and acquire_single_flight(self, db, file_hash, job_id):
+            lease_hash = file_hash
+
+        # 1. Download (hash computed while streaming, never read fully into memory)
+        local_input = local_dir / "input_file"
+        streamed_hash = storage.download_file_hashed(file_key, str(local_input))
+        if file_hash is None:
+            file_hash = streamed_hash
+            if job:
+                crud.set_document_hash(db, job.document_id, file_hash)
+            cached_result_key = result_cache.get_result_key(file_hash)
+            if cached_result_key:
+                return complete_from_cache(db, job_id, file_hash, cached_result_key)
+
+            if acquire_single_flight(self, db, file_hash, job_id):
+                lease_hash = file_hash
+
+        # Bounded: a job that keeps timing out / killing workers fails instead of looping
+        deliveries = count_delivery(f"job_deliveries:{job_id}")
+        if deliveries > settings.JOB_MAX_DELIVERIES:
+            raise DataIngestionError(f"Gave up after {deliveries - 1} attempts")
+
+        # 2. Conversion (only pages without a checkpoint from an earlier delivery)
+        is_pdf = file_key.endswith('.pdf')
+        page_count = PDFConverter.page_count(local_input) if is_pdf else 1
+        checkpoints = crud.get_page_checkpoints(db, job_id)
+        planned = load_plans(job_id)
+        todo = [n for n in range(1, page_count + 1) if n not in checkpoints and n not in planned]
+        if checkpoints or planned:
+            logger.info(f"[{job_id}] Resuming: {len(checkpoints)} pages done, {len(planned)} planned, {len(todo)} left.")
+
+        progress_stream.progress(job_id, 10, 'Converting PDF...')
         with timer_logger("pdf_conversion", job_id):
-         images = PDFConverter.to_images(local_input) if file_key.endswith('.pdf') else [cv2.imread(str(local_input))]
-        start_time = time.time()
-        with timer_logger("gpu_inference_total", job_id):
-          # 3. Analysis Loop
-          final_pages = []
-          fusion_engine = FusionAssembler()
-          visualizer = Visualizer(settings.CLASS_MAP)
-
-          for i, img in enumerate(images):
-              # Calculate granular progress
-              base_prog = 20
-              per_page = 70 / len(images) # 70% of progress bar is analysis
-              current_prog = int(base_prog + (i * per_page))
-              
-              self.update_state(state='PROCESSING', meta={
-                  'progress': current_prog, 
-                  'status': f'Analyzing Page {i+1}/{len(images)}'
-              })
-
-              # A. Inference (Using Cached Engines from self)
-              vision_res = self.vision_engine.process_full_image(img)
-              ocr_res = self.ocr_engine.analyze_image(img)
-
-              # B. Prepare Detections
-              detections = []
-              if len(vision_res['boxes']) > 0:
-                  for idx, box in enumerate(vision_res['boxes']):
-                      cls_id = int(vision_res['classes'][idx])
-                      detections.append({
-                          "label": visualizer.id_to_name.get(cls_id, "Unknown"),
-                          "bbox": box.tolist(),
-                          "confidence": float(vision_res['scores'][idx])
-                      })
-
-              # C. Logic Fusion
-              # (Generate pseudo-mask if needed, or use segmentation output)
-              h, w = img.shape[:2]
-              mock_mask = np.zeros((h, w), dtype=np.uint8) # Replace with real mask from vision_res if available
-              
-              page_data = fusion_engine.assemble_floorplan(img.shape, mock_mask, detections, ocr_res)
-              
-              # D. Artifact Generation
-              annotated = visualizer.draw_bboxes(img.copy(), vision_res['boxes'], vision_res['scores'], vision_res['classes'])
-              img_name = f"{job_id}_p{i+1}.jpg"
-              img_path = local_dir / img_name
-              cv2.imwrite(str(img_path), annotated)
-              
-              # Upload with Content-Type for browser viewing
-              storage.upload_file(open(img_path, 'rb'), f"results/{job_id}/{img_name}", content_type="image/jpeg")
-              
-              page_data['page'] = i + 1
-              page_data['image_key'] = f"results/{job_id}/{img_name}"
-              final_pages.append(page_data)
-        duration = time.time() - start_time
-        INFERENCE_DURATION.labels(model_type="full_pipeline").observe(duration)
-                # METRIC 2: Count Rooms
-        total_rooms = 0
-        for page in final_pages: # Assuming final_pages populated in loop
-            # page['data'] is list of rooms
-            room_count = len(page.get('data', []))
-            total_rooms += room_count
-            
-        ROOMS_DETECTED.inc(total_rooms)
-        # 4. Final Save
-        output = {"job_id": job_id, "results": final_pages}
-        out_path = local_dir / "final.json"
-        with open(out_path, 'w') as f:
-            json.dump(output, f)
-            
-        storage.upload_file(open(out_path, 'rb'), f"results/{job_id}/data.json", content_type="application/json")
-        
-        result_s3_key = f"results/{job_id}/data.json"
+            if not todo:
+                images = []
+            elif is_pdf:
+                images = PDFConverter.to_images(local_input, dpi=settings.PDF_DPI, pages=todo)
+            else:
+                images = [cv2.imread(str(local_input))]
+
+        # Scale, units and vocabulary are derived ONCE for the whole set
+        if ctx:
+            context = DocumentContext(**ctx["context"])
+        else:
+            with timer_logger("document_context", job_id):
+                context = DocumentContextBuilder.build(
+                    images, settings.PDF_DPI, pdf_path=local_input if is_pdf else None, ocr_engine=self.ocr_engine
+                )
+
+        # --- OPTIMIZATION: Time budget ---
+        # Estimated inference time (tiles x measured seconds per tile) decides,
+        # once per job, how much fidelity to trade for finishing on time.
+        # Pages run in parallel: the job estimate is divided by the fleet's
+        # measured throughput (accelerator seconds finished per second).
+        if ctx:
+            degradation = ctx["degradation"]
+        else:
+            seconds_per_tile = tile_timer.seconds_per_tile()
+            level = DegradationPolicy.choose(
+                [img.shape for img in images], time.time() - started, seconds_per_tile,
+                parallelism=tile_timer.tiles_per_second() * seconds_per_tile
+            )
+            degradation = DegradationPolicy.describe(level)
+            if level:
+                logger.warning(f"[{job_id}] Over time budget; degrading to level {level} ({degradation['name']}).")
+                # Scale notes were read at PDF_DPI; pixel distances shrink with the pages
+                if context.pixels_per_foot:
+                    context.pixels_per_foot *= degradation["dpi"] / settings.PDF_DPI
+                context.dpi = degradation["dpi"]
+        dpi_scale = degradation["dpi"] / settings.PDF_DPI
+        if dpi_scale < 1:
+            images = [cv2.resize(img, None, fx=dpi_scale, fy=dpi_scale, interpolation=cv2.INTER_AREA) for img in images]
+
+        fusion_hash = context.fusion_hash()
+        ctx = {
+            "job_id": job_id,
+            "file_key": file_key,
+            "file_hash": file_hash,
+            "tenant_id": tenant_id,
+            "webhook_url": webhook_url,
+            "lease_hash": lease_hash,
+            "context": context.dict(),
+            "fusion_hash": fusion_hash,
+            "page_count": page_count,
+            "degradation": degradation,
+            "dispatched": False
+        }
+        save_job_ctx(ctx)
+        # Redis join state may have expired; the DB checkpoints are authoritative
+        for entry in checkpoints.values():
+            record_page_done(db, ctx, entry)
+
+        # 3. Page planning
+        progress_stream.progress(job_id, 15, 'Planning pages...')
+        fusion_engine = FusionAssembler(scale_value=context.scale_value, vocabulary=context.vocabulary)
+        id_to_name = {v: k for k, v in settings.CLASS_MAP.items()}
+        # Page-level cache key parts: render params + every stage's config
+        render_params = {
+            "dpi": degradation["dpi"] if is_pdf else None,
+            **{stage: StageStore.config_hash(stage) for stage in (StageStore.VISION, StageStore.OCR, StageStore.ROOMS)}
+        }
+        # Explicit earlier revision of this set (page N is compared with its page N)
+        prior_refs = prior_page_refs(previous_input_hash)
+
+        new_plans = []      # Pages that still need vision and/or post-processing
+        new_entries = []    # Pages answered from the page cache
+        counts = {"reused": 0, "near_duplicate": 0, "incremental": 0}
+        uploader = ArtifactUploader(storage)
+
+        def checkpoint():
+            # Only what is confirmed in S3 is recorded
+            uploader.wait_all()
+            for entry in new_entries:
+                record_page_done(db, ctx, entry)
+            save_plans(job_id, new_plans)
+            planned.update({plan["page"]: plan for plan in new_plans})
+            new_entries.clear()
+            new_plans.clear()
+
+        with timer_logger("page_planning", job_id):
+            for page_no, img in zip(todo, images):
+                if lease_hash:
+                    single_flight.renew(lease_hash, job_id)
+                if len(new_entries) + len(new_plans) >= settings.INGEST_CHECKPOINT_PAGES:
+                    checkpoint()
+
+                # --- OPTIMIZATION: Page-level cache (unchanged sheets of a revised set) ---
+                page_hash = PageCache.page_hash(img, render_params)
+                cached_page = page_cache.get(page_hash)
+                if cached_page:
+                    page_data = reuse_cached_page(cached_page, img.shape, fusion_engine, fusion_hash, id_to_name)
+                    page_data['page'] = page_no
+                    page_data['image_key'] = cached_page["image_key"]
+                    new_entries.append({
+                        "page": page_no,
+                        "mode": "cached",
+                        "shape": list(img.shape),
+                        "result_key": save_page_result(job_id, page_data, uploader),
+                        "image_key": cached_page["image_key"],
+                        "stages": {"input_hash": cached_page["input_hash"], "page": cached_page["page"]}
+                    })
+                    counts["reused"] += 1
+                    continue
+
+                # --- OPTIMIZATION: Near-duplicate / earlier revision of this sheet ---
+                thumb = AdaptiveSlicer.make_thumbnail(img)
+                ink = PageAligner.ink_map(img) if thumb is not None else None
+                phash = PerceptualHash.compute(thumb) if thumb is not None else None
+                candidates = [prior_refs[page_no]] if page_no in prior_refs else []
+                if tenant_id and phash is not None and settings.NEAR_DUP_ENABLED:
+                    candidates += [entry for _, entry in near_dup_index.lookup(tenant_id, phash)[:3]]
+                prior = align_candidates(candidates, thumb, img.shape, ink) if thumb is not None else None
+
+                mode, regions = "full", None
+                if prior and prior[1].is_near_duplicate(img.shape):
+                    # Same sheet (rescan / other DPI): map stored outputs, no inference
+                    stages = transfer_stages(*prior)
+                    if stages:
+                        stage_store.save_vision(file_hash, page_no, stages[0], degradation)
+                        stage_store.save_ocr(file_hash, page_no, stages[1], degradation)
+                        stage_store.save_rooms(file_hash, page_no, stages[2], degradation)
+                        mode = "transfer"
+                elif prior and changed_area_share(prior[1], img.shape) <= settings.REVISION_MAX_CHANGED_AREA:
+                    # Revised sheet: stored outputs mapped into this page, only changes re-inferred
+                    stages = transfer_stages(*prior)
+                    if stages:
+                        stage_store.save_vision(file_hash, page_no, stages[0], degradation)
+                        stage_store.save_ocr(file_hash, page_no, stages[1], degradation)
+                        mode, regions = "incremental", prior[1].changed_regions(img.shape)
+                if mode == "transfer":
+                    counts["near_duplicate"] += 1
+                elif mode == "incremental":
+                    counts["incremental"] += 1
+
+                if thumb is not None:
+                    # Lets later revisions of this sheet align against it
+                    stage_store.save_thumbnail(file_hash, page_no, thumb)
+                    if ink is not None:
+                        stage_store.save_ink_map(file_hash, page_no, ink)
+
+                ok, png = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+                if not ok:
+                    raise DataIngestionError(f"Could not encode page {page_no}")
+                uploader.submit(png.tobytes(), raster_key(job_id, page_no), content_type="image/png")
+                new_plans.append({
+                    "page": page_no,
+                    "shape": list(img.shape),
+                    "raster_key": raster_key(job_id, page_no),
+                    "mode": mode,
+                    "regions": regions,
+                    "page_hash": page_hash,
+                    "phash": phash
+                })
+
+            checkpoint()
+        del images
+
+        # 4. Fan out through the fair scheduler: pages are released to the
+        #    vision (accelerator) / cpu_post queues as capacity frees up,
+        #    interleaved across tenants; the last finished page triggers finalize.
+        plans = [planned[n] for n in sorted(planned)]
+        if plans:
+            items = [
+                {"job_id": job_id, "page": plan["page"], "plan": plan,
+                 "cost": FairScheduler.page_cost(plan["shape"], plan["mode"], plan["regions"])}
+                for plan in plans
+            ]
+            job_cost = sum(item["cost"] for item in items)
+            scheduler.enqueue(
+                tenant_id or settings.SCHEDULER_DEFAULT_TENANT,
+                crud.get_scheduling_weight(db, tenant_id),
+                job_id, job_cost, items
+            )
+            admission.record_job_tiles(job_cost)
+        ctx["dispatched"] = True
+        save_job_ctx(ctx)
+        dispatched = True
+        if lease_hash:
+            # Pages may queue in the scheduler for longer than the ingest lease;
+            # from here the lease lives with the job state (released by finalize / fail)
+            single_flight.renew(lease_hash, job_id, JOB_STATE_TTL)
+        if plans:
+            pump_scheduler()
+        else:
+            finalize_blueprint.delay(job_id)
+
+        logger.info(
+            f"[{job_id}] Dispatched {len(plans)} pages ({counts['reused']} from page cache, "
+            f"{counts['near_duplicate']} near-duplicates, {counts['incremental']} incremental)."
+        )
+        progress_stream.progress(job_id, 20, f'Analyzing {len(plans)} pages')
+        return {"status": "dispatched", "pages": page_count}
+
+    except Retry:
+        # Waiting on an in-flight duplicate; not a failure
+        retrying = True
+        raise
+    except SoftTimeLimitExceeded:
+        if deliveries < settings.JOB_MAX_DELIVERIES:
+            # Checkpointed pages are kept; the next attempt picks up after them
+            logger.warning(f"[{job_id}] Timed out (attempt {deliveries}); retrying from the last checkpoint.")
+            retrying = True
+            raise self.retry(countdown=1, max_retries=None)
+        logger.error("Task timed out!")
+        clear_job_state(job_id)
+        crud.update_job_status(db, job_id, "FAILED", error="Processing timed out. File too large.")
+        progress_stream.publish(job_id, "failed", status="Processing timed out", error="Processing timed out. File too large.")
+        raise
+    except Exception as e:
+        logger.error(f"Processing failed: {e}")
+        clear_job_state(job_id)
+        crud.update_job_status(db, job_id, "FAILED", error=str(e))
+        progress_stream.publish(job_id, "failed", status="Processing failed", error=str(e))
+        raise e
+    finally:
+        if uploader is not None:
+            uploader.close()
+        # After dispatch the lease belongs to the page pipeline (released by finalize)
+        if lease_hash and not dispatched:
+            single_flight.release(lease_hash, job_id)
+        if not retrying:
+            # Planned work is now counted by the scheduler (admission control)
+            admission.settle(tenant_id, job_id)
+        db.close() # CRITICAL: Close DB connection
+        import shutil
+        if local_dir.exists():
+            shutil.rmtree(local_dir)
+
+@celery_app.task(
+    bind=True,
+    base=ModelTask,
+    name="blueprint_brain.worker.tasks.vision_page",
+    soft_time_limit=300,
+    acks_late=True
+)
+def vision_page(self, plan: dict, ctx: dict) -> dict:
+    """Vision stage (accelerator queue): model batches for one page, output to StageStore."""
+    job_id, file_hash, page_no = ctx["job_id"], ctx["file_hash"], plan["page"]
+    if page_is_done(job_id, page_no):
+        # Redelivered after the page was checkpointed; post_page only releases it
+        return plan
+    check_page_delivery(ctx, page_no, "vision")
+    img = load_raster(plan["raster_key"])
+
+    degradation = ctx["degradation"]
+    engine = self.light_vision_engine if degradation["light_model"] else self.vision_engine
+    stride = int(settings.TILE_SIZE * (1 - degradation["tile_overlap"]))
+
+    with timer_logger("vision_page", job_id):
+        if plan["mode"] == "incremental":
+            prior = stage_store.load_vision(file_hash, page_no, degradation)
+            vision_res = engine.process_changed_regions(img, prior['raw'], plan["regions"], stride)
+        else:
+            start = time.time()
+            vision_res = engine.process_full_image(img, stride)
+            # Feeds the time-budget estimate of later jobs
+            tile_timer.record(time.time() - start, len(engine.tile_grid(img.shape, stride)), degradation["light_model"])
+
+    stage_store.save_vision(file_hash, page_no, vision_res, degradation)
+    return plan
+
+@celery_app.task(
+    bind=True,
+    base=ModelTask,
+    name="blueprint_brain.worker.tasks.post_page",
+    soft_time_limit=300,
+    acks_late=True
+)
+def post_page(self, plan: dict, ctx: dict) -> dict:
+    """
+    Post-processing stage (CPU queue): OCR, room segmentation, fusion and
+    artifacts for one page. The job's last page enqueues finalize_blueprint.
+    """
+    job_id, file_hash, page_no, mode = ctx["job_id"], ctx["file_hash"], plan["page"], plan["mode"]
+    if page_is_done(job_id, page_no):
+        # Redelivered after the checkpoint: the join already counted this page
+        logger.info(f"[{job_id}] Page {page_no} already checkpointed; skipping.")
+        scheduler.complete(plan["fq_member"])
+        pump_scheduler()
+        return json.loads(get_redis().hget(f"job_pages:{job_id}", page_no))
+    check_page_delivery(ctx, page_no, "post")
+    img = load_raster(plan["raster_key"])
+    context = DocumentContext(**ctx["context"])
+    degradation = ctx["degradation"]
+    visualizer = Visualizer(settings.CLASS_MAP)
+
+    with timer_logger("post_page", job_id):
+        vision_res = stage_store.load_vision(file_hash, page_no, degradation)
+        if vision_res is None:
+            raise DataIngestionError(f"Vision output missing for page {page_no} of {file_hash}")
+
+        if mode == "transfer":
+            ocr_res = [TextEntity(**row) for row in stage_store.load_ocr(file_hash, page_no, degradation)]
+            room_polys = stage_store.load_rooms(file_hash, page_no, degradation)
+        else:
+            if mode == "incremental":
+                prior_ocr = [TextEntity(**row) for row in stage_store.load_ocr(file_hash, page_no, degradation)]
+                ocr_res = ocr_changed_regions(
+                    self.ocr_engine, img, prior_ocr, plan["regions"], degradation["ocr_angle_cls"]
+                )
+            else:
+                ocr_res = self.ocr_engine.analyze_image(img, angle_cls=degradation["ocr_angle_cls"])
+            # Rooms come from classical segmentation (CPU, reduced resolution)
+            room_polys = RoomSegmenter().segment(img)
+            stage_store.save_ocr(file_hash, page_no, ocr_res, degradation)
+            stage_store.save_rooms(file_hash, page_no, room_polys, degradation)
+
+        # Logic Fusion
+        fusion_engine = FusionAssembler(scale_value=context.scale_value, vocabulary=context.vocabulary)
+        detections = build_detections(vision_res, visualizer.id_to_name)
+        page_data = fusion_engine.assemble_floorplan(img.shape, None, detections, ocr_res, room_polygons=room_polys)
+
+        # Artifact Generation (encoded in memory, uploaded in the background)
+        annotated = visualizer.draw_bboxes(img, vision_res['boxes'], vision_res['scores'], vision_res['classes'])
+        ok, jpeg = cv2.imencode(".jpg", annotated, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if not ok:
+            raise DataIngestionError(f"Could not encode annotated page {page_no}")
+        image_key = f"results/{job_id}/{job_id}_p{page_no}.jpg"
+        page_data['page'] = page_no
+        page_data['image_key'] = image_key
+
+        with ArtifactUploader(storage) as uploader:
+            # Content-Type for browser viewing
+            uploader.submit(jpeg.tobytes(), image_key, content_type="image/jpeg")
+            result_key = save_page_result(job_id, page_data, uploader)
+            uploader.wait_all()
+
+    # Published once the uploads it points at are confirmed. Degraded pages
+    # are not, so later jobs never inherit reduced fidelity.
+    if not degradation["level"]:
+        page_cache.put(plan["page_hash"], {
+            "input_hash": file_hash,
+            "page": page_no,
+            "result_key": result_key,
+            "image_key": image_key,
+            "fusion_hash": ctx["fusion_hash"]
+        })
+    if ctx["tenant_id"] and plan["phash"] is not None and not degradation["level"]:
+        near_dup_index.add(ctx["tenant_id"], plan["phash"], {
+            "input_hash": file_hash, "page": page_no, "shape": plan["shape"][:2]
+        })
+
+    entry = {
+        "page": page_no,
+        "mode": mode,
+        "shape": plan["shape"],
+        "result_key": result_key,
+        "image_key": image_key,
+        "stages": {"input_hash": file_hash, "page": page_no}
+    }
+    if degradation["level"]:
+        # Stage outputs live under the degraded config (StageStore.stage_config)
+        entry["stages"]["degradation"] = degradation
+    db = SessionLocal()
+    try:
+        last_page = record_page_done(db, ctx, entry)
+    finally:
+        db.close()
+
+    # Capacity back to the scheduler, then release the next pages (any tenant)
+    scheduler.complete(plan["fq_member"])
+    pump_scheduler()
+    if last_page:
+        finalize_blueprint.delay(job_id)
+    return entry
+
+@celery_app.task(
+    bind=True,
+    name="blueprint_brain.worker.tasks.finalize_blueprint",
+    soft_time_limit=120,
+    acks_late=True
+)
+def finalize_blueprint(self, job_id: str):
+    """Join (CPU queue): assembles per-page results into the job result."""
+    ctx = load_job_ctx(job_id)
+    if ctx is None:
+        logger.warning(f"[{job_id}] Finalize skipped: job state already cleared.")
+        return {"status": "skipped"}
+    file_hash = ctx["file_hash"]
+    db = SessionLocal()
+
+    try:
+        # Checkpoint rows are the durable record of every finished page
+        checkpoints = crud.get_page_checkpoints(db, job_id)
+        pages = [checkpoints[n] for n in sorted(checkpoints)]
+        context = DocumentContext(**ctx["context"])
+
+        with timer_logger("finalize", job_id):
+            final_pages = []
+            for entry in pages:
+                page_data = ResultCodec.loads_json(storage.download_bytes(entry["result_key"]))
+                page_data['page'] = entry["page"]
+                page_data['image_key'] = entry["image_key"]
+                final_pages.append(page_data)
+
+        # METRIC 2: Count Rooms
+        meta = summarize_pages(final_pages)
+        meta["input_hash"] = file_hash
+        meta["pixels_per_foot"] = context.scale_value
+        modes = [p["mode"] for p in pages]
+        meta["reused_pages"] = modes.count("cached")
+        meta["near_duplicate_pages"] = modes.count("transfer")
+        meta["incremental_pages"] = modes.count("incremental")
+        meta["degradation"] = ctx["degradation"]
+        ROOMS_DETECTED.inc(meta["total_rooms"])
+
+        # Manifest lets refuse_blueprint rebuild results without the images.
+        # A degraded run does not replace a manifest of an earlier full run.
+        if not ctx["degradation"]["level"] or stage_store.load_manifest(file_hash) is None:
+            stage_store.save_manifest(file_hash, {
+                "file_key": ctx["file_key"],
+                "page_count": len(final_pages),
+                "context": ctx["context"],
+                "pages": [
+                    # 'stages' points at the run (and config) that produced this page's stage outputs
+                    {"page": p["page"], "shape": p["shape"], "image_key": p["image_key"], "stages": p["stages"]}
+                    for p in pages
+                ]
+            })
+
+        # Final Save
+        result_s3_key = save_result(job_id, final_pages, context, ctx["degradation"])
         
-        # Cache the result for future uploads (Expire in 7 days)
-        r.setex(f"file_hash:{file_hash}", 604800, result_s3_key)
+        # Cache the result for future uploads (Expire in 7 days). A degraded
+        # result is not: resubmitting the file should get full fidelity.
+        if not ctx["degradation"]["level"]:
+            result_cache.set_result_key(file_hash, result_s3_key)
 
+        job = crud.get_job(db, job_id)
+        if job and job.started_at:
+            INFERENCE_DURATION.labels(model_type="full_pipeline").observe(
+                (datetime.utcnow() - job.started_at).total_seconds()
+            )
         crud.update_job_status(
             db, 
             job_id, 
             "COMPLETED", 
-            result_key=result_s3_key, # Variable from Phase 3 logic
+            result_key=result_s3_key,
             meta=meta
         )
+        progress_stream.publish(job_id, "completed", 100, "Done", result_key=result_s3_key)
 
         # --- OPTIMIZATION: Webhook ---
+        webhook_url = ctx["webhook_url"]
         if webhook_url:
             try:
                 logger.info(f"[{job_id}] Dispatching Webhook to {webhook_url}")
@@ -208,17 +989,94 @@ def process_blueprint(self, file_key: str, webhook_url: str = None):
 
         return {"status": "success", "result_key": result_s3_key}
 
-    except SoftTimeLimitExceeded:
-        logger.error("Task timed out!")
+    except Exception as e:
+        logger.error(f"[{job_id}] Finalize failed: {e}")
         crud.update_job_status(db, job_id, "FAILED", error=str(e))
-        self.update_state(state='FAILURE', meta={'error': 'Processing timed out. File too large.'})
+        progress_stream.publish(job_id, "failed", status="Processing failed", error=str(e))
         raise
+    finally:
+        if ctx["lease_hash"]:
+            single_flight.release(ctx["lease_hash"], job_id)
+        clear_job_state(job_id)
+        db.close()
+
+@celery_app.task(name="blueprint_brain.worker.tasks.fail_blueprint")
+def fail_blueprint(request, exc, traceback, ctx: dict, fq_member: str = None):
+    """Page error callback: a page task failed for good, so the job fails."""
+    job_id = ctx["job_id"]
+    logger.error(f"[{job_id}] Page task {request.id} failed: {exc}")
+    # Remaining queued pages of this job are dropped once its state is gone
+    clear_job_state(job_id)
+    if fq_member:
+        scheduler.complete(fq_member)
+    db = SessionLocal()
+    try:
+        crud.update_job_status(db, job_id, "FAILED", error=str(exc))
+        progress_stream.publish(job_id, "failed", status="Processing failed", error=str(exc))
+    finally:
+        db.close()
+    if ctx["lease_hash"]:
+        single_flight.release(ctx["lease_hash"], job_id)
+    pump_scheduler()
+
+@celery_app.task(
+    bind=True,
+    name="blueprint_brain.worker.tasks.refuse_blueprint",
+    soft_time_limit=120,
+    acks_late=True
+)
+def refuse_blueprint(self, input_hash: str, scale_value: float = None):
+    """
+    Fusion-only re-run: rebuilds the final result from cached vision, OCR and
+    room outputs (see StageStore). No download, rasterization or inference.
+    """
+    job_id = self.request.id
+    logger.info(f"[{job_id}] Re-fusion Started: {input_hash}")
+    db = SessionLocal()
+
+    try:
+        crud.update_job_status(db, job_id, "PROCESSING")
+
+        manifest = stage_store.load_manifest(input_hash)
+        if manifest is None:
+            raise DataIngestionError(f"No cached stage outputs for input {input_hash}")
+
+        with timer_logger("refusion", job_id):
+            # Document context from the original run; an explicit scale overrides it
+            context = DocumentContext(**manifest.get("context", {}))
+            if scale_value:
+                context.pixels_per_foot = scale_value
+                context.source = "user"
+            fusion_engine = FusionAssembler(scale_value=context.scale_value, vocabulary=context.vocabulary)
+            id_to_name = {v: k for k, v in settings.CLASS_MAP.items()}
+            final_pages = []
+            degradation = DegradationPolicy.describe(0)
+
+            for page in manifest["pages"]:
+                ref = page.get("stages", {"input_hash": input_hash, "page": page["page"]})
+                page_data = fuse_from_stages(
+                    fusion_engine, ref["input_hash"], ref["page"], page["shape"], id_to_name, ref.get("degradation")
+                )
+                if ref.get("degradation") and ref["degradation"]["level"] > degradation["level"]:
+                    degradation = ref["degradation"]
+                page_data['page'] = page["page"]
+                page_data['image_key'] = page["image_key"]
+                final_pages.append(page_data)
+
+        meta = summarize_pages(final_pages)
+        meta.update({"input_hash": input_hash, "refused": True, "pixels_per_foot": context.scale_value,
+                     "degradation": degradation})
+
+        result_s3_key = save_result(job_id, final_pages, context, degradation)
+        crud.update_job_status(db, job_id, "COMPLETED", result_key=result_s3_key, meta=meta)
+        progress_stream.publish(job_id, "completed", 100, "Done", result_key=result_s3_key)
+
+        return {"status": "success", "result_key": result_s3_key}
+
     except Exception as e:
-        logger.error(f"Processing failed: {e}")
-        self.update_state(state='FAILURE', meta={'error': str(e)})
-        raise e
+        logger.error(f"Re-fusion failed: {e}")
+        crud.update_job_status(db, job_id, "FAILED", error=str(e))
+        progress_stream.publish(job_id, "failed", status="Re-fusion failed", error=str(e))
+        raise
     finally:
-        db.close() # CRITICAL: Close DB connection
-        import shutil
-        if local_dir.exists():
-            shutil.rmtree(local_dir)
\ No newline at end of file
+        db.close()
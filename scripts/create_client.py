@@ -12,12 +12,13 @@ def main():
     parser = argparse.ArgumentParser(description="Create B2B API Key")
     parser.add_argument("name", help="Client Name (e.g., 'Skanska')")
     parser.add_argument("--limit", type=int, default=50, help="Rate limit per minute")
+    parser.add_argument("--burst", type=int, default=None, help="Burst size (default: one minute's worth)")
     args = parser.parse_args()
 
     db = SessionLocal()
     try:
         print(f"Creating key for: {args.name}")
-        raw_key = SecurityService.create_api_key(db, args.name, args.limit)
+        raw_key = SecurityService.create_api_key(db, args.name, args.limit, args.burst)
         print("\n" + "="*40)
         print(f"CLIENT: {args.name}")
         print(f"LIMIT:  {args.limit} req/min")
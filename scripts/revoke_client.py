@@ -0,0 +1,28 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root
+sys.path.append(str(Path(__file__).parent.parent))
+
+from blueprint_brain.src.db.session import SessionLocal
+from blueprint_brain.src.security.service import SecurityService
+
+def main():
+    parser = argparse.ArgumentParser(description="Revoke B2B API Key")
+    parser.add_argument("key_id", help="ApiKey id (UUID)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if SecurityService.revoke_key(db, args.key_id):
+            print(f"Revoked key {args.key_id}. Cached verifications were dropped.")
+        else:
+            print(f"No key with id {args.key_id}")
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()